@@ -6,6 +6,8 @@ class ArtworksConfig(AppConfig):
     name = 'artworks'
 
     def ready(self):
+        from . import signals  # noqa: F401
+        
         if os.environ.get("DJANGO_PRELOAD_DB") == "1":
             from .preload_dbpedia import preload_all
             preload_all(limit=20)
@@ -0,0 +1,161 @@
+"""
+Micro-benchmarks for the import hot paths, run with `manage.py benchmark`.
+Each benchmark times the current implementation against the one it replaced
+on synthetic records and checks that both produce the same output.
+"""
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF, XSD
+from .lido import iter_lido_records, iter_lido_records_parallel
+from .ntriples import NTriplesWriter
+from .sparql import EX
+import os
+import tempfile
+import time
+
+
+def synthetic_paintings(count: int):
+    """Records shaped like the ones build_painting_window turns into triples"""
+    return [
+        {
+            "title": f"Painting {i} \"study\"",
+            "author": f"Artist {i % 97}",
+            "date": f"{1500 + i % 400}-01-01",
+            "museum": f"Museum {i % 31}",
+            "movement": f"Movement {i % 13}" if i % 3 else None,
+            "image_url": f"http://commons.wikimedia.org/wiki/Special:FilePath/P{i}.jpg",
+            "birthDate": f"{1450 + i % 400}-05-01",
+            "birthPlace": f"City {i % 53}\nRegion",
+            "nationality": "Kingdom of Romania" if i % 2 else None,
+            "creator_movement": None,
+        }
+        for i in range(count)
+    ]
+
+
+def synthetic_lido(count: int) -> bytes:
+    """LIDO document with `count` records, every fifth one without a creator"""
+    records = "".join(
+        f"""<lido:lido><lido:lidoRecID>RO-{i}</lido:lidoRecID>
+        <lido:descriptiveMetadata>
+          <lido:objectIdentificationWrap><lido:titleWrap><lido:titleSet>
+            <lido:appellationValue>Peisaj {i}</lido:appellationValue>
+          </lido:titleSet></lido:titleWrap></lido:objectIdentificationWrap>
+          <lido:eventWrap><lido:eventSet><lido:event>
+            <lido:eventActor><lido:actorInRole><lido:actor><lido:nameActorSet>
+              <lido:appellationValue>{"Nicolae Grigorescu" if i % 5 else ""}</lido:appellationValue>
+            </lido:nameActorSet></lido:actor></lido:actorInRole></lido:eventActor>
+            <lido:eventDate><lido:displayDate>18{i % 100:02d}</lido:displayDate></lido:eventDate>
+          </lido:event></lido:eventSet></lido:eventWrap>
+          <lido:objectClassificationWrap><lido:styleWrap><lido:styleSet>
+            <lido:term> Impresionism </lido:term>
+          </lido:styleSet></lido:styleWrap></lido:objectClassificationWrap>
+        </lido:descriptiveMetadata>
+        <lido:administrativeMetadata><lido:recordWrap>
+          <lido:repositoryWrap><lido:repositorySet><lido:repositoryName><lido:legalBodyName>
+            <lido:appellationValue>Muzeul National de Arta {i % 7}</lido:appellationValue>
+          </lido:legalBodyName></lido:repositoryName></lido:repositorySet></lido:repositoryWrap>
+          <lido:resourceWrap><lido:resourceSet><lido:resourceRepresentation>
+            <lido:linkResource>http://example.org/img/{i}.jpg</lido:linkResource>
+          </lido:resourceRepresentation></lido:resourceSet></lido:resourceWrap>
+        </lido:recordWrap></lido:administrativeMetadata></lido:lido>
+"""
+        for i in range(count)
+    )
+    return f'<lido:lidoWrap xmlns:lido="http://www.lido-schema.org">{records}</lido:lidoWrap>'.encode("utf-8")
+
+
+def _painting_triples(record):
+    art = EX[record["title"].replace(" ", "_").replace('"', "")]
+    artist = EX[record["author"].replace(" ", "_")]
+    yield art, RDF.type, EX.Artwork, False
+    yield art, EX.title, record["title"], True
+    yield art, EX.createdBy, artist, False
+    yield artist, RDF.type, EX.Artist, False
+    yield artist, EX.name, record["author"], True
+    for field, subject, predicate in (
+        ("date", art, EX.date), ("museum", art, EX.museum), ("movement", art, EX.movement),
+        ("image_url", art, EX.image), ("birthDate", artist, EX.birthDate),
+        ("birthPlace", artist, EX.birthPlace), ("nationality", artist, EX.nationality),
+        ("creator_movement", artist, EX.movement),
+    ):
+        if record[field]:
+            yield subject, predicate, record[field], True
+
+
+def rdflib_ntriples(records) -> bytes:
+    """Previous path: build an rdflib Graph, then serialize it"""
+    g = Graph()
+    for record in records:
+        for s, p, o, is_literal in _painting_triples(record):
+            g.add((URIRef(s), p, Literal(o, datatype=XSD.string) if is_literal else URIRef(o)))
+    return g.serialize(format="nt").encode("utf-8")
+
+
+def writer_ntriples(records) -> bytes:
+    w = NTriplesWriter()
+    for record in records:
+        for s, p, o, is_literal in _painting_triples(record):
+            if is_literal:
+                w.add_literal(s, p, o, XSD.string)
+            else:
+                w.add_iri(s, p, o)
+    return w.getvalue()
+
+
+def _time(fn, *args, repeat: int = 3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def benchmark_ntriples(records: int = 5000, repeat: int = 3):
+    """Time rdflib Graph + serialize against NTriplesWriter on the same triples"""
+    data = synthetic_paintings(records)
+    rdflib_seconds, expected = _time(rdflib_ntriples, data, repeat=repeat)
+    writer_seconds, produced = _time(writer_ntriples, data, repeat=repeat)
+    return {
+        "name": "ntriples",
+        "records": records,
+        "triples": produced.count(b"\n"),
+        "identical": sorted(expected.splitlines()) == sorted(produced.splitlines()),
+        "baseline_us_per_record": round(rdflib_seconds / records * 1e6, 2),
+        "current_us_per_record": round(writer_seconds / records * 1e6, 2),
+        "speedup": round(rdflib_seconds / max(writer_seconds, 1e-9), 1),
+    }
+
+
+def benchmark_lido_parallel(records: int = 5000, repeat: int = 3, workers: int | None = None):
+    """Time the streaming LIDO parser against the process pool on the same file"""
+    workers = workers or os.cpu_count() or 1
+    fd, path = tempfile.mkstemp(suffix=".xml")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(synthetic_lido(records))
+        # Ranges small enough that every worker gets several of them
+        chunk_bytes = max(os.path.getsize(path) // (workers * 4), 64 * 1024)
+        serial_seconds, expected = _time(lambda: list(iter_lido_records(path)), repeat=repeat)
+        parallel_seconds, produced = _time(
+            lambda: list(iter_lido_records_parallel(path, workers, chunk_bytes=chunk_bytes)), repeat=repeat
+        )
+    finally:
+        os.remove(path)
+    return {
+        "name": "lido_parallel",
+        "records": records,
+        "workers": workers,
+        "identical": expected == produced,
+        "baseline_us_per_record": round(serial_seconds / records * 1e6, 2),
+        "current_us_per_record": round(parallel_seconds / records * 1e6, 2),
+        "speedup": round(serial_seconds / max(parallel_seconds, 1e-9), 1),
+    }
+
+
+BENCHMARKS = {
+    "ntriples": benchmark_ntriples,
+    "lido_parallel": benchmark_lido_parallel,
+}
@@ -0,0 +1,86 @@
+"""
+Helpers shared by the enrichment caches (DBpedia, Getty): TTL jitter and
+background refreshes, so an expired entry is served right away and renewed
+off the request path.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.db import close_old_connections
+import hashlib
+import threading
+
+TTL_JITTER = 0.1            # +/- 10% of the TTL, stable per key
+REFRESH_WORKERS = 2
+
+_executor = ThreadPoolExecutor(max_workers=REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def jittered_ttl(key: str, ttl_days: float, jitter: float = TTL_JITTER) -> timedelta:
+    """
+    TTL spread deterministically per key, so entries fetched in the same import
+    do not all expire on the same day.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    fraction = int.from_bytes(digest, "big") / 2**64      # [0, 1)
+    return timedelta(days=ttl_days * (1 + jitter * (2 * fraction - 1)))
+
+
+def submit_refresh(key, fn, *args):
+    """Run fn(*args) on the refresh pool unless a refresh for key is already queued"""
+    with _in_flight_lock:
+        if key in _in_flight:
+            return False
+        _in_flight.add(key)
+
+    def run():
+        try:
+            fn(*args)
+        except Exception as e:
+            print(f"[CACHE REFRESH ERROR] {key} → {e}")
+        finally:
+            with _in_flight_lock:
+                _in_flight.discard(key)
+            close_old_connections()
+
+    _executor.submit(run)
+    return True
+
+
+def _expiring(model, key_field, ttl_days, within_days, limit=None):
+    """Keys of cache rows whose jittered TTL runs out in the next `within_days`"""
+    from django.utils import timezone
+
+    now = timezone.now()
+    horizon = now + timedelta(days=within_days)
+    # Earliest possible expiry bounds the query, the exact jittered TTL is checked per row
+    oldest_fresh = horizon - timedelta(days=ttl_days * (1 - TTL_JITTER))
+    keys = []
+    rows = model.objects.filter(fetched_at__lt=oldest_fresh).order_by("fetched_at").values_list(key_field, "fetched_at")
+    for key, fetched_at in rows.iterator():
+        if fetched_at + jittered_ttl(key, ttl_days) <= horizon:
+            keys.append(key)
+            if limit and len(keys) >= limit:
+                break
+    return keys
+
+
+def refresh_ahead(within_days: float = 7, limit: int | None = None):
+    """
+    Renew DBpedia and Getty cache entries before they expire, so requests keep
+    hitting fresh rows. Meant to run periodically (manage.py refresh_enrichment_caches).
+    Returns {cache: entries refreshed}.
+    """
+    from . import dbpedia, getty_enrichment
+    from .enrichment_engine import enrich
+    from .models import DBpediaArtist, GettyAAT, GettyULAN
+
+    names = _expiring(GettyULAN, "name", getty_enrichment.CACHE_TTL_DAYS, within_days, limit)
+    terms = _expiring(GettyAAT, "term", getty_enrichment.CACHE_TTL_DAYS, within_days, limit)
+    artists = _expiring(DBpediaArtist, "name", dbpedia.CACHE_TTL_DAYS, within_days, limit)
+    enrich(ulan_names=names, aat_terms=terms, dbpedia_names=artists, force=True)
+    counts = {"ulan": len(names), "aat": len(terms), "dbpedia": len(artists)}
+
+    print(f"[CACHE REFRESH] Refreshed ahead of expiry: {counts}")
+    return counts
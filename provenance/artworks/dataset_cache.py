@@ -0,0 +1,144 @@
+"""
+Local cache for downloaded dataset files (the data.gov.ro LIDO XML).
+
+Each file is stored under settings.DATASET_CACHE_DIR with a <name>.json next
+to it holding the URL, ETag, Last-Modified, size and sha256. Later fetches
+are conditional (If-None-Match / If-Modified-Since), so an unchanged file
+costs a 304. An interrupted transfer is kept as <name>.part and resumed with
+a Range request (If-Range makes the server send the whole file again if it
+changed meanwhile). The checksum of the last successfully imported version
+is recorded too, so importers can skip parsing an unchanged file.
+"""
+from dataclasses import dataclass
+from django.conf import settings
+from pathlib import Path
+from . import http_client
+import hashlib
+import json
+import os
+import requests
+
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+DOWNLOAD_TIMEOUT = 30
+
+
+@dataclass
+class CachedFile:
+    path: Path
+    sha256: str
+    size: int
+    changed: bool       # False when the server answered 304 Not Modified
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    def __init__(self, directory=None):
+        self.directory = Path(directory or getattr(settings, "DATASET_CACHE_DIR", settings.BASE_DIR / "dataset_cache"))
+
+    def _paths(self, name: str):
+        return self.directory / name, self.directory / f"{name}.part", self.directory / f"{name}.json"
+
+    def metadata(self, name: str) -> dict:
+        meta_path = self._paths(name)[2]
+        try:
+            return json.loads(meta_path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_metadata(self, name: str, meta: dict):
+        meta_path = self._paths(name)[2]
+        tmp = meta_path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(meta, indent=2))
+        os.replace(tmp, meta_path)
+
+    def fetch(self, url: str, name: str, tag: str = "DATASET") -> CachedFile:
+        """Bring the cached copy of `url` up to date and return it (raises requests.RequestException)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path, part, _ = self._paths(name)
+        meta = self.metadata(name)
+
+        headers = {}
+        resume_from = 0
+        partial = meta.get("partial") or {}
+        if part.exists() and partial.get("url") == url and (partial.get("etag") or partial.get("last_modified")):
+            resume_from = part.stat().st_size
+            headers["Range"] = f"bytes={resume_from}-"
+            headers["If-Range"] = partial.get("etag") or partial["last_modified"]
+        elif path.exists() and meta.get("url") == url and meta.get("sha256"):
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        try:
+            response = http_client.get(url, timeout=DOWNLOAD_TIMEOUT, stream=True, headers=headers)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 416:
+                # The partial file does not fit the current resource: start over
+                part.unlink(missing_ok=True)
+                meta.pop("partial", None)
+                self._save_metadata(name, meta)
+                return self.fetch(url, name, tag)
+            raise
+
+        with response:
+            if response.status_code == 304:
+                print(f"[{tag}] {name} not modified, using the cached copy")
+                return CachedFile(path, meta["sha256"], meta["size"], changed=False)
+
+            if response.status_code == 206:
+                print(f"[{tag}] Resuming {name} at byte {resume_from}")
+                mode = "ab"
+            else:
+                resume_from = 0
+                mode = "wb"
+                meta["partial"] = {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                self._save_metadata(name, meta)
+
+            received = 0
+            with open(part, mode) as out:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                    out.write(chunk)
+                    received += len(chunk)
+
+        partial = meta.pop("partial", {})
+        os.replace(part, path)
+        size = path.stat().st_size
+        meta.update({
+            "url": url,
+            "etag": partial.get("etag"),
+            "last_modified": partial.get("last_modified"),
+            "size": size,
+            "sha256": _sha256(path),
+        })
+        self._save_metadata(name, meta)
+        print(f"[{tag}] Downloaded {received} bytes of {name} ({size} bytes cached)")
+        return CachedFile(path, meta["sha256"], size, changed=True)
+
+    def cached(self, name: str) -> CachedFile | None:
+        """The complete cached copy, without contacting the server"""
+        path = self._paths(name)[0]
+        meta = self.metadata(name)
+        if not path.exists() or not meta.get("sha256"):
+            return None
+        return CachedFile(path, meta["sha256"], meta["size"], changed=False)
+
+    def last_import(self, name: str) -> dict:
+        return self.metadata(name).get("imported") or {}
+
+    def mark_imported(self, name: str, sha256: str, **details):
+        """Remember that the file with this checksum was imported successfully"""
+        meta = self.metadata(name)
+        meta["imported"] = {"sha256": sha256, **details}
+        self._save_metadata(name, meta)
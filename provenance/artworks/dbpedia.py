@@ -1,30 +1,30 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
 from django.utils import timezone
-from datetime import timedelta
+from django.db import transaction
 from .models import DBpediaArtist
+from . import http_client
+from .memo import TTLCache
+from .cache_refresh import jittered_ttl, submit_refresh
 import urllib.parse
-import urllib.error as urlerror
-import socket
+import requests
 import time
 
 DBPEDIA_ENDPOINT = "https://dbpedia.org/sparql"
 CACHE_TTL_DAYS = 120        # după 4 luni revalidăm artistul
 RETRY_COUNT = 3             # cate retry max facem
 TIMEOUT = 30                # sec
-USER_AGENT = "provenance-app/1.0 (contact: example@example.com)"
 
-def _make_client():
-    client = SPARQLWrapper(DBPEDIA_ENDPOINT)
-    client.setTimeout(TIMEOUT)
-    client.setReturnFormat(JSON)
-    client.addCustomHttpHeader("User-Agent", USER_AGENT)
-    return client
+AUTHOR_FIELDS = ["abstract", "birthDate", "birthPlace", "nationality", "movement", "image_url"]
+
+# In-process memo in front of DBpediaArtist, evicted on save (signals.py)
+AUTHOR_MEMO = TTLCache(maxsize=20000, ttl=3600, name="dbpedia")
+
+def _query(query: str):
+    return http_client.query(DBPEDIA_ENDPOINT, query, timeout=TIMEOUT)
 
 def _resolve_resource_uri(full_name: str) -> str:
 
     safe_name = full_name.replace('"', '\"')
-    client = _make_client()
-    client.setQuery(f"""
+    query = f"""
     PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
     SELECT ?res WHERE {{
       ?res rdfs:label ?label .
@@ -32,9 +32,9 @@ def _resolve_resource_uri(full_name: str) -> str:
       FILTER (lcase(str(?label)) = lcase("{safe_name}"))
     }}
     LIMIT 1
-    """)
+    """
     try:
-        results = client.query().convert()
+        results = _query(query)
         bindings = results.get("results", {}).get("bindings", [])
         if bindings:
             return bindings[0]["res"]["value"]
@@ -45,21 +45,76 @@ def _resolve_resource_uri(full_name: str) -> str:
     return f"http://dbpedia.org/resource/{resource_name}"
 
 def get_author_details(full_name: str):
+    found, details = AUTHOR_MEMO.get(full_name)
+    if found:
+        return dict(details)
+    
+    details = _get_author_details(full_name)
+    if details is None:
+        # DBpedia unreachable: not memoized, the next call tries again
+        return _empty()
+    AUTHOR_MEMO.set(full_name, dict(details))
+    return details
+
 
+def is_author_fresh(artist) -> bool:
+    return artist.fetched_at > timezone.now() - jittered_ttl(artist.name, CACHE_TTL_DAYS)
+
+
+def _get_author_details(full_name: str):
+    """Details from the database or a fresh fetch; None if neither has them"""
     try:
         artist = DBpediaArtist.objects.get(name=full_name)
-        if artist.fetched_at > timezone.now() - timedelta(days=CACHE_TTL_DAYS):
-            return _to_dict(artist)
-        # dacă e expirat -> revalidăm din DBpedia
     except DBpediaArtist.DoesNotExist:
         artist = None
 
-        resource_uri = _resolve_resource_uri(full_name)
+    if artist is not None:
+        if not is_author_fresh(artist):
+            # dacă e expirat -> servim varianta veche și revalidăm în fundal
+            submit_refresh(("dbpedia", full_name), refresh_author, full_name)
+        return _to_dict(artist)
+
+    return refresh_author(full_name)
+
+
+def refresh_author(full_name: str):
+    """Fetch the artist from DBpedia and store it; None if DBpedia could not be reached"""
+    data = _fetch_author_details(full_name)
+    if data is None:
+        print(f"[DBPEDIA FAIL] folosesc fallback cache pt {full_name}")
+        return None
+
+    db_obj, _ = DBpediaArtist.objects.update_or_create(
+        name=full_name,
+        defaults={**data, "fetched_at": timezone.now()}
+    )
+    return _to_dict(db_obj)
+
+
+def store_authors(details, batch_size: int = 500):
+    """Upsert {name: data} fetched from DBpedia into DBpediaArtist in one transaction"""
+    now = timezone.now()
+    rows = [DBpediaArtist(name=name, fetched_at=now, **data) for name, data in details.items()]
+    with transaction.atomic():
+        DBpediaArtist.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=[*AUTHOR_FIELDS, "fetched_at"],
+        )
+    # bulk_create sends no post_save signals
+    for name in details:
+        AUTHOR_MEMO.invalidate(name)
+
+
+def _fetch_author_details(full_name: str):
 
-        sparql = _make_client()
-        sparql.setQuery(f"""
-        PREFIX dbo: <http://dbpedia.org/ontology/>
-        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    resource_uri = _resolve_resource_uri(full_name)
+
+    query = f"""
+    PREFIX dbo: <http://dbpedia.org/ontology/>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
     SELECT ?abstract ?birthDate ?birthPlaceLabel ?nationalityLabel ?movementLabel ?thumbnail WHERE {{
       OPTIONAL {{ <{resource_uri}> dbo:abstract ?abstract . FILTER(lang(?abstract)='en') }}
       OPTIONAL {{ <{resource_uri}> dbo:birthDate ?birthDate }}
@@ -72,32 +127,19 @@ def get_author_details(full_name: str):
       OPTIONAL {{ <{resource_uri}> dbo:thumbnail ?thumbnail }}
     }}
     LIMIT 1
-    """)
+    """
 
-    data = None
     for attempt in range(RETRY_COUNT):
         try:
-            results = sparql.query().convert()
-            data = _extract_data(results)
-            break
-        except (socket.timeout, urlerror.HTTPError, urlerror.URLError) as e:
+            results = _query(query)
+            return _extract_data(results)
+        except requests.RequestException as e:
             print(f"[DBPEDIA RETRY {attempt+1}] {full_name} → {e}")
             time.sleep(0.5 * (attempt + 1))
         except Exception as e:
             print(f"[DBPEDIA ERROR] {full_name} → {e}")
             break
-
-    if data is None:
-        print(f"[DBPEDIA FAIL] folosesc fallback cache pt {full_name}")
-        if artist:
-            return _to_dict(artist)
-        return _empty()
-
-    db_obj, _ = DBpediaArtist.objects.update_or_create(
-        name=full_name,
-        defaults=data
-    )
-    return _to_dict(db_obj)
+    return None
 
 
 def _extract_data(results):
@@ -0,0 +1,161 @@
+"""
+Concurrent enrichment of artist and movement names against DBpedia, Getty and
+Wikidata. Upstream calls run on an asyncio loop, each host behind its own
+concurrency limit and minimum spacing between requests; the results are then
+written to the cache models in bulk.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+import asyncio
+import time
+
+# Per-host politeness: parallel requests and minimum seconds between request
+# starts. Override per host with settings.ENRICHMENT_HOST_LIMITS.
+HOST_LIMITS = {
+    "dbpedia.org": {"concurrency": 8, "min_interval": 0.05},
+    "vocab.getty.edu": {"concurrency": 2, "min_interval": 0.5},     # VALUES batches are heavy
+    "query.wikidata.org": {"concurrency": 5, "min_interval": 0.1},  # WDQS allows 5 parallel queries
+}
+
+
+def host_limits():
+    limits = {host: dict(conf) for host, conf in HOST_LIMITS.items()}
+    for host, conf in getattr(settings, "ENRICHMENT_HOST_LIMITS", {}).items():
+        limits.setdefault(host, {}).update(conf)
+    return limits
+
+
+class HostLimiter:
+    """Bounded concurrency plus a minimum interval between request starts for one host"""
+
+    def __init__(self, host: str, concurrency: int = 1, min_interval: float = 0.0):
+        self.host = host
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self.calls = 0
+        self.busy_seconds = 0.0
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pacing = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def run(self, fn, *args):
+        """Run the blocking call fn(*args) in a worker thread once the host allows it"""
+        async with self._semaphore:
+            async with self._pacing:
+                loop = asyncio.get_running_loop()
+                delay = self._next_start - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                self._next_start = loop.time() + self.min_interval
+            started = time.monotonic()
+            try:
+                return await asyncio.to_thread(fn, *args)
+            finally:
+                self.calls += 1
+                self.busy_seconds += time.monotonic() - started
+
+
+async def _run_jobs(jobs, limits):
+    """jobs: [(host, key, fn, args)] -> {key: result}; a failed call yields None"""
+    limiters = {host: HostLimiter(host, **conf) for host, conf in limits.items()}
+    workers = sum(limiters[host].concurrency for host in {job[0] for job in jobs})
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="enrichment")
+    )
+
+    async def run(host, key, fn, args):
+        try:
+            return key, await limiters[host].run(fn, *args)
+        except Exception as e:
+            print(f"[ENRICH ERROR] {host} {key} → {e}")
+            return key, None
+
+    results = dict(await asyncio.gather(*(run(*job) for job in jobs)))
+    for limiter in limiters.values():
+        if limiter.calls:
+            print(f"[ENRICH] {limiter.host}: {limiter.calls} calls, {limiter.busy_seconds:.1f}s of request time")
+    return results
+
+
+def _pending_authors(names, force: bool):
+    from .dbpedia import is_author_fresh
+    from .models import DBpediaArtist
+
+    names = sorted({n for n in names if n and n.strip()})
+    if force:
+        return names
+    fresh = set()
+    for start in range(0, len(names), 500):
+        for artist in DBpediaArtist.objects.filter(name__in=names[start:start + 500]):
+            if is_author_fresh(artist):
+                fresh.add(artist.name)
+    return [n for n in names if n not in fresh]
+
+
+def enrich(ulan_names=(), aat_terms=(), dbpedia_names=(), wikidata_names=(), force: bool = False):
+    """
+    Resolve all pending names concurrently and store them in GettyULAN, GettyAAT,
+    DBpediaArtist and WikidataArtist. Names with a fresh cache entry are
+    skipped unless force=True.
+
+    Returns {"ulan": {name: id or None}, "aat": {term: id or None},
+             "dbpedia": {name: details}, "wikidata": {name: details}}
+    for the names that were looked up.
+    """
+    from . import dbpedia, getty_enrichment, wikidata_artists
+
+    ulan_todo = getty_enrichment._names_to_resolve(ulan_names, "ulan", force)
+    aat_todo = getty_enrichment._names_to_resolve(aat_terms, "aat", force)
+    dbpedia_todo = _pending_authors(dbpedia_names, force)
+    wikidata_todo = wikidata_artists.names_to_fetch(wikidata_names, force)
+
+    jobs = []
+    batch = getty_enrichment.RESOLVE_BATCH_SIZE
+    for vocabulary, todo, concept_class, reverse in (
+        ("ulan", ulan_todo, "gvp:PersonConcept", True),
+        ("aat", aat_todo, "gvp:Concept", False),
+    ):
+        for start in range(0, len(todo), batch):
+            jobs.append((
+                "vocab.getty.edu", (vocabulary, start), getty_enrichment._resolve_many,
+                (todo[start:start + batch], vocabulary, concept_class, reverse),
+            ))
+    jobs += [("dbpedia.org", ("dbpedia", n), dbpedia._fetch_author_details, (n,)) for n in dbpedia_todo]
+    batch = wikidata_artists.ARTIST_BATCH_SIZE
+    jobs += [
+        ("query.wikidata.org", ("wikidata", start), wikidata_artists.fetch_batch, (wikidata_todo[start:start + batch],))
+        for start in range(0, len(wikidata_todo), batch)
+    ]
+
+    enriched = {"ulan": {}, "aat": {}, "dbpedia": {}, "wikidata": {}}
+    if not jobs:
+        return enriched
+
+    started = time.time()
+    results = asyncio.run(_run_jobs(jobs, host_limits()))
+
+    matches = {"ulan": {}, "aat": {}, "wikidata": {}}
+    authors = {}
+    for (source, key), result in results.items():
+        if result is None:
+            continue
+        if source == "dbpedia":
+            authors[key] = result
+        else:
+            matches[source].update(result)
+
+    # Batched writes, one transaction per cache model
+    enriched["ulan"] = getty_enrichment.store_ulan_matches(matches["ulan"]) if matches["ulan"] else {}
+    enriched["aat"] = getty_enrichment.store_aat_matches(matches["aat"]) if matches["aat"] else {}
+    if authors:
+        dbpedia.store_authors(authors)
+    enriched["dbpedia"] = authors
+    if matches["wikidata"]:
+        wikidata_artists.store_artists(matches["wikidata"])
+    enriched["wikidata"] = matches["wikidata"]
+
+    print(
+        f"[ENRICH] {len(jobs)} upstream calls in {time.time() - started:.1f}s "
+        f"(ulan {len(ulan_todo)}, aat {len(aat_todo)}, dbpedia {len(dbpedia_todo)}, wikidata {len(wikidata_todo)})"
+    )
+    return enriched
@@ -0,0 +1,202 @@
+"""
+Blue/green generations of the source graphs, so imports never show readers a
+half-loaded source and never compete with them on the graphs they read.
+
+An import loads into a fresh staging graph (a server-side COPY of the
+source's active graph when it sends only deltas, empty for a full import).
+When it is done, the staging graph's triple count is checked against what
+was copied, deleted and sent, and the switch is one transaction over the
+DatasetGeneration rows. The generation it replaces is kept as "previous"
+for rollback_generation; the one before that is dropped. The statistics
+store then takes in what the import added and removed (the artworks of the
+replaced generation are recounted after a full import); only a rollback
+rebuilds it from scratch.
+
+Readers query with the active graphs as their default graph (read_graphs);
+a source that was never staged is read from its plain named graph.
+generation_id() identifies what readers currently see (response header
+X-Dataset-Generation, cache keys).
+"""
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from . import http_client
+from .fuseki_loader import source_graph
+from .models import DatasetGeneration
+
+# Name Jena gives the stored default graph (the union of the named graphs is what queries see)
+JENA_DEFAULT_GRAPH = "urn:x-arq:DefaultGraph"
+
+
+def graph_size(graph: str) -> int:
+    results = http_client.query(
+        settings.FUSEKI_ENDPOINT, f"SELECT (COUNT(*) AS ?n) WHERE {{ GRAPH <{graph}> {{ ?s ?p ?o }} }}"
+    )
+    bindings = results["results"]["bindings"]
+    return int(bindings[0]["n"]["value"]) if bindings else 0
+
+
+def _drop(graph: str):
+    http_client.update(settings.FUSEKI_UPDATE, f"DROP SILENT GRAPH <{graph}>")
+
+
+def _active():
+    return {row.source: row for row in DatasetGeneration.objects.filter(status="active")}
+
+
+def read_graphs():
+    """Graphs readers query: the active generation of every source (its plain graph without one)"""
+    active = _active()
+    sources = sorted(set(getattr(settings, "FUSEKI_GRAPHS", {})) | set(active))
+    return [active[source].graph if source in active else source_graph(source) for source in sources]
+
+
+def live_graph(source: str) -> str:
+    """Graph readers see for one source"""
+    row = DatasetGeneration.objects.filter(source=source, status="active").first()
+    return row.graph if row else source_graph(source)
+
+
+def generation_id() -> str:
+    """Changes whenever any source switches generation; "0" before the first one"""
+    ids = DatasetGeneration.objects.filter(status="active").order_by("source").values_list("id", flat=True)
+    return "-".join(str(pk) for pk in ids) or "0"
+
+
+def discard_generation(row):
+    """Drop a staging generation that must not go live"""
+    _drop(row.graph)
+    row.status = "discarded"
+    row.save(update_fields=["status"])
+
+
+def stage_generation(source: str, copy: bool = True) -> DatasetGeneration:
+    """
+    New staging generation of `source`; with copy=True it starts as a copy of
+    the active graph, so an import can send only what changed.
+    """
+    for stale in DatasetGeneration.objects.filter(source=source, status="staging"):
+        print(f"[GENERATION] Discarding unfinished generation {stale.pk} of {source}")
+        discard_generation(stale)
+
+    active = DatasetGeneration.objects.filter(source=source, status="active").first()
+    if active is None and graph_size(source_graph(source)):
+        # The graph loaded before generations existed becomes the first one
+        active = DatasetGeneration.objects.create(
+            source=source, graph=source_graph(source), status="active", activated_at=timezone.now()
+        )
+
+    row = DatasetGeneration.objects.create(source=source, graph="", status="staging")
+    row.graph = f"{source_graph(source)}/generation/{row.pk}"
+    if copy and active is not None:
+        http_client.update(settings.FUSEKI_UPDATE, f"COPY SILENT <{active.graph}> TO <{row.graph}>")
+        row.base_triples = graph_size(row.graph)
+    row.save(update_fields=["graph", "base_triples"])
+    print(f"[GENERATION] Staging {source} generation {row.pk} in <{row.graph}> ({row.base_triples} triples copied)")
+    return row
+
+
+def _problems(row, size, stats):
+    problems = []
+    if stats.get("failed"):
+        problems.append(f"{stats['failed']} triples were not loaded")
+    if not size:
+        problems.append("the graph is empty")
+    elif size < row.base_triples - stats.get("deleted_triples", 0):
+        problems.append(f"{size} triples, fewer than the {row.base_triples} copied minus deletions")
+    elif size > row.base_triples + stats.get("triples", 0):
+        problems.append(f"{size} triples, more than copied plus sent")
+    return problems
+
+
+def _update_statistics(row, replaced, added, removed):
+    from .statistics_store import forget_graph, record_graph, refresh_graph_artworks
+
+    if not row.base_triples and replaced is not None:
+        # A full import: nothing says which artworks of the replaced graph are gone
+        refresh_graph_artworks(replaced.graph)
+    if removed:
+        forget_graph(removed)
+    for graph in added:
+        record_graph(graph)
+
+
+def publish_generation(row, stats, on_switch=None, on_discard=None, added=(), removed=()) -> bool:
+    """
+    Validate a staging generation against the loader stats (failed, triples,
+    deleted_triples) and make it the active one, or discard it. on_switch runs
+    in the switch transaction, on_discard after a discard. Once it is live the
+    statistics take in `added` (graphs loaded into it) and `removed`
+    (N-Triples lines deleted from its copy).
+    """
+    size = graph_size(row.graph)
+    problems = _problems(row, size, stats)
+    if problems:
+        print(f"[GENERATION ERROR] {row.source} generation {row.pk} discarded: {'; '.join(problems)}")
+        discard_generation(row)
+        if on_discard:
+            on_discard()
+        return False
+
+    with transaction.atomic():
+        replaced = list(DatasetGeneration.objects.select_for_update().filter(source=row.source, status="previous"))
+        DatasetGeneration.objects.filter(pk__in=[old.pk for old in replaced]).update(status="retired")
+        current = DatasetGeneration.objects.select_for_update().filter(source=row.source, status="active").first()
+        DatasetGeneration.objects.filter(source=row.source, status="active").update(status="previous")
+        row.status = "active"
+        row.triples = size
+        row.activated_at = timezone.now()
+        row.save(update_fields=["status", "triples", "activated_at"])
+        if on_switch:
+            on_switch()
+    print(f"[GENERATION] {row.source} generation {row.pk} is live ({size} triples)")
+
+    for old in replaced:
+        _drop(old.graph)
+    # The counters follow what readers see
+    _update_statistics(row, current, added, removed)
+    return True
+
+
+def adopt_default_graph(source: str) -> int:
+    """
+    Move the triples older versions loaded into Fuseki's default graph into the
+    live graph of `source`, once after upgrading: with the union default graph
+    queries no longer see them. Returns the number of triples moved.
+    """
+    from .statistics_store import rebuild_from_fuseki
+
+    graph = live_graph(source)
+    moved = graph_size(JENA_DEFAULT_GRAPH)
+    if moved:
+        http_client.update(settings.FUSEKI_UPDATE, f"""
+            INSERT {{ GRAPH <{graph}> {{ ?s ?p ?o }} }} WHERE {{ GRAPH <{JENA_DEFAULT_GRAPH}> {{ ?s ?p ?o }} }} ;
+            CLEAR SILENT GRAPH <{JENA_DEFAULT_GRAPH}>
+        """)
+        rebuild_from_fuseki()
+    print(f"[GENERATION] Moved {moved} triples of the default graph into <{graph}>")
+    return moved
+
+
+def rollback_generation(source: str) -> DatasetGeneration:
+    """Make the previous generation of `source` active again (the current one becomes previous)"""
+    from .import_ledger import reset_ledger
+    from .statistics_store import rebuild_from_fuseki
+
+    with transaction.atomic():
+        rows = {row.status: row for row in DatasetGeneration.objects.select_for_update().filter(
+            source=source, status__in=("active", "previous"))}
+        previous = rows.get("previous")
+        if previous is None:
+            raise ValueError(f"{source} has no previous generation")
+        if "active" in rows:
+            rows["active"].status = "previous"
+            rows["active"].save(update_fields=["status"])
+        previous.status = "active"
+        previous.activated_at = timezone.now()
+        previous.save(update_fields=["status", "activated_at"])
+        # The ledger describes the generation that was rolled back: the next import is a full one
+        reset_ledger(source)
+    print(f"[GENERATION] {source} rolled back to generation {previous.pk}")
+    rebuild_from_fuseki()
+    return previous
@@ -1,10 +1,14 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
 from django.utils import timezone
-from datetime import timedelta
+from django.db import close_old_connections, transaction
 from .models import GettyULAN, GettyAAT
+from . import getty_index, http_client
+from .memo import TTLCache
+from .cache_refresh import jittered_ttl
 import urllib.error as urlerror
 import urllib.parse
 import socket
+import threading
+import queue
 import time
 import requests
 import json
@@ -15,30 +19,17 @@ CACHE_TTL_DAYS = 180
 RETRY_COUNT = 3
 TIMEOUT = 30
 USER_AGENT = "provenance-app/1.0 (contact: example@example.com)"
+BULK_LOOKUP_CHUNK = 500
+RESOLVE_BATCH_SIZE = 200     # names per VALUES query
+
+# In-process memo in front of the GettyULAN/GettyAAT lookups, keyed by
+# (vocabulary, name). Rows saved through the ORM evict their entry (signals.py).
+ENRICHMENT_MEMO = TTLCache(maxsize=20000, ttl=3600, name="getty")
 
 def _query_getty_sparql(query: str):
     """Query Getty SPARQL endpoint using POST request"""
-    headers = {
-        'User-Agent': USER_AGENT,
-        'Accept': 'application/sparql-results+json',
-        'Content-Type': 'application/sparql-query; charset=utf-8'
-    }
-    
     try:
-        response = requests.post(
-            GETTY_SPARQL_ENDPOINT,
-            data=query.encode('utf-8'),
-            headers=headers,
-            timeout=TIMEOUT
-        )
-        response.raise_for_status()
-        
-        # Check if response has content
-        if not response.text or len(response.text.strip()) == 0:
-            print(f"[GETTY SPARQL ERROR] Empty response from Getty endpoint")
-            return None
-            
-        return response.json()
+        return http_client.query(GETTY_SPARQL_ENDPOINT, query, timeout=TIMEOUT, method="POST")
     except requests.exceptions.Timeout:
         print(f"[GETTY SPARQL TIMEOUT] Query timed out after {TIMEOUT}s")
         return None
@@ -62,18 +53,39 @@ def search_ulan_sparql(artist_name: str):
     # Check cache first
     try:
         cached = GettyULAN.objects.get(name=artist_name)
-        if cached.fetched_at > timezone.now() - timedelta(days=CACHE_TTL_DAYS):
-            if cached.ulan_id:
-                return {
-                    "ulan_id": cached.ulan_id,
-                    "ulan_url": cached.ulan_url,
-                    "preferred_label": cached.preferred_label
-                }
-            else:
-                return None  # Previously searched but not found
+        if not is_cache_fresh(cached):
+            # Stale-while-revalidate: serve the old row, refresh it in the background
+            queue_getty_lookups([artist_name], "ulan")
+        if cached.ulan_id:
+            return {
+                "ulan_id": cached.ulan_id,
+                "ulan_url": cached.ulan_url,
+                "preferred_label": cached.preferred_label
+            }
+        else:
+            return None  # Previously searched but not found
     except GettyULAN.DoesNotExist:
         pass
     
+    local = getty_index.lookup("ulan", _name_variants(artist_name, reverse_person_names=True))
+    if local:
+        ulan_id, label = local
+        ulan_url = f"http://vocab.getty.edu/page/ulan/{ulan_id}"
+        GettyULAN.objects.update_or_create(
+            name=artist_name,
+            defaults={
+                "ulan_id": ulan_id,
+                "ulan_url": ulan_url,
+                "preferred_label": label,
+                "fetched_at": timezone.now()
+            }
+        )
+        return {
+            "ulan_id": ulan_id,
+            "ulan_url": ulan_url,
+            "preferred_label": label
+        }
+    
     search_names = [artist_name]
     
     if ',' not in artist_name:
@@ -161,18 +173,38 @@ def search_aat_sparql(movement_term: str):
     
     try:
         cached = GettyAAT.objects.get(term=movement_term)
-        if cached.fetched_at > timezone.now() - timedelta(days=CACHE_TTL_DAYS):
-            if cached.aat_id:
-                return {
-                    "aat_id": cached.aat_id,
-                    "aat_url": cached.aat_url,
-                    "preferred_label": cached.preferred_label
-                }
-            else:
-                return None  
+        if not is_cache_fresh(cached):
+            queue_getty_lookups([movement_term], "aat")
+        if cached.aat_id:
+            return {
+                "aat_id": cached.aat_id,
+                "aat_url": cached.aat_url,
+                "preferred_label": cached.preferred_label
+            }
+        else:
+            return None  
     except GettyAAT.DoesNotExist:
         pass
     
+    local = getty_index.lookup("aat", _name_variants(movement_term, reverse_person_names=False))
+    if local:
+        aat_id, label = local
+        aat_url = f"http://vocab.getty.edu/page/aat/{aat_id}"
+        GettyAAT.objects.update_or_create(
+            term=movement_term,
+            defaults={
+                "aat_id": aat_id,
+                "aat_url": aat_url,
+                "preferred_label": label,
+                "fetched_at": timezone.now()
+            }
+        )
+        return {
+            "aat_id": aat_id,
+            "aat_url": aat_url,
+            "preferred_label": label
+        }
+    
     print(f"[GETTY AAT] Querying Getty with: {movement_term}")
     safe_term = movement_term.replace('\\', '\\\\').replace('"', '\\"')
     
@@ -242,11 +274,303 @@ LIMIT 5"""
     )
     return None
 
+def _sparql_literal(value: str, lang: str | None = None):
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+    return f'"{escaped}"@{lang}' if lang else f'"{escaped}"'
+
+def _name_variants(name: str, reverse_person_names: bool):
+    """Exact label forms tried for a name, most specific first"""
+    variants = [name.strip()]
+    if reverse_person_names and ',' not in name:
+        parts = name.strip().split()
+        if len(parts) >= 2:
+            # For "Pablo Picasso" -> "Picasso, Pablo"
+            variants.append(f"{parts[-1]}, {' '.join(parts[:-1])}")
+    return variants
+
+def _query_getty_with_retry(query: str):
+    for attempt in range(RETRY_COUNT):
+        results = _query_getty_sparql(query)
+        if results is not None:
+            return results
+        if attempt + 1 < RETRY_COUNT:
+            time.sleep(0.5 * (attempt + 1))
+    return None
+
+def _resolve_many(names, vocabulary: str, concept_class: str, reverse_person_names: bool):
+    """
+    Resolve many names, first against the local Getty index, then against Getty
+    labels with exact matches on a VALUES list.
+    Returns {name: (subject_id, preferred_label) or None} for every name whose
+    batch was answered; names of failed batches are left out.
+    """
+    resolved = {}
+    if getty_index.is_available():
+        remaining = []
+        for name in names:
+            match = getty_index.lookup(vocabulary, _name_variants(name, reverse_person_names))
+            if match:
+                resolved[name] = match
+            else:
+                remaining.append(name)
+        print(f"[GETTY INDEX] {vocabulary}: {len(resolved)}/{len(names)} names resolved locally")
+        names = remaining
+    
+    for start in range(0, len(names), RESOLVE_BATCH_SIZE):
+        batch = names[start:start + RESOLVE_BATCH_SIZE]
+        
+        # label form -> [(variant priority, original name)]
+        wanted = {}
+        for name in batch:
+            for priority, variant in enumerate(_name_variants(name, reverse_person_names)):
+                wanted.setdefault(variant, []).append((priority, name))
+        
+        values = " ".join(
+            f"{_sparql_literal(label)} {_sparql_literal(label, 'en')}" for label in wanted
+        )
+        query = f"""PREFIX gvp: <http://vocab.getty.edu/ontology#>
+PREFIX xl: <http://www.w3.org/2008/05/skos-xl#>
+SELECT ?literal ?subject ?label WHERE {{
+  VALUES ?literal {{ {values} }}
+  ?term xl:literalForm ?literal .
+  ?subject xl:prefLabel|xl:altLabel ?term .
+  ?subject a {concept_class} ;
+           gvp:prefLabelGVP [xl:literalForm ?label] .
+}}"""
+        
+        results = _query_getty_with_retry(query)
+        if results is None:
+            print(f"[GETTY BULK FAIL] {concept_class} batch of {len(batch)} names")
+            continue
+        
+        best = {}
+        for b in results.get("results", {}).get("bindings", []):
+            subject_id = b["subject"]["value"].split("/")[-1]
+            label = b.get("label", {}).get("value")
+            for priority, name in wanted.get(b["literal"]["value"], []):
+                candidate = (priority, subject_id, label)
+                if name not in best or candidate < best[name]:
+                    best[name] = candidate
+        
+        for name in batch:
+            resolved[name] = best[name][1:] if name in best else None
+        print(f"[GETTY BULK] {concept_class}: {len(best)}/{len(batch)} names matched")
+    return resolved
+
+def _names_to_resolve(names, vocabulary: str, force: bool):
+    names = sorted({n for n in names if n and n.strip()})
+    if force:
+        return names
+    cached = get_cached_enrichment_many(names, vocabulary)
+    return [n for n in names if n not in cached or not is_cache_fresh(cached[n])]
+
+def resolve_ulan_many(names, force: bool = False):
+    """
+    Resolve many artist names against Getty ULAN in batches and store the
+    results (misses included) in GettyULAN in one transaction.
+    Names with a fresh cache entry are skipped unless force=True.
+    Returns {name: ulan_id or None} for the names that were queried.
+    """
+    todo = _names_to_resolve(names, "ulan", force)
+    if not todo:
+        return {}
+    resolved = _resolve_many(todo, "ulan", "gvp:PersonConcept", reverse_person_names=True)
+    return store_ulan_matches(resolved)
+
+def _keep_found(resolved, vocabulary: str, now):
+    """
+    Split off the misses of names whose cache row has an id: exact label
+    matching misses names the former regex search found, so those rows only
+    get a new fetched_at. Returns (matches to upsert, {name: kept id}).
+    """
+    misses = [name for name, match in resolved.items() if match is None]
+    if vocabulary == "ulan":
+        model, field, id_field = GettyULAN, "name", "ulan_id"
+    else:
+        model, field, id_field = GettyAAT, "term", "aat_id"
+    kept = {
+        name: getattr(row, id_field)
+        for name, row in get_cached_enrichment_many(misses, vocabulary).items()
+        if getattr(row, id_field)
+    }
+    if kept:
+        model.objects.filter(**{f"{field}__in": list(kept)}).update(fetched_at=now)
+        print(f"[GETTY] {vocabulary}: kept {len(kept)} cached matches the refresh did not find")
+    return {name: match for name, match in resolved.items() if name not in kept}, kept
+
+def store_ulan_matches(resolved):
+    """
+    Upsert {name: (ulan_id, preferred_label) or None} into GettyULAN in one
+    transaction; a miss does not replace a cached match (see _keep_found)
+    """
+    now = timezone.now()
+    resolved, kept = _keep_found(resolved, "ulan", now)
+    rows = [
+        GettyULAN(
+            name=name,
+            ulan_id=match[0] if match else None,
+            ulan_url=f"http://vocab.getty.edu/page/ulan/{match[0]}" if match else None,
+            preferred_label=match[1] if match else None,
+            fetched_at=now,
+        )
+        for name, match in resolved.items()
+    ]
+    with transaction.atomic():
+        GettyULAN.objects.bulk_create(
+            rows,
+            batch_size=BULK_LOOKUP_CHUNK,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=["ulan_id", "ulan_url", "preferred_label", "fetched_at"],
+        )
+    # bulk_create sends no post_save signals
+    invalidate_enrichment([*resolved, *kept], "ulan")
+    return {**kept, **{name: match[0] if match else None for name, match in resolved.items()}}
+
+def resolve_aat_many(terms, force: bool = False):
+    """
+    Resolve many movement/style terms against Getty AAT in batches and store
+    the results (misses included) in GettyAAT in one transaction.
+    Terms with a fresh cache entry are skipped unless force=True.
+    Returns {term: aat_id or None} for the terms that were queried.
+    """
+    todo = _names_to_resolve(terms, "aat", force)
+    if not todo:
+        return {}
+    resolved = _resolve_many(todo, "aat", "gvp:Concept", reverse_person_names=False)
+    return store_aat_matches(resolved)
+
+def store_aat_matches(resolved):
+    """
+    Upsert {term: (aat_id, preferred_label) or None} into GettyAAT in one
+    transaction; a miss does not replace a cached match (see _keep_found)
+    """
+    now = timezone.now()
+    resolved, kept = _keep_found(resolved, "aat", now)
+    rows = [
+        GettyAAT(
+            term=term,
+            aat_id=match[0] if match else None,
+            aat_url=f"http://vocab.getty.edu/page/aat/{match[0]}" if match else None,
+            preferred_label=match[1] if match else None,
+            fetched_at=now,
+        )
+        for term, match in resolved.items()
+    ]
+    with transaction.atomic():
+        GettyAAT.objects.bulk_create(
+            rows,
+            batch_size=BULK_LOOKUP_CHUNK,
+            update_conflicts=True,
+            unique_fields=["term"],
+            update_fields=["aat_id", "aat_url", "preferred_label", "fetched_at"],
+        )
+    # bulk_create sends no post_save signals
+    invalidate_enrichment([*resolved, *kept], "aat")
+    return {**kept, **{term: match[0] if match else None for term, match in resolved.items()}}
+
 def get_getty_enrichment(name_or_term: str, vocabulary: str):
+    key = (vocabulary.lower(), name_or_term)
+    found, result = ENRICHMENT_MEMO.get(key)
+    if found:
+        return dict(result) if result else None
+    
     if vocabulary.lower() == "ulan":
-        return search_ulan_sparql(name_or_term)
+        result = search_ulan_sparql(name_or_term)
     elif vocabulary.lower() == "aat":
-        return search_aat_sparql(name_or_term)
+        result = search_aat_sparql(name_or_term)
     else:
         print(f"[GETTY ERROR] Unknown vocabulary: {vocabulary}")
         return None
+    
+    ENRICHMENT_MEMO.set(key, dict(result) if result else None)
+    return result
+
+def invalidate_enrichment(names, vocabulary: str):
+    for name in names:
+        ENRICHMENT_MEMO.invalidate((vocabulary.lower(), name))
+
+
+def get_cached_enrichment_many(names, vocabulary: str):
+    """
+    Read the Getty cache for many names at once, without any network call.
+    Returns {name: cache row} for the names that were already looked up
+    (found or not). Expired rows are returned too.
+    """
+    if vocabulary.lower() == "ulan":
+        model, field = GettyULAN, "name"
+    elif vocabulary.lower() == "aat":
+        model, field = GettyAAT, "term"
+    else:
+        print(f"[GETTY ERROR] Unknown vocabulary: {vocabulary}")
+        return {}
+    
+    names = [n for n in set(names) if n and n.strip()]
+    cached = {}
+    for start in range(0, len(names), BULK_LOOKUP_CHUNK):
+        chunk = names[start:start + BULK_LOOKUP_CHUNK]
+        for row in model.objects.filter(**{f"{field}__in": chunk}):
+            cached[getattr(row, field)] = row
+    return cached
+
+
+def cache_key(row):
+    return row.name if isinstance(row, GettyULAN) else row.term
+
+
+def is_cache_fresh(row):
+    return row.fetched_at > timezone.now() - jittered_ttl(cache_key(row), CACHE_TTL_DAYS)
+
+
+_lookup_queue = queue.Queue()
+_queued_lookups = set()
+_queued_lock = threading.Lock()
+_lookup_worker = None
+
+
+def queue_getty_lookups(names, vocabulary: str):
+    """Schedule background Getty lookups; names already queued are skipped"""
+    global _lookup_worker
+    
+    with _queued_lock:
+        added = 0
+        for name in names:
+            key = (vocabulary.lower(), name)
+            if not name or key in _queued_lookups:
+                continue
+            _queued_lookups.add(key)
+            _lookup_queue.put(key)
+            added += 1
+        
+        if added and (_lookup_worker is None or not _lookup_worker.is_alive()):
+            _lookup_worker = threading.Thread(target=_run_lookup_worker, name="getty-lookups", daemon=True)
+            _lookup_worker.start()
+    return added
+
+
+def pending_lookup_count():
+    with _queued_lock:
+        return len(_queued_lookups)
+
+
+def _run_lookup_worker():
+    while True:
+        # Take everything queued so far and resolve it with batched queries
+        keys = [_lookup_queue.get()]
+        while len(keys) < RESOLVE_BATCH_SIZE * 5:
+            try:
+                keys.append(_lookup_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            resolve_aat_many([name for vocabulary, name in keys if vocabulary == "aat"], force=True)
+            resolve_ulan_many([name for vocabulary, name in keys if vocabulary == "ulan"], force=True)
+        except Exception as e:
+            print(f"[GETTY QUEUE ERROR] {len(keys)} lookups → {e}")
+        finally:
+            with _queued_lock:
+                _queued_lookups.difference_update(keys)
+            close_old_connections()
+            for _ in keys:
+                _lookup_queue.task_done()
@@ -0,0 +1,195 @@
+"""
+Local Getty ULAN/AAT label index, built from the N-Triples dumps published by
+Getty (see manage.py build_getty_index). Lookups are plain indexed SQLite
+reads, so enrichment works without reaching vocab.getty.edu.
+"""
+from django.conf import settings
+import gzip
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+BATCH_ROWS = 10000
+
+SKOS = "http://www.w3.org/2004/02/skos/core#"
+RDFS_LABEL = "http://www.w3.org/2000/01/rdf-schema#label"
+# predicate -> preferred (1) / alternate (0) label
+LABEL_PREDICATES = {
+    f"{SKOS}prefLabel": 1,
+    f"{SKOS}altLabel": 0,
+    RDFS_LABEL: 0,
+}
+
+SUBJECT_RE = re.compile(r"^http://vocab\.getty\.edu/(ulan|aat)/(\d+)$")
+TRIPLE_RE = re.compile(r'^<([^>]*)>\s+<([^>]*)>\s+"((?:[^"\\]|\\.)*)"(?:@([A-Za-z0-9-]+)|\^\^<[^>]*>)?\s*\.\s*$')
+ESCAPE_RE = re.compile(r'\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))')
+ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"', "'": "'", "\\": "\\"}
+
+_local = threading.local()
+
+
+def index_path():
+    return str(getattr(settings, "GETTY_INDEX_PATH", ""))
+
+
+def normalize_label(label: str) -> str:
+    """Case-, accent- and punctuation-insensitive form used as the lookup key"""
+    decomposed = unicodedata.normalize("NFKD", label)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    words = re.findall(r"\w+", stripped.casefold())
+    return " ".join(words)
+
+
+def _unescape(value: str) -> str:
+    def replace(m):
+        if m.group(1) or m.group(2):
+            return chr(int(m.group(1) or m.group(2), 16))
+        return ESCAPES.get(m.group(3), m.group(3))
+    return ESCAPE_RE.sub(replace, value) if "\\" in value else value
+
+
+def _open_dump(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def _create_schema(conn):
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS labels (
+            vocab TEXT NOT NULL,
+            norm TEXT NOT NULL,
+            subject_id TEXT NOT NULL,
+            label TEXT NOT NULL,
+            preferred INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS preferred_labels (
+            vocab TEXT NOT NULL,
+            subject_id TEXT NOT NULL,
+            label TEXT NOT NULL,
+            PRIMARY KEY (vocab, subject_id)
+        );
+    """)
+
+
+def build_index(dump_paths, path: str | None = None):
+    """
+    Stream Getty N-Triples dumps into the index, replacing the vocabularies found
+    in them. Only label triples of ulan/aat subjects are kept, one line at a time.
+    Returns {vocab: labels indexed}.
+    """
+    path = path or index_path()
+    tmp_path = f"{path}.building"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    if os.path.exists(path):
+        # Keep the vocabularies that are not being rebuilt
+        with sqlite3.connect(path) as source, sqlite3.connect(tmp_path) as target:
+            source.backup(target)
+
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    _create_schema(conn)
+    conn.execute("DROP INDEX IF EXISTS labels_lookup")
+
+    counts = {}
+    started = time.time()
+    for vocab, dump_path in dump_paths:
+        conn.execute("DELETE FROM labels WHERE vocab = ?", (vocab,))
+        conn.execute("DELETE FROM preferred_labels WHERE vocab = ?", (vocab,))
+        rows = []
+        preferred = {}
+        count = 0
+        with _open_dump(dump_path) as dump:
+            for line in dump:
+                m = TRIPLE_RE.match(line)
+                if not m or m.group(2) not in LABEL_PREDICATES:
+                    continue
+                subject = SUBJECT_RE.match(m.group(1))
+                if not subject or subject.group(1) != vocab:
+                    continue
+                lang = (m.group(4) or "").lower()
+                label = _unescape(m.group(3)).strip()
+                norm = normalize_label(label)
+                if not norm:
+                    continue
+                subject_id = subject.group(2)
+                is_preferred = LABEL_PREDICATES[m.group(2)]
+                rows.append((vocab, norm, subject_id, label, is_preferred))
+                # English (or untagged) preferred label wins for display
+                if is_preferred:
+                    english = lang in ("", "en", "en-us")
+                    current = preferred.get(subject_id)
+                    if current is None or (english and not current[1]):
+                        preferred[subject_id] = (label, english)
+                if len(rows) >= BATCH_ROWS:
+                    conn.executemany("INSERT INTO labels VALUES (?, ?, ?, ?, ?)", rows)
+                    count += len(rows)
+                    rows = []
+        conn.executemany("INSERT INTO labels VALUES (?, ?, ?, ?, ?)", rows)
+        count += len(rows)
+        conn.executemany(
+            "INSERT OR REPLACE INTO preferred_labels VALUES (?, ?, ?)",
+            ((vocab, subject_id, label) for subject_id, (label, _) in preferred.items()),
+        )
+        conn.commit()
+        counts[vocab] = count
+        print(f"[GETTY INDEX] {vocab}: {count} labels for {len(preferred)} subjects")
+
+    conn.execute("CREATE INDEX labels_lookup ON labels (vocab, norm, preferred DESC, subject_id)")
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, path)
+    _local.__dict__.clear()
+    print(f"[GETTY INDEX] Built {path} in {time.time() - started:.1f}s")
+    return counts
+
+
+def _connection():
+    path = index_path()
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == path:
+        return conn
+    if not path or not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+    _local.conn = conn
+    _local.path = path
+    return conn
+
+
+def is_available():
+    return _connection() is not None
+
+
+def lookup(vocab: str, labels):
+    """
+    Look up the first of `labels` (name variants, most specific first) found in
+    the index. Preferred labels win over alternate ones, then the lowest id.
+    Returns (subject_id, preferred_label) or None.
+    """
+    conn = _connection()
+    if conn is None:
+        return None
+    for label in labels:
+        norm = normalize_label(label)
+        if not norm:
+            continue
+        row = conn.execute(
+            """
+            SELECT l.subject_id, COALESCE(p.label, l.label)
+            FROM labels l
+            LEFT JOIN preferred_labels p ON p.vocab = l.vocab AND p.subject_id = l.subject_id
+            WHERE l.vocab = ? AND l.norm = ?
+            ORDER BY l.preferred DESC, CAST(l.subject_id AS INTEGER)
+            LIMIT 1
+            """,
+            (vocab, norm),
+        ).fetchone()
+        if row:
+            return row[0], row[1]
+    return None
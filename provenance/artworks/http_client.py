@@ -0,0 +1,108 @@
+"""
+Shared HTTP client for Fuseki and the upstream endpoints (Wikidata, DBpedia,
+Getty, data.gov.ro). Each origin gets one requests.Session with its own pool
+of kept-alive connections, so repeated calls skip the TCP/TLS handshake.
+
+Pool size and timeouts come from settings (HTTP_POOL_SIZE,
+HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT). HTTP errors raise
+requests.HTTPError, network errors other requests.RequestException subclasses.
+"""
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+import requests
+import threading
+
+USER_AGENT = "provenance-app/1.0 (contact: example@example.com)"
+DEFAULT_POOL_SIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 60
+MAX_GET_QUERY_LENGTH = 1500     # longer queries go in a POST body
+
+SPARQL_JSON = "application/sparql-results+json"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def session_for(url: str) -> requests.Session:
+    """Pooled session of the URL's origin, created on first use"""
+    origin = _origin(url)
+    with _sessions_lock:
+        session = _sessions.get(origin)
+        if session is None:
+            pool_size = getattr(settings, "HTTP_POOL_SIZE", DEFAULT_POOL_SIZE)
+            session = requests.Session()
+            session.mount(f"{origin}/", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            session.headers["User-Agent"] = USER_AGENT
+            _sessions[origin] = session
+    return session
+
+
+def close_all():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+def _timeout(timeout):
+    connect = getattr(settings, "HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)
+    if timeout is None:
+        return connect, getattr(settings, "HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)
+    if isinstance(timeout, tuple):
+        return timeout
+    return connect, timeout
+
+
+def query(endpoint: str, sparql: str, timeout=None, method: str | None = None, accept: str = SPARQL_JSON,
+          default_graphs=None):
+    """
+    Run a SPARQL query and return the decoded JSON results. `default_graphs`
+    (graph IRIs) are sent as default-graph-uri, so the query sees their merge
+    as its default graph.
+    """
+    session = session_for(endpoint)
+    headers = {"Accept": accept}
+    fields = {"query": sparql}
+    if default_graphs:
+        fields["default-graph-uri"] = list(default_graphs)
+    if method == "POST" or (method is None and len(sparql) > MAX_GET_QUERY_LENGTH):
+        response = session.post(endpoint, data=fields, headers=headers, timeout=_timeout(timeout))
+    else:
+        response = session.get(endpoint, params=fields, headers=headers, timeout=_timeout(timeout))
+    response.raise_for_status()
+    return response.json()
+
+
+def update(endpoint: str, sparql_update: str, timeout=None):
+    """Run a SPARQL update"""
+    response = session_for(endpoint).post(endpoint, data={"update": sparql_update}, timeout=_timeout(timeout))
+    response.raise_for_status()
+    return response
+
+
+def gsp_post(endpoint: str, data, content_type: str, graph: str | None = None, headers=None, timeout=None):
+    """Add RDF to a Graph Store Protocol endpoint (default graph unless `graph` is given)"""
+    request_headers = {"Content-Type": content_type, **(headers or {})}
+    response = session_for(endpoint).post(
+        endpoint,
+        params={"graph": graph} if graph else None,
+        data=data,
+        headers=request_headers,
+        timeout=_timeout(timeout),
+    )
+    response.raise_for_status()
+    return response
+
+
+def get(url: str, timeout=None, **kwargs):
+    """Plain GET through the pooled session of the URL's origin"""
+    response = session_for(url).get(url, timeout=_timeout(timeout), **kwargs)
+    response.raise_for_status()
+    return response
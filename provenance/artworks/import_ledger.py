@@ -0,0 +1,259 @@
+"""
+Delta sync for re-imports. The ledger (ImportLedger) keeps, per source and
+record (an artwork IRI, or a stable upstream key such as the LIDO
+lidoRecID), a fingerprint of the N-Triples last pushed for it, the lines
+themselves and the subjects the record owns. On the next import of the
+same source:
+
+  * unchanged records are not sent at all,
+  * new records are sent as they are,
+  * changed records send only their new lines, after a DELETE DATA of the
+    lines of their own subjects (old or new) that disappeared.
+
+A record owns the subjects given to NTriplesWriter.start_record (by default
+the record id): the artwork, and a per-record artist node if it has one.
+Lines of other subjects (an artist shared between artworks) are only ever
+added, never deleted by a delta. Everything goes to (and is deleted from)
+the source's named graph.
+
+An import that saw every record of the source (complete=True: no limit or
+cap, no failed fetch) also deletes the records it did not see, i.e. the
+ones removed upstream: the lines of their own subjects and their ledger rows.
+
+With settings.FUSEKI_STAGED_IMPORTS the import runs against a staging
+generation of that graph (generations.py) and its ledger rows are kept under
+"<source>@<generation id>" until the generation is published; a discarded
+generation leaves the ledger as it was.
+
+    with ImportLedgerSync("romanian", on_loaded=record_graph, on_deleted=forget_graph) as sync:
+        sync.add_graph(writer)     # an NTriplesWriter grouped with start_record
+"""
+from django.conf import settings
+from . import http_client
+from .fuseki_loader import FusekiLoader, source_graph
+from .models import ImportLedger
+import hashlib
+import requests
+import zlib
+
+LEDGER_LOOKUP_BATCH = 500
+DELETE_BATCH_LINES = 2000
+
+
+def fingerprint(lines) -> str:
+    return hashlib.sha256(b"".join(sorted(lines))).hexdigest()
+
+
+def _pack(lines) -> bytes:
+    return zlib.compress(b"".join(sorted(lines)))
+
+
+def _unpack(data) -> set:
+    return set(zlib.decompress(bytes(data)).splitlines(keepends=True))
+
+
+def reset_ledger(source: str | None = None):
+    """Forget what was imported (e.g. after Fuseki was wiped), so the next import sends everything"""
+    rows = ImportLedger.objects.all() if source is None else ImportLedger.objects.filter(source=source)
+    return rows.delete()[0]
+
+
+class ImportLedgerSync:
+    """
+    Drop-in for FusekiLoader.add_graph that only sends what changed since the
+    last import of `source`. The ledger is updated once Fuseki accepted the
+    lines, so a failed chunk is retried by the next import. on_deleted(lines)
+    is called with the lines a delta removed, once they are deleted.
+    With complete=True (set before close()) the records of earlier imports
+    that this one did not see are deleted as well.
+
+    Staged imports are published by close(). They do not call on_loaded or
+    on_deleted: what they added and removed goes to the statistics when the
+    generation is published.
+    """
+
+    def __init__(self, source: str, on_loaded=None, tag: str | None = None, staged: bool | None = None,
+                 on_deleted=None, complete: bool = False, **loader_kwargs):
+        from .generations import stage_generation
+
+        self.source = source
+        self.on_loaded = on_loaded
+        self.on_deleted = on_deleted
+        self.complete = complete
+        self.tag = tag or f"{source.upper()} LEDGER"
+        self.generation = None
+        self.full = False
+        self.ledger_source = source
+        self.graph = loader_kwargs.pop("graph", None) or source_graph(source)
+        if getattr(settings, "FUSEKI_STAGED_IMPORTS", True) if staged is None else staged:
+            self.generation = stage_generation(source, copy=ImportLedger.objects.filter(source=source).exists())
+            # Nothing to send deltas against (no ledger or no live graph): a full import
+            self.full = not self.generation.base_triples
+            self.ledger_source = f"{source}@{self.generation.pk}"
+            self.graph = self.generation.graph
+        self.loader = FusekiLoader(on_loaded=self._loaded, tag=self.tag, graph=self.graph, **loader_kwargs)
+        self._pending = {}      # id(delta writer) -> ledger rows to save once it is loaded
+        self._seen = set()      # records already handled in this run
+        self._added = []        # staged: index-only copies of the loaded deltas
+        self._removed = []      # staged: lines deleted from the copied graph
+        self._gone = []         # staged: records removed upstream, dropped from the ledger on publish
+        self.counts = {"unchanged": 0, "new": 0, "changed": 0, "repeated": 0, "gone": 0, "deleted_triples": 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(discard=exc_type is not None)
+
+    def _known(self, record_ids):
+        known = {}
+        if self.full:
+            return known
+        for i in range(0, len(record_ids), LEDGER_LOOKUP_BATCH):
+            rows = ImportLedger.objects.filter(source=self.source, record_id__in=record_ids[i:i + LEDGER_LOOKUP_BATCH])
+            known.update({row.record_id: row for row in rows})
+        return known
+
+    def add_graph(self, writer):
+        records = writer.records()
+        known = self._known([record_id for record_id in records if record_id is not None])
+
+        send = {}
+        removed = []
+        entries = []
+        changed = []
+        for record_id, lines in records.items():
+            if record_id is None:
+                send[None] = lines
+                continue
+            if record_id in self._seen:
+                # Same IRI twice in one import: INSERT is idempotent, keep the first ledger entry
+                self.counts["repeated"] += 1
+                send[record_id] = lines
+                continue
+            self._seen.add(record_id)
+
+            digest = fingerprint(lines)
+            row = known.get(record_id)
+            if row is not None and row.fingerprint == digest:
+                self.counts["unchanged"] += 1
+                continue
+
+            if row is None:
+                self.counts["new"] += 1
+                send[record_id] = lines
+            else:
+                self.counts["changed"] += 1
+                old = _unpack(row.triples)
+                new = set(lines)
+                owned = set(row.subjects.split()) | set(writer.owned(record_id)) or {record_id}
+                own = {f"<{subject}>".encode("utf-8") for subject in owned}
+                removed.extend(line for line in old - new if line.split(b" ", 1)[0] in own)
+                send[record_id] = [line for line in lines if line not in old]
+            entry = ImportLedger(source=self.ledger_source, record_id=record_id, fingerprint=digest,
+                                 triples=_pack(lines), subjects="\n".join(writer.owned(record_id)))
+            (entries if row is None else changed).append(entry)
+
+        # Without the DELETE the old values stay in Fuseki: keep the old
+        # ledger entries so the next import tries again
+        if not removed or self._delete(removed):
+            entries.extend(changed)
+        if not send and not entries:
+            return
+        delta = writer.delta(send)
+        self._pending[id(delta)] = entries
+        self.loader.add_graph(delta)
+
+    def _delete(self, lines):
+        ok = True
+        for i in range(0, len(lines), DELETE_BATCH_LINES):
+            batch = lines[i:i + DELETE_BATCH_LINES]
+            body = b"".join(batch).decode("utf-8")
+            try:
+                http_client.update(settings.FUSEKI_UPDATE, f"DELETE DATA {{ GRAPH <{self.graph}> {{\n{body}}} }}")
+                self.counts["deleted_triples"] += len(batch)
+                if self.generation is not None:
+                    self._removed.extend(batch)
+                elif self.on_deleted:
+                    self.on_deleted(batch)
+            except requests.RequestException as e:
+                print(f"[{self.tag} ERROR] DELETE of {len(batch)} triples failed: {str(e)[:150]}")
+                ok = False
+        return ok
+
+    def _loaded(self, delta):
+        entries = self._pending.pop(id(delta), [])
+        if entries:
+            ImportLedger.objects.bulk_create(
+                entries,
+                batch_size=LEDGER_LOOKUP_BATCH,
+                update_conflicts=True,
+                unique_fields=["source", "record_id"],
+                update_fields=["fingerprint", "triples", "subjects", "imported_at"],
+            )
+        if not len(delta):
+            return
+        if self.generation is not None:
+            # The statistics only need the index, not the lines
+            self._added.append(delta.delta({record_id: [] for record_id in delta.records() if record_id is not None}))
+        elif self.on_loaded:
+            self.on_loaded(delta)
+
+    def _forget_gone(self):
+        """Delete the own lines and the ledger rows of the records this complete import did not see"""
+        rows = ImportLedger.objects.filter(source=self.source)
+        gone = [record_id for record_id in rows.values_list("record_id", flat=True).iterator()
+                if record_id not in self._seen]
+        for i in range(0, len(gone), LEDGER_LOOKUP_BATCH):
+            batch = list(rows.filter(record_id__in=gone[i:i + LEDGER_LOOKUP_BATCH]))
+            lines = []
+            for row in batch:
+                own = {f"<{subject}>".encode("utf-8") for subject in row.subjects.split() or [row.record_id]}
+                lines.extend(line for line in _unpack(row.triples) if line.split(b" ", 1)[0] in own)
+            # Without the DELETE the lines stay in Fuseki: keep the rows so the next import tries again
+            if lines and not self._delete(lines):
+                continue
+            record_ids = [row.record_id for row in batch]
+            self.counts["gone"] += len(record_ids)
+            if self.generation is None:
+                rows.filter(record_id__in=record_ids).delete()
+            else:
+                self._gone.extend(record_ids)
+
+    def _promote_ledger(self):
+        """Staged rows replace the source's rows (all of them after a full import)"""
+        staged = ImportLedger.objects.filter(source=self.ledger_source)
+        replaced = ImportLedger.objects.filter(source=self.source)
+        if not self.full:
+            replaced = replaced.filter(record_id__in=staged.values("record_id"))
+            for i in range(0, len(self._gone), LEDGER_LOOKUP_BATCH):
+                ImportLedger.objects.filter(source=self.source,
+                                            record_id__in=self._gone[i:i + LEDGER_LOOKUP_BATCH]).delete()
+        replaced.delete()
+        staged.update(source=self.source)
+
+    def _discard_ledger(self):
+        ImportLedger.objects.filter(source=self.ledger_source).delete()
+
+    def close(self, discard: bool = False):
+        """Flush, then publish (or with discard=True drop) a staged generation; returns the stats"""
+        from .generations import discard_generation, publish_generation
+
+        stats = self.loader.close()
+        # A full staged import starts from an empty graph and replaces every ledger row
+        if self.complete and not discard and not self.full:
+            self._forget_gone()
+        print(f"[{self.tag}] {self.counts}")
+        stats = {**stats, **self.counts}
+        if self.generation is not None:
+            if discard:
+                discard_generation(self.generation)
+                self._discard_ledger()
+                published = False
+            else:
+                published = publish_generation(
+                    self.generation, stats, on_switch=self._promote_ledger, on_discard=self._discard_ledger,
+                    added=self._added, removed=self._removed,
+                )
+            stats.update(generation=self.generation.pk, published=published)
+        return stats
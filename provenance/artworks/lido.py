@@ -0,0 +1,337 @@
+"""
+LIDO XML parsing for the data.gov.ro import, kept free of Django imports so
+it can run in worker processes.
+
+iter_lido_records streams one file record by record. For full-dataset
+imports, iter_lido_records_parallel splits a file at lido:lido boundaries
+and parses the byte ranges in a process pool; every worker reads its range
+straight from a memory-mapped view of the file, and the results are merged
+back in file order.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import multiprocessing
+import re
+import xml.etree.ElementTree as ET
+
+LIDO_NS = {'lido': 'http://www.lido-schema.org'}
+LIDO_RECORD_TAG = "{http://www.lido-schema.org}lido"
+
+PARALLEL_CHUNK_BYTES = 8 * 1024 * 1024     # XML per worker task
+READ_BYTES = 64 * 1024
+
+# Opening tag of a record (any prefix), not lido:lidoRecID or lido:lidoWrap
+RECORD_START = re.compile(rb"<(?:[A-Za-z_][\w.-]*:)?lido[\s>/]")
+ROOT_START = re.compile(rb"<(?![?!])[^>]*>")
+
+
+# Field -> (child of lido:lido the paths are relative to, [(path, value, then), ...]).
+# For each field the first match of every path is tried in order; the first
+# one with text wins. value: "raw" text, "strip"ped text, "note" (first 100
+# characters, stripped) or None (set even without text). then: direct child
+# of the matched element to read instead.
+LIDO_FIELDS = (
+    ("id", None, [
+        ("lido:lidoRecID", None, None),
+    ]),
+    ("title", "lido:descriptiveMetadata", [
+        (".//lido:objectNameWrap/lido:objectName/lido:appellationValue", "strip", None),
+        (".//lido:titleWrap/lido:titleSet/lido:appellationValue", "strip", None),
+        (".//lido:objectDescriptionWrap/lido:objectDescription/lido:descriptiveNoteValue", "note", None),
+        (".//lido:objectClassificationWrap/lido:classificationWrap/lido:classification", "strip", None),
+    ]),
+    ("creator", "lido:descriptiveMetadata", [
+        (".//lido:eventWrap/lido:eventSet/lido:event/lido:eventActor/lido:actorInRole/lido:actor/lido:nameActorSet/lido:appellationValue", "raw", None),
+        (".//lido:actorInRole/lido:actor/lido:nameActorSet/lido:appellationValue", "raw", None),
+    ]),
+    ("date", "lido:descriptiveMetadata", [
+        (".//lido:eventWrap/lido:eventSet/lido:event/lido:eventDate/lido:displayDate", "raw", None),
+    ]),
+    ("movement", "lido:descriptiveMetadata", [
+        (".//lido:styleWrap/lido:styleSet/lido:term", "strip", None),
+        (".//lido:periodWrap/lido:periodSet/lido:term", "strip", None),
+        (".//lido:cultureWrap/lido:cultureSet/lido:term", "strip", None),
+    ]),
+    ("museum", "lido:administrativeMetadata", [
+        (".//lido:repositoryWrap/lido:repositorySet/lido:repositoryName/lido:legalBodyName/lido:appellationValue", "strip", None),
+        (".//lido:repositoryName/lido:legalBodyName/lido:appellationValue", "strip", None),
+        (".//lido:repositoryName/lido:appellationValue", "strip", None),
+        (".//lido:recordSource/lido:legalBodyName/lido:appellationValue", "strip", None),
+    ]),
+    ("size", "lido:administrativeMetadata", [
+        (".//lido:objectMeasurementsWrap/lido:objectMeasurements/lido:measurementSet/lido:measurementValue", "raw", None),
+    ]),
+    ("image_url", "lido:administrativeMetadata", [
+        (".//lido:resourceWrap/lido:resourceSet/lido:resourceRepresentation", "strip", "lido:linkResource"),
+    ]),
+)
+
+VALUE_TRANSFORMS = {
+    "raw": lambda text: text,
+    "strip": str.strip,
+    "note": lambda text: text[:100].strip(),
+}
+
+
+def _qualify(name: str, namespaces) -> str:
+    prefix, _, local = name.rpartition(":")
+    return f"{{{namespaces[prefix]}}}{local}" if prefix else local
+
+
+class LidoExtractor:
+    """
+    LIDO_FIELDS compiled into one traversal per record. Every element is
+    checked against the paths ending in its tag; for each path the match
+    ElementTree's find() would return (first in path order) is kept, so the
+    result is the same as running the find() fallback chains one by one.
+    """
+
+    def __init__(self, fields=LIDO_FIELDS, namespaces=LIDO_NS):
+        self._fields = []
+        self._by_tag = {}
+        for field, context, paths in fields:
+            context = _qualify(context, namespaces) if context else None
+            compiled = []
+            for path, value, then in paths:
+                descendant = path.startswith(".//")
+                steps = [_qualify(step, namespaces) for step in path.lstrip("./").split("/")]
+                slot = len(compiled)
+                compiled.append((VALUE_TRANSFORMS[value] if value else None, _qualify(then, namespaces) if then else None))
+                parent = steps[-2] if len(steps) > 1 else None
+                # Dispatch on (tag, parent tag); single-step paths match any parent
+                self._by_tag.setdefault(steps[-1], {}).setdefault(parent, []).append(
+                    ((field, slot), context, descendant, len(steps), steps))
+            self._fields.append((field, compiled))
+
+    def _check(self, best, by_parent, tags, indexes, first_context, elem):
+        """Keep `elem` for every path it matches, if it comes first in that path's order"""
+        depth_total = len(tags)
+        patterns = by_parent.get(tags[-2] if depth_total > 1 else None, ())
+        if None in by_parent and depth_total > 1:
+            patterns = [*patterns, *by_parent[None]]
+        for slot, context, descendant, n, steps in patterns:
+            if depth_total < n:
+                continue
+            if context is None:
+                base = 0
+            elif tags[0] == context and indexes[0] == first_context[context]:
+                base = 1
+            else:
+                continue
+            depth = depth_total - base
+            if (depth >= n if descendant else depth == n) and tags[-n:] == steps:
+                key = indexes[-n:]
+                current = best.get(slot)
+                if current is None or key < current[0]:
+                    best[slot] = (key, elem)
+
+    def _values(self, best):
+        values = {}
+        for field, compiled in self._fields:
+            for slot, (transform, then) in enumerate(compiled):
+                match = best.get((field, slot))
+                if match is None:
+                    continue
+                elem = match[1] if then is None else match[1].find(then)
+                if elem is None:
+                    continue
+                if transform is None:
+                    values[field] = elem.text
+                    break
+                if elem.text:
+                    values[field] = transform(elem.text)
+                    break
+        return values
+
+    def extract(self, record):
+        """{field: value} of one parsed lido:lido element"""
+        best = {}               # (field, slot) -> (key, element)
+        first_context = {}      # tag -> preorder index of the first child of the record with it
+        tags = []               # tags from the record's child down to the current element
+        indexes = []            # their preorder indexes
+        counter = 0
+        by_tag = self._by_tag
+
+        def visit(elem):
+            nonlocal counter
+            for child in elem:
+                counter += 1
+                tag = child.tag
+                if not tags and tag not in first_context:
+                    first_context[tag] = counter
+                tags.append(tag)
+                indexes.append(counter)
+                patterns = by_tag.get(tag)
+                if patterns:
+                    self._check(best, patterns, tags, indexes, first_context, child)
+                if len(child):
+                    visit(child)
+                tags.pop()
+                indexes.pop()
+
+        visit(record)
+        return self._values(best)
+
+    def iter_records(self, source, record_tag: str = LIDO_RECORD_TAG):
+        """
+        Parse a LIDO document and yield the field values of each record
+        child of the root, matching paths on the parser's own events instead
+        of walking every record again. Records are cleared once extracted.
+        """
+        by_tag = self._by_tag
+        depth = 0
+        root = None
+        best, first_context, tags, indexes, counter = {}, {}, [], [], 0
+        context = ET.iterparse(source, events=("start", "end"))
+        try:
+            for event, elem in context:
+                if event == "start":
+                    depth += 1
+                    if depth > 2:
+                        counter += 1
+                        if depth == 3 and elem.tag not in first_context:
+                            first_context[elem.tag] = counter
+                        tags.append(elem.tag)
+                        indexes.append(counter)
+                    elif root is None:
+                        root = elem
+                    continue
+
+                depth -= 1
+                if depth >= 2:
+                    patterns = by_tag.get(elem.tag)
+                    if patterns:
+                        self._check(best, patterns, tags, indexes, first_context, elem)
+                    tags.pop()
+                    indexes.pop()
+                elif depth == 1:
+                    values = self._values(best) if elem.tag == record_tag else None
+                    best, first_context, counter = {}, {}, 0
+                    if values is not None:
+                        # Drop the record and the root's references to already parsed records
+                        elem.clear()
+                        root.clear()
+                        yield values
+        finally:
+            close = getattr(context, "close", None)
+            if close:
+                close()
+
+
+EXTRACTOR = LidoExtractor()
+
+
+def _artwork(artwork):
+    """Extracted fields as an artwork dict, or None without a creator"""
+    if artwork.get("creator"):
+        if not artwork.get("title"):
+            artwork["title"] = f"Lucrare de {artwork.get('creator', 'autor necunoscut')}"
+        return artwork
+    return None
+
+
+def extract_lido_record(lido_item):
+    """Artwork dict of one lido:lido element, or None if it names no creator"""
+    return _artwork(EXTRACTOR.extract(lido_item))
+
+
+def iter_lido_records(source):
+    """
+    Yield the artwork dicts of a LIDO document (path or binary file object)
+    one lido:lido record at a time, with fields extracted in the same pass
+    as the parse. Memory does not grow with the size of the file. Raises
+    ET.ParseError.
+    """
+    for values in EXTRACTOR.iter_records(source):
+        artwork = _artwork(values)
+        if artwork is not None:
+            yield artwork
+
+
+class _RangeReader:
+    """Binary file object over root-open + view[start:end] + root-close, read in small pieces"""
+
+    def __init__(self, prefix: bytes, view, suffix: bytes):
+        self._parts = [memoryview(prefix), view, memoryview(suffix)]
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = READ_BYTES
+        while self._parts and not len(self._parts[0]):
+            self._parts.pop(0)
+        if not self._parts:
+            return b""
+        part = self._parts[0]
+        piece, self._parts[0] = part[:size], part[size:]
+        return bytes(piece)
+
+
+def record_ranges(data, chunk_bytes: int = PARALLEL_CHUNK_BYTES):
+    """
+    (root open tag, root close tag, [(start, end), ...]) for a LIDO document
+    in a bytes-like object: ranges of about chunk_bytes that start at a record
+    and together cover every record of the root.
+    """
+    root = ROOT_START.search(data)
+    if root is None:
+        raise ET.ParseError("no root element")
+    root_open = bytes(root.group(0))
+    close_at = data.rfind(b"</")
+    if close_at < root.end():
+        raise ET.ParseError("no closing root tag")
+    root_close = bytes(data[close_at:]).strip()
+
+    ranges = []
+    start = None
+    position = root.end()
+    while True:
+        match = RECORD_START.search(data, position)
+        if match is None or match.start() >= close_at:
+            break
+        if start is None:
+            start = match.start()
+        elif match.start() - start >= chunk_bytes:
+            ranges.append((start, match.start()))
+            start = match.start()
+        # Jump ahead roughly one chunk before looking for the next boundary
+        position = max(match.end(), start + chunk_bytes)
+    if start is not None:
+        ranges.append((start, close_at))
+    return root_open, root_close, ranges
+
+
+def parse_range(path: str, root_open: bytes, root_close: bytes, start: int, end: int):
+    """Worker: artwork dicts of the records in path[start:end]"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+        try:
+            return list(iter_lido_records(_RangeReader(root_open, view[start:end], root_close)))
+        finally:
+            view.release()
+
+
+def iter_lido_records_parallel(path: str, workers: int, chunk_bytes: int = PARALLEL_CHUNK_BYTES):
+    """
+    Same records as iter_lido_records(path), parsed by `workers` processes.
+    At most 2 * workers ranges are in flight, so memory stays bounded.
+    """
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        root_open, root_close, ranges = record_ranges(mm, chunk_bytes)
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        pending = []
+        ranges = iter(ranges)
+        try:
+            while True:
+                while len(pending) < 2 * workers:
+                    next_range = next(ranges, None)
+                    if next_range is None:
+                        break
+                    pending.append(pool.submit(parse_range, path, root_open, root_close, *next_range))
+                if not pending:
+                    return
+                yield from pending.pop(0).result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from artworks.generations import adopt_default_graph
+
+class Command(BaseCommand):
+    help = "Move data older versions loaded into Fuseki's default graph into a source's graph (once, after upgrading)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=['wikidata', 'preload', 'romanian'],
+                            help='Source whose graph receives the data (the default graph does not say which source loaded what)')
+
+    def handle(self, *args, **options):
+        moved = adopt_default_graph(options['source'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully moved {moved} triples into the {options["source"]} graph'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from artworks.benchmarks import BENCHMARKS
+
+class Command(BaseCommand):
+    help = 'Time the import hot paths against the implementations they replaced'
+
+    def add_arguments(self, parser):
+        parser.add_argument('names', nargs='*', help=f'Benchmarks to run (default: all of {", ".join(BENCHMARKS)})')
+        parser.add_argument('--records', type=int, default=5000, help='Synthetic records per benchmark')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per implementation, the best one is reported')
+
+    def handle(self, *args, **options):
+        names = options['names'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f'Unknown benchmark(s): {", ".join(unknown)}')
+
+        for name in names:
+            result = BENCHMARKS[name](records=options['records'], repeat=options['repeat'])
+            line = (
+                f'{name}: {result["records"]} records, '
+                f'{result["baseline_us_per_record"]} → {result["current_us_per_record"]} µs/record '
+                f'({result["speedup"]}x), identical output: {result["identical"]}'
+            )
+            if result['identical']:
+                self.stdout.write(self.style.SUCCESS(line))
+            else:
+                self.stdout.write(self.style.ERROR(line))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from artworks.getty_index import build_index, index_path
+
+class Command(BaseCommand):
+    help = 'Build the local Getty label index from ULAN/AAT N-Triples dumps (.nt or .nt.gz)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ulan', help='Path to the Getty ULAN N-Triples dump')
+        parser.add_argument('--aat', help='Path to the Getty AAT N-Triples dump')
+        parser.add_argument('--index', help='Index file to write (default: settings.GETTY_INDEX_PATH)')
+
+    def handle(self, *args, **options):
+        dumps = [(vocab, options[vocab]) for vocab in ('ulan', 'aat') if options[vocab]]
+        if not dumps:
+            raise CommandError('Give at least one of --ulan or --aat')
+        counts = build_index(dumps, path=options['index'])
+        summary = ', '.join(f'{vocab}: {count} labels' for vocab, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully built Getty index {options["index"] or index_path()} ({summary})'
+        ))
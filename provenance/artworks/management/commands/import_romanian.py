@@ -1,9 +1,17 @@
 from django.core.management.base import BaseCommand
+from artworks.import_ledger import reset_ledger
 from artworks.import_romanian import import_romanian_heritage
 
 class Command(BaseCommand):
     help = 'Import Romanian cultural heritage from data.gov.ro'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Parse and push every artwork again, even if the dataset and the artworks did not change')
+        parser.add_argument('--limit', type=int, default=100, help='Maximum artworks to import (0 for the whole dataset)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes parsing the LIDO file in parallel')
+
     def handle(self, *args, **options):
-        import_romanian_heritage()
+        if options['full']:
+            reset_ledger('romanian')
+        import_romanian_heritage(limit=options['limit'] or None, workers=max(1, options['workers']), force=options['full'])
         self.stdout.write(self.style.SUCCESS('Successfully imported Romanian heritage'))
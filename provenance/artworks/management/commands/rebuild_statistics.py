@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from artworks.statistics_store import rebuild_from_fuseki
+
+class Command(BaseCommand):
+    help = 'Rebuild the precomputed /stats/api/ counters from Fuseki'
+
+    def handle(self, *args, **options):
+        total = rebuild_from_fuseki()
+        self.stdout.write(self.style.SUCCESS(f'Successfully rebuilt statistics for {total} artworks'))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from artworks.cache_refresh import refresh_ahead
+
+class Command(BaseCommand):
+    help = 'Refresh DBpedia and Getty cache entries that expire soon (run periodically, e.g. daily from cron)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=7, help='Refresh entries expiring within this many days')
+        parser.add_argument('--limit', type=int, default=None, help='Maximum entries refreshed per cache')
+
+    def handle(self, *args, **options):
+        counts = refresh_ahead(within_days=options['days'], limit=options['limit'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully refreshed {sum(counts.values())} cache entries {counts}'))
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from artworks.fuseki_loader import drop_source_graph
+from artworks.import_ledger import reset_ledger
+from artworks.statistics_store import rebuild_from_fuseki
+
+class Command(BaseCommand):
+    help = "Import one source again from scratch (a new generation, or a dropped and reloaded graph without staging)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=['wikidata', 'preload', 'romanian'])
+        parser.add_argument('--limit', type=int, default=100, help='Maximum artworks to import (0 for the whole Romanian dataset)')
+        parser.add_argument('--workers', type=int, default=1, help='Processes parsing the LIDO file in parallel (romanian)')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        staged = getattr(settings, 'FUSEKI_STAGED_IMPORTS', True)
+        if not staged:
+            drop_source_graph(source)
+        # Without ledger rows the import is a full one (into an empty staging graph)
+        reset_ledger(source)
+
+        if source == 'romanian':
+            from artworks.import_romanian import import_romanian_heritage
+            import_romanian_heritage(limit=options['limit'] or None, workers=max(1, options['workers']), force=True)
+        else:
+            # One preload fills both graphs; the ledger skips what the other one already has
+            from artworks.preload_dbpedia import preload_all
+            preload_all(total=options['limit'] or None)
+
+        if not staged:
+            # Staged imports update the statistics when they are published
+            rebuild_from_fuseki()
+        self.stdout.write(self.style.SUCCESS(f'Successfully reloaded {source}'))
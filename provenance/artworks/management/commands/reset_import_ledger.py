@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from artworks.import_ledger import reset_ledger
+
+class Command(BaseCommand):
+    help = 'Forget what the imports pushed to Fuseki (e.g. after wiping the dataset), so the next runs push everything'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=None, help='Only this import (wikidata, preload or romanian)')
+
+    def handle(self, *args, **options):
+        deleted = reset_ledger(options['source'])
+        self.stdout.write(self.style.SUCCESS(f'Successfully removed {deleted} import ledger entries'))
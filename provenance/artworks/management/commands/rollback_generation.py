@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from artworks.generations import rollback_generation
+
+class Command(BaseCommand):
+    help = 'Make the previous generation of a source live again'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help='Import source (wikidata, preload or romanian)')
+
+    def handle(self, *args, **options):
+        try:
+            generation = rollback_generation(options['source'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Successfully rolled {generation.source} back to generation {generation.pk}'))
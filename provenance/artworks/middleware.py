@@ -0,0 +1,16 @@
+from .generations import generation_id
+
+GENERATION_HEADER = "X-Dataset-Generation"
+
+
+class DatasetGenerationMiddleware:
+    """Tag JSON responses with the dataset generation they were read from, for client-side cache invalidation"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.get("Content-Type", "").startswith("application/json"):
+            response[GENERATION_HEADER] = generation_id()
+        return response
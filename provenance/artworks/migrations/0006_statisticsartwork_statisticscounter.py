@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0005_artwork_image_url_dbpediaartist_image_url"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StatisticsArtwork",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("iri", models.CharField(db_index=True, max_length=500, unique=True)),
+                ("creators", models.JSONField(default=list)),
+                ("museums", models.JSONField(default=list)),
+                ("movements", models.JSONField(default=list)),
+                ("dates", models.JSONField(default=list)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="StatisticsCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("key", models.CharField(max_length=500)),
+                ("subkey", models.CharField(blank=True, default="", max_length=500)),
+                ("count", models.IntegerField(default=0)),
+            ],
+            options={
+                "indexes": [
+                    models.Index(fields=["kind", "-count"], name="artworks_st_kind_bbcb17_idx")
+                ],
+                "unique_together": {("kind", "key", "subkey")},
+            },
+        ),
+    ]
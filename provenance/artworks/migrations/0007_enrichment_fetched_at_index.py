@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0006_statisticsartwork_statisticscounter"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="dbpediaartist",
+            name="fetched_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="gettyaat",
+            name="fetched_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="gettyulan",
+            name="fetched_at",
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
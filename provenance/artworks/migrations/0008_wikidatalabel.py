@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0007_enrichment_fetched_at_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WikidataLabel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("uri", models.CharField(db_index=True, max_length=255, unique=True)),
+                ("label", models.CharField(blank=True, max_length=255, null=True)),
+                ("fetched_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0008_wikidatalabel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportLedger",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("source", models.CharField(max_length=50)),
+                ("record_id", models.CharField(max_length=500)),
+                ("fingerprint", models.CharField(max_length=64)),
+                ("triples", models.BinaryField()),
+                ("imported_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "unique_together": {("source", "record_id")},
+            },
+        ),
+    ]
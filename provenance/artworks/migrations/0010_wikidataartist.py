@@ -0,0 +1,29 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0009_importledger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WikidataArtist",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("name", models.CharField(db_index=True, max_length=255, unique=True)),
+                ("birthDate", models.CharField(blank=True, max_length=50, null=True)),
+                ("birthPlace", models.CharField(blank=True, max_length=255, null=True)),
+                ("nationality", models.CharField(blank=True, max_length=255, null=True)),
+                ("movement", models.CharField(blank=True, max_length=255, null=True)),
+                ("fetched_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
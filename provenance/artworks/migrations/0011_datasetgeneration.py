@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-16 23:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0010_wikidataartist"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DatasetGeneration",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("source", models.CharField(max_length=50)),
+                ("graph", models.CharField(max_length=500)),
+                ("status", models.CharField(db_index=True, max_length=20)),
+                ("base_triples", models.IntegerField(default=0)),
+                ("triples", models.IntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("activated_at", models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
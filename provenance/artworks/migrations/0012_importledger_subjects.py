@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 00:03
+
+from django.db import migrations, models
+
+
+def forget_positional_romanian_records(apps, schema_editor):
+    # Romanian records were keyed on positional IRIs; keyed on lidoRecID now,
+    # the next import is a full one
+    ImportLedger = apps.get_model("artworks", "ImportLedger")
+    ImportLedger.objects.filter(source="romanian").delete()
+    ImportLedger.objects.filter(source__startswith="romanian@").delete()
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("artworks", "0011_datasetgeneration"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importledger",
+            name="subjects",
+            field=models.TextField(blank=True, default=""),
+        ),
+        migrations.RunPython(forget_positional_romanian_records, migrations.RunPython.noop),
+    ]
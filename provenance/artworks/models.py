@@ -9,7 +9,7 @@ class DBpediaArtist(models.Model):
     movement = models.CharField(max_length=255, null=True, blank=True)
     image_url = models.URLField(max_length=500, null=True, blank=True)
     
-    fetched_at = models.DateTimeField(auto_now_add=True)
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
 
     def __str__(self):
         return self.name
@@ -30,7 +30,7 @@ class GettyULAN(models.Model):
     ulan_id = models.CharField(max_length=50, null=True, blank=True)
     ulan_url = models.URLField(null=True, blank=True)
     preferred_label = models.CharField(max_length=255, null=True, blank=True)
-    fetched_at = models.DateTimeField(auto_now_add=True)
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     def __str__(self):
         return f"{self.name} ({self.ulan_id})"
@@ -40,7 +40,82 @@ class GettyAAT(models.Model):
     aat_id = models.CharField(max_length=50, null=True, blank=True)
     aat_url = models.URLField(null=True, blank=True)
     preferred_label = models.CharField(max_length=255, null=True, blank=True)
-    fetched_at = models.DateTimeField(auto_now_add=True)
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
     
     def __str__(self):
         return f"{self.term} ({self.aat_id})"
+
+class WikidataLabel(models.Model):
+    """English label of a Wikidata entity; label is None when it has no usable one"""
+    uri = models.CharField(max_length=255, unique=True, db_index=True)
+    label = models.CharField(max_length=255, null=True, blank=True)
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.uri} ({self.label})"
+
+class WikidataArtist(models.Model):
+    """Wikidata details of a person looked up by English label; all None when no person has it"""
+    name = models.CharField(max_length=255, unique=True, db_index=True)
+    birthDate = models.CharField(max_length=50, null=True, blank=True)
+    birthPlace = models.CharField(max_length=255, null=True, blank=True)
+    nationality = models.CharField(max_length=255, null=True, blank=True)
+    movement = models.CharField(max_length=255, null=True, blank=True)
+    fetched_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.name
+
+class StatisticsArtwork(models.Model):
+    """Facts already counted into StatisticsCounter for one artwork IRI"""
+    iri = models.CharField(max_length=500, unique=True, db_index=True)
+    creators = models.JSONField(default=list)
+    museums = models.JSONField(default=list)
+    movements = models.JSONField(default=list)
+    dates = models.JSONField(default=list)
+
+    def __str__(self):
+        return self.iri
+
+class StatisticsCounter(models.Model):
+    """Precomputed count for one statistic (kind) value (key[, subkey])"""
+    kind = models.CharField(max_length=20)
+    key = models.CharField(max_length=500)
+    subkey = models.CharField(max_length=500, blank=True, default="")
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("kind", "key", "subkey")
+        indexes = [models.Index(fields=["kind", "-count"])]
+
+    def __str__(self):
+        return f"{self.kind} {self.key} {self.subkey} = {self.count}"
+
+class ImportLedger(models.Model):
+    """What an import last pushed to Fuseki for one source record, to re-import only changes"""
+    source = models.CharField(max_length=50)
+    record_id = models.CharField(max_length=500)
+    fingerprint = models.CharField(max_length=64)
+    triples = models.BinaryField()      # zlib-compressed, sorted N-Triples lines
+    subjects = models.TextField(blank=True, default="")    # IRIs only this record writes, one per line
+    imported_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("source", "record_id")
+
+    def __str__(self):
+        return f"{self.source} {self.record_id}"
+
+class DatasetGeneration(models.Model):
+    """One loaded version of an import source's named graph; readers query the active one"""
+    # staging -> active -> previous -> retired, or staging -> discarded
+    source = models.CharField(max_length=50)
+    graph = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, db_index=True)
+    base_triples = models.IntegerField(default=0)      # copied from the active generation when staged
+    triples = models.IntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    activated_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.source} #{self.pk} ({self.status})"
@@ -0,0 +1,157 @@
+"""
+Direct N-Triples writer for the import hot loops. Lines are formatted and
+encoded as triples are added, instead of building an rdflib Graph only to
+serialize it right away. The output is byte-for-byte what rdflib's "nt"
+serializer produces for the same triples (IRIs and plain or typed literals),
+duplicates included: a triple added twice is written once.
+
+The writer keeps a small index of rdf:type and of the predicates passed as
+`index`, so consumers that only need subjects()/objects() (the statistics
+store) can read it like a Graph. Lines can also be grouped by source record
+(start_record), which is what the import ledger fingerprints, together with
+the subjects a record owns (its lines of other subjects are shared).
+"""
+from rdflib.namespace import RDF
+
+# Same characters rdflib refuses to serialize in a URIRef
+INVALID_IRI_CHARS = '<>" {}|\\^`'
+
+
+def iri(value: str) -> str:
+    """<value>, or ValueError if rdflib could not serialize it either"""
+    for c in INVALID_IRI_CHARS:
+        if c in value:
+            raise ValueError(f'"{value}" does not look like a valid IRI')
+    return f"<{value}>"
+
+
+def literal(value, datatype: str | None = None) -> str:
+    """Quoted literal escaped like rdflib's NTSerializer (\\, \\n, \", \\r)"""
+    encoded = '"%s"' % str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"').replace("\r", "\\r")
+    if datatype:
+        return f"{encoded}^^<{datatype}>"
+    return encoded
+
+
+class NTriplesWriter:
+    """
+    Collect triples as encoded N-Triples lines.
+
+        w = NTriplesWriter()
+        w.add_iri(art, RDF.type, EX.Artwork)
+        w.add_literal(art, EX.title, title, datatype=XSD.string)
+        loader.add_graph(w)       # or w.write(stream) / w.getvalue()
+    """
+
+    def __init__(self, index=()):
+        self._lines = {}        # encoded line -> None, ordered and deduplicated
+        self._terms = {}        # IRI -> formatted term, subjects and predicates repeat a lot
+        self._indexed = {str(p) for p in index} | {str(RDF.type)}
+        self._index = {}
+        self._records = {}      # record id -> {line: None} of the lines added for it
+        self._owned = {}        # record id -> IRIs only that record writes
+        self._record = None
+
+    def start_record(self, record_id: str | None, subjects=None):
+        """
+        Attribute the following triples to `record_id` (usually the artwork
+        IRI). `subjects` are the IRIs whose lines only this record writes
+        (default: the record id itself).
+        """
+        self._record = None if record_id is None else str(record_id)
+        if self._record is not None:
+            self._records.setdefault(self._record, {})
+            owned = self._owned.setdefault(self._record, {})
+            owned.update(dict.fromkeys(str(s) for s in (subjects or [self._record])))
+
+    def owned(self, record_id: str):
+        """IRIs the record owns (see start_record)"""
+        return list(self._owned.get(str(record_id), ()))
+
+    def _iri(self, value):
+        term = self._terms.get(value)
+        if term is None:
+            term = self._terms[value] = iri(value)
+        return term
+
+    def _add(self, subject, predicate, term, value):
+        line = f"{self._iri(subject)} {self._iri(predicate)} {term} .\n".encode("utf-8")
+        if self._record is not None:
+            self._records[self._record][line] = None
+        if line in self._lines:
+            return
+        self._lines[line] = None
+        predicate = str(predicate)
+        if predicate in self._indexed:
+            self._index.setdefault((str(subject), predicate), []).append(value)
+
+    def add_iri(self, subject: str, predicate: str, obj: str):
+        self._add(subject, predicate, self._iri(obj), str(obj))
+
+    def add_literal(self, subject: str, predicate: str, value, datatype: str | None = None):
+        self._add(subject, predicate, literal(value, datatype), str(value))
+
+    def __len__(self):
+        return len(self._lines)
+
+    def lines(self):
+        """Encoded lines, each ending in a newline"""
+        return self._lines.keys()
+
+    def records(self):
+        """{record id: lines added for it}; lines added outside a record are under None"""
+        grouped = {record_id: list(lines) for record_id, lines in self._records.items()}
+        in_records = {line for lines in self._records.values() for line in lines}
+        loose = [line for line in self._lines if line not in in_records]
+        if loose:
+            grouped[None] = loose
+        return grouped
+
+    def delta(self, lines_by_record):
+        """
+        New writer holding only the given lines per record, with the index
+        entries of the subjects those records own (so the statistics still see
+        the complete facts of a record even if only some of its lines changed).
+        """
+        w = NTriplesWriter()
+        w._indexed = self._indexed
+        for record_id, lines in lines_by_record.items():
+            owned = self.owned(record_id) if record_id is not None else []
+            w.start_record(record_id, owned)
+            for line in lines:
+                if record_id is not None:
+                    w._records[record_id][line] = None
+                w._lines[line] = None
+            for subject in owned:
+                for predicate in self._indexed:
+                    values = self._index.get((subject, predicate))
+                    if values:
+                        w._index[(subject, predicate)] = list(values)
+        w.start_record(None)
+        return w
+
+    def getvalue(self) -> bytes:
+        return b"".join(self._lines)
+
+    def write(self, stream):
+        """Write all lines to a binary stream"""
+        stream.writelines(self._lines)
+
+    def serialize(self, format: str = "nt") -> str:
+        """Same signature as Graph.serialize for the "nt" format"""
+        if format not in ("nt", "nt11", "ntriples"):
+            raise ValueError(f"NTriplesWriter only writes N-Triples, not {format}")
+        return self.getvalue().decode("utf-8")
+
+    # Read access used by statistics_store.facts_from_graph
+
+    def subjects(self, predicate, obj):
+        if str(predicate) != str(RDF.type):
+            raise ValueError("only rdf:type subjects are indexed")
+        obj = str(obj)
+        return [s for (s, p), values in self._index.items() if p == str(RDF.type) and obj in values]
+
+    def objects(self, subject, predicate):
+        if str(predicate) not in self._indexed:
+            raise ValueError(f"{predicate} is not indexed")
+        return list(self._index.get((str(subject), str(predicate)), ()))
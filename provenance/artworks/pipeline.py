@@ -0,0 +1,97 @@
+"""
+Streaming import pipeline: a source iterable and a chain of stages, each
+running in its own thread and connected by bounded queues. At most `maxsize`
+items wait between two stages, so memory depends on the batch size, not on
+the size of the collection being imported.
+"""
+from django.db import connections
+import queue
+import threading
+
+PIPELINE_QUEUE_SIZE = 4
+DONE = object()      # end-of-stream marker
+
+
+def put_until_stopped(q, item, stop):
+    """Put into a bounded queue, giving up once `stop` is set"""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def get_until_stopped(q, stop):
+    """Get from a queue, returning DONE once `stop` is set"""
+    while not stop.is_set():
+        try:
+            return q.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return DONE
+
+
+def run_pipeline(source, stages, maxsize: int = PIPELINE_QUEUE_SIZE, name: str = "pipeline"):
+    """
+    Yield source items passed through every stage (callable item -> item, or
+    None to drop it). The first error of any stage stops the pipeline and is
+    raised to the consumer; closing the generator stops all stages.
+    """
+    stop = threading.Event()
+    errors = []
+    queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+
+    def feed():
+        try:
+            for item in source:
+                if not put_until_stopped(queues[0], item, stop):
+                    break
+            put_until_stopped(queues[0], DONE, stop)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            close = getattr(source, "close", None)
+            if close:
+                close()
+            connections.close_all()
+
+    def work(stage, inbox, outbox):
+        try:
+            while True:
+                item = get_until_stopped(inbox, stop)
+                if item is DONE:
+                    put_until_stopped(outbox, DONE, stop)
+                    return
+                result = stage(item)
+                if result is not None and not put_until_stopped(outbox, result, stop):
+                    return
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=feed, name=f"{name}-source", daemon=True)]
+    for index, stage in enumerate(stages):
+        threads.append(threading.Thread(
+            target=work, args=(stage, queues[index], queues[index + 1]),
+            name=f"{name}-{getattr(stage, '__name__', index)}", daemon=True,
+        ))
+    for thread in threads:
+        thread.start()
+
+    try:
+        while True:
+            item = get_until_stopped(queues[-1], stop)
+            if item is DONE:
+                break
+            yield item
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    if errors:
+        raise errors[0]
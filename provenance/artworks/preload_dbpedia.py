@@ -1,95 +1,114 @@
-from django.conf import settings
 from .sparql import get_paintings, EX
-from .getty_enrichment import get_getty_enrichment
-from rdflib import Graph, URIRef, Literal
+from .getty_enrichment import ENRICHMENT_MEMO, get_getty_enrichment
+from .enrichment_engine import enrich
+from .statistics_store import forget_graph, record_graph, statistics_writer
+from .fuseki_loader import FusekiLoader, load_graph
+from .generations import live_graph
+from .import_ledger import ImportLedgerSync
+from .ntriples import NTriplesWriter
+from rdflib import Graph
 from rdflib.namespace import RDF
-import requests
 
 def artwork_to_rdf(p):
-    g = Graph()
-    subj = URIRef(EX[p["title"].replace(" ", "_")])
+    """N-Triples of one deduplicated painting (ValueError if its title makes an invalid IRI)"""
+    g = statistics_writer()
+    subj = EX[p["title"].replace(" ", "_")]
 
-    g.add((subj, RDF.type, EX.Artwork))
-    g.add((subj, EX.title, Literal(p["title"])))
-    g.add((subj, EX.creator, Literal(p.get("creator"))))
+    g.start_record(subj)
+    g.add_iri(subj, RDF.type, EX.Artwork)
+    g.add_literal(subj, EX.title, p["title"])
+    g.add_literal(subj, EX.creator, p.get("creator"))
     
     # Add artist URI and Getty ULAN enrichment
     if p.get("creator"):
         creator = p["creator"]
-        artist_uri = URIRef(EX[creator.replace(" ", "_")])
-        g.add((subj, EX.createdBy, artist_uri))
-        g.add((artist_uri, RDF.type, EX.Artist))
-        g.add((artist_uri, EX.name, Literal(creator)))
+        artist_uri = EX[creator.replace(" ", "_")]
+        g.add_iri(subj, EX.createdBy, artist_uri)
+        g.add_iri(artist_uri, RDF.type, EX.Artist)
+        g.add_literal(artist_uri, EX.name, creator)
         
         # Add Getty ULAN link for artist
         ulan_data = get_getty_enrichment(creator, "ulan")
         if ulan_data:
             ulan_id = ulan_data.get("ulan_id", "")
             if ulan_id:
-                g.add((artist_uri, EX.hasULAN, URIRef(f"http://vocab.getty.edu/page/ulan/{ulan_id}")))
+                g.add_iri(artist_uri, EX.hasULAN, f"http://vocab.getty.edu/page/ulan/{ulan_id}")
                 print(f"[GETTY ULAN] {creator} -> {ulan_id}")
     
     # Handle museum - can be a set or string
     if isinstance(p.get("museum"), set):
         for museum in p["museum"]:
             if museum:
-                g.add((subj, EX.museum, Literal(museum)))
+                g.add_literal(subj, EX.museum, museum)
     else:
         if p.get("museum"):
-            g.add((subj, EX.museum, Literal(p["museum"])))
+            g.add_literal(subj, EX.museum, p["museum"])
     
-    g.add((subj, EX.date, Literal(p.get("date"))))
+    g.add_literal(subj, EX.date, p.get("date"))
     
     # Handle movement - can be a set or string
     if isinstance(p.get("movement"), set):
         for movement in p["movement"]:
             if movement:
-                g.add((subj, EX.movement, Literal(movement)))
+                g.add_literal(subj, EX.movement, movement)
                 # Add Getty AAT link for each movement
                 aat_data = get_getty_enrichment(movement, "aat")
                 if aat_data:
                     aat_id = aat_data.get("aat_id", "")
                     if aat_id:
-                        g.add((subj, EX.hasAAT, URIRef(f"http://vocab.getty.edu/page/aat/{aat_id}")))
+                        g.add_iri(subj, EX.hasAAT, f"http://vocab.getty.edu/page/aat/{aat_id}")
                         print(f"[GETTY AAT] {movement} -> {aat_id}")
     else:
         if p.get("movement"):
-            g.add((subj, EX.movement, Literal(p["movement"])))
+            g.add_literal(subj, EX.movement, p["movement"])
             # Add Getty AAT link for movement
             aat_data = get_getty_enrichment(p["movement"], "aat")
             if aat_data:
                 aat_id = aat_data.get("aat_id", "")
                 if aat_id:
-                    g.add((subj, EX.hasAAT, URIRef(f"http://vocab.getty.edu/page/aat/{aat_id}")))
+                    g.add_iri(subj, EX.hasAAT, f"http://vocab.getty.edu/page/aat/{aat_id}")
                     print(f"[GETTY AAT] {p['movement']} -> {aat_id}")
 
     return g
 
-def send_to_fuseki(graph: Graph, base_endpoint: str | None = None):
-    base = base_endpoint or settings.FUSEKI_ENDPOINT.rsplit("/", 1)[0]
-    data_endpoint = f"{base}/data"
-
-    data = graph.serialize(format="turtle")
-    r = requests.post(
-        data_endpoint,
-        data=data,
-        headers={"Content-Type": "text/turtle"},
-    )
-    # print("[FUSEKI] status:", r.status_code)
+def send_to_fuseki(graph: Graph | NTriplesWriter, loader: FusekiLoader | ImportLedgerSync | None = None):
+    """Queue the graph on `loader` (or load it on its own); recorded in the statistics once accepted"""
+    if loader is None:
+        return load_graph(graph, on_loaded=record_graph, tag="PRELOAD FUSEKI", graph=live_graph("preload"))
+    loader.add_graph(graph)
 
 def preload_all(limit=10, total=100):
     print("[PRELOAD] Începem preload RDF în Fuseki...")
+    failed = []
     try:
-        paintings = get_paintings(limit=limit, total=total)
+        paintings = get_paintings(limit=limit, total=total, failed=failed)
     except Exception as e:
         print("[PRELOAD ERROR] fetch paintings failed:", e)
         return
     
     print(f"[PRELOAD] Received {len(paintings)} deduplicated artworks from get_paintings()")
     
+    # Resolve all creators and movements concurrently up front (Getty links
+    # below, DBpedia details shown on the artist pages)
+    creators = {p["creator"] for p in paintings if p.get("creator")}
+    movements = set()
     for p in paintings:
-        # print(f"[RDF] {p['title']}")
-        g = artwork_to_rdf(p)
-        send_to_fuseki(g)
+        movement = p.get("movement")
+        movements.update(movement if isinstance(movement, set) else {movement})
+    enrich(ulan_names=creators, aat_terms={m for m in movements if m}, dbpedia_names=creators)
+    
+    # Only artworks that changed since the last preload are sent again; a
+    # preload of every painting also deletes the ones no longer on Wikidata
+    with ImportLedgerSync("preload", on_loaded=record_graph, on_deleted=forget_graph, tag="PRELOAD FUSEKI",
+                          complete=total is None and not failed) as loader:
+        for p in paintings:
+            # print(f"[RDF] {p['title']}")
+            try:
+                g = artwork_to_rdf(p)
+            except ValueError as e:
+                print(f"[PRELOAD] Skipping artwork: {str(e)[:100]}")
+                continue
+            send_to_fuseki(g, loader)
 
+    print(f"[PRELOAD] Getty memo: {ENRICHMENT_MEMO.stats()}")
     print("[PRELOAD] Gata!")
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .dbpedia import AUTHOR_MEMO
+from .getty_enrichment import ENRICHMENT_MEMO
+from .models import DBpediaArtist, GettyAAT, GettyULAN
+
+
+@receiver([post_save, post_delete], sender=GettyULAN)
+def evict_ulan_memo(sender, instance, **kwargs):
+    ENRICHMENT_MEMO.invalidate(("ulan", instance.name))
+
+
+@receiver([post_save, post_delete], sender=GettyAAT)
+def evict_aat_memo(sender, instance, **kwargs):
+    ENRICHMENT_MEMO.invalidate(("aat", instance.term))
+
+
+@receiver([post_save, post_delete], sender=DBpediaArtist)
+def evict_dbpedia_memo(sender, instance, **kwargs):
+    AUTHOR_MEMO.invalidate(instance.name)
@@ -1,231 +1,293 @@
-from rdflib import Graph, Namespace, Literal, URIRef
-from rdflib.namespace import RDF, RDFS, XSD
-from SPARQLWrapper import SPARQLWrapper, JSON, POST
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, XSD
 from django.conf import settings
-import socket
-import urllib.error as urlerror
+from . import http_client
+from .fuseki_loader import load_graph
+from .generations import live_graph, read_graphs
+from .import_ledger import ImportLedgerSync
+from .ntriples import iri
+from .pipeline import DONE, put_until_stopped, run_pipeline
+from .wikidata_labels import resolve_labels
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import requests
+import threading
+import time
 
 EX = Namespace("http://example.org/ontology/")
 
 WD_TIMEOUT = 60
 WD_RETRY = 5
-WD_USER_AGENT = "provenance-app/1.0 (contact: example@example.com)"
-
-def _make_wikidata_client():
-    client = SPARQLWrapper("https://query.wikidata.org/sparql")
-    client.setReturnFormat(JSON)
-    client.setTimeout(WD_TIMEOUT)
-    client.addCustomHttpHeader("User-Agent", WD_USER_AGENT)
-    client.setMethod(POST)
-    return client
-
-def get_paintings(limit: int = 10, total: int = 100):
-    sparql = _make_wikidata_client()
-    all_bindings = []
-
-    for offset in range(0, total, limit):
-        sparql.setQuery(f"""
+WIKIDATA_ENDPOINT = "https://query.wikidata.org/sparql"
+
+WD_PAGE_WORKERS = 4             # WDQS allows 5 parallel queries per client
+WD_MAX_QID = 135_000_000        # upper bound of the item QID space
+WD_PARTITIONS = 32              # QID ranges fetched independently
+
+WD_WINDOW_QUEUE_SIZE = 8        # fetched windows waiting for the consumer
+
+PAINTING_SELECTION = "?item wdt:P31 wd:Q3305213."
+PAINTING_VARIABLES = ["creator", "inception", "birthDate", "birthPlace", "collection", "location",
+                      "movement", "nationality", "creatorMovement", "image"]
+ROMANIAN_SELECTION = """?item wdt:P31 wd:Q3305213.
+                        {
+                            ?item wdt:P17 wd:Q218.
+                        } UNION {
+                            ?item wdt:P170 ?romanianCreator.
+                            ?romanianCreator wdt:P27 wd:Q218.
+                        }"""
+ROMANIAN_VARIABLES = ["creator", "inception", "birthDate", "birthPlace", "collection", "location",
+                      "movement", "nationality", "creatorMovement", "country"]
+# Result fields holding entity URIs whose label is needed
+LABELLED_FIELDS = ["item", "creator", "birthPlace", "collection", "location", "movement",
+                   "creatorMovement", "nationality"]
+
+WD_OPTIONALS = {
+    "creator": "OPTIONAL { ?item wdt:P170 ?creator. }",
+    "inception": "OPTIONAL { ?item wdt:P571 ?inception }",
+    "collection": "OPTIONAL { ?item wdt:P195 ?collection }",
+    "location": "OPTIONAL { ?item wdt:P276 ?location }",
+    "movement": "OPTIONAL { ?item wdt:P135 ?movement }",
+    "image": "OPTIONAL { ?item wdt:P18 ?image }",
+    "country": "OPTIONAL { ?item wdt:P17 ?country }",
+    "birthDate": "OPTIONAL { ?creator wdt:P569 ?birthDate }",
+    "birthPlace": "OPTIONAL { ?creator wdt:P19 ?birthPlace }",
+    "nationality": "OPTIONAL { ?creator wdt:P27 ?nationality }",
+    "creatorMovement": "OPTIONAL { ?creator wdt:P135 ?creatorMovement }",
+}
+
+def query_wikidata(query: str):
+    """One query to the Wikidata query service through the pooled client"""
+    return http_client.query(WIKIDATA_ENDPOINT, query, timeout=WD_TIMEOUT, method="POST")
+
+def _qid_partitions(max_qid: int = None, count: int = None):
+    """Split the QID space in [low, high) ranges"""
+    max_qid = max_qid or WD_MAX_QID
+    count = count or WD_PARTITIONS
+    step = -(-max_qid // count)
+    return [(low, min(low + step, max_qid)) for low in range(0, max_qid, step)]
+
+def _keyset_page_query(selection: str, variables, after_qid: int, high_qid: int, limit: int):
+    """
+    One page of a QID partition: the subquery picks the next `limit` distinct
+    items after `after_qid`, the OPTIONALs then add their details. Each page
+    starts where the previous one stopped and pages never overlap. The QID
+    is computed from the item IRI, which WDQS cannot use as an index: each
+    page still evaluates the whole `selection` and filters it on ?qid, so
+    keyset pages avoid OFFSET re-reads but not the scan of the selection.
+    """
+    optionals = "\n                ".join(WD_OPTIONALS[v] for v in variables)
+    return f"""
             PREFIX wd: <http://www.wikidata.org/entity/>
             PREFIX wdt: <http://www.wikidata.org/prop/direct/>
             PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?item ?creator ?inception ?birthDate ?birthPlace ?collection ?location ?movement ?nationality ?creatorMovement ?image WHERE {{
-                ?item wdt:P31 wd:Q3305213.
-                OPTIONAL {{ ?item wdt:P170 ?creator. }}
-                OPTIONAL {{ ?item wdt:P571 ?inception }}
-                OPTIONAL {{ ?item wdt:P195 ?collection }}
-                OPTIONAL {{ ?item wdt:P276 ?location }}
-                OPTIONAL {{ ?item wdt:P135 ?movement }}
-                OPTIONAL {{ ?item wdt:P18 ?image }}
-                OPTIONAL {{ ?creator wdt:P569 ?birthDate }}
-                OPTIONAL {{ ?creator wdt:P19 ?birthPlace }}
-                OPTIONAL {{ ?creator wdt:P27 ?nationality }}
-                OPTIONAL {{ ?creator wdt:P135 ?creatorMovement }}
+            PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+            SELECT ?item ?qid {" ".join("?" + v for v in variables)} WHERE {{
+                {{
+                    SELECT DISTINCT ?item ?qid WHERE {{
+                        {selection}
+                        BIND(xsd:integer(STRAFTER(STR(?item), "http://www.wikidata.org/entity/Q")) AS ?qid)
+                        FILTER(?qid > {after_qid} && ?qid < {high_qid})
+                    }}
+                    ORDER BY ?qid
+                    LIMIT {limit}
+                }}
+                {optionals}
             }}
-            LIMIT {limit} OFFSET {offset}
-            """)
-
-        results = None
-        for attempt in range(WD_RETRY):
-            try:
-                results = sparql.query().convert()
-                print(f"[WIKIDATA SUCCESS] batch offset {offset} on attempt {attempt+1}")
-                break
-            except (socket.timeout, urlerror.HTTPError, urlerror.URLError) as e:
-                wait_time = 1 * (attempt + 1) 
-                print(f"[WIKIDATA RETRY {attempt+1}] {e} - waiting {wait_time}s")
-                import time
-                time.sleep(wait_time)
-            except Exception as e:
-                print(f"[WIKIDATA ERROR] {e}")
-                break
-        if results is None:
-            print(f"[WIKIDATA FAIL] skipping batch offset {offset}")
-            continue
+            """
 
-        batch = results.get("results", {}).get("bindings", [])
-        if not batch:
-            break  # no more data
-        all_bindings.extend(batch)
-
-    if not all_bindings:
-        print("[WIKIDATA FAIL] No results; returning empty list")
-        return []
-
-    item_uris = set()
-    creator_uris = set()
-    place_uris = set()
-    movement_uris = set()
-    creator_movement_uris = set()
-    nationality_uris = set()
-    for item in all_bindings:
-        item_uri = item.get("item", {}).get("value")
-        creator_uri = item.get("creator", {}).get("value")
-        birth_place_uri = item.get("birthPlace", {}).get("value")
-        collection_uri = item.get("collection", {}).get("value")
-        location_uri = item.get("location", {}).get("value")
-        movement_uri = item.get("movement", {}).get("value")
-        creator_movement_uri = item.get("creatorMovement", {}).get("value")
-        nationality_uri = item.get("nationality", {}).get("value")
-        if item_uri:
-            item_uris.add(item_uri)
-        if creator_uri:
-            creator_uris.add(creator_uri)
-        if birth_place_uri:
-            place_uris.add(birth_place_uri)
-        if collection_uri:
-            place_uris.add(collection_uri)
-        if location_uri:
-            place_uris.add(location_uri)
-        if movement_uri:
-            movement_uris.add(movement_uri)
-        if creator_movement_uri:
-            creator_movement_uris.add(creator_movement_uri)
-        if nationality_uri:
-            nationality_uris.add(nationality_uri)
-
-    print(f"[WIKIDATA] fetched {len(item_uris)} items, {len(creator_uris)} creators")
-    
-    # Fetch labels for all URIs in batch
-    labels = {}
-    all_uris = item_uris | creator_uris | place_uris | movement_uris | creator_movement_uris | nationality_uris
-    
-    if all_uris:
-        # Split into batches of 500 URIs to avoid query size limits
-        uri_list = list(all_uris)
-        batch_size = 500
-        
-        for batch_start in range(0, len(uri_list), batch_size):
-            batch_uris = uri_list[batch_start:batch_start + batch_size]
-            uri_values = " ".join([f"<{uri}>" for uri in batch_uris])
-            
-            try:
-                label_client = _make_wikidata_client()
-                label_client.setQuery(f"""
-                    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                    SELECT ?uri ?label WHERE {{
-                        VALUES ?uri {{ {uri_values} }}
-                        ?uri rdfs:label ?label.
-                        FILTER(lang(?label) = "en")
-                    }}
-                """)
-                label_result = label_client.query().convert()
-                
-                for binding in label_result["results"]["bindings"]:
-                    uri = binding["uri"]["value"]
-                    label_val = binding["label"]["value"]
-                    if len(label_val) < 50 and uri not in labels:
-                        labels[uri] = label_val
-                
-                print(f"[LABEL FETCH] Batch {batch_start//batch_size + 1}: fetched {len(label_result['results']['bindings'])} labels")
-                
-            except Exception as e:
-                print(f"[LABEL FETCH] Batch failed: {e}")
-                import time
-                time.sleep(1)
-    
-    g = Graph()
-    g.bind("ex", EX)
-    triple_count = 0
-    batch_size = 50
+def _query_wikidata_with_retry(query: str, tag: str, what: str):
+    for attempt in range(WD_RETRY):
+        try:
+            results = query_wikidata(query)
+            print(f"[{tag} SUCCESS] {what} on attempt {attempt+1}")
+            return results
+        except requests.RequestException as e:
+            wait_time = 1 * (attempt + 1)
+            print(f"[{tag} RETRY {attempt+1}] {e} - waiting {wait_time}s")
+            time.sleep(wait_time)
+        except Exception as e:
+            print(f"[{tag} ERROR] {e}")
+            break
+    return None
+
+def iter_partitioned_windows(selection: str, variables, limit: int = 10, total: int | None = 100,
+                             tag: str = "WIKIDATA", partitions=None, failed: list | None = None):
+    """
+    Yield windows (lists of bindings) of the items matching `selection` (a graph
+    pattern on ?item), each window one keyset page of `limit` items. Without a
+    cap (total=None), QID partitions are fetched in parallel into one bounded
+    queue and windows are emitted as soon as any partition has one, so a slow
+    partition never holds back the others. With a cap, partitions are walked
+    one after the other in QID order, so the `total` items kept are the ones
+    with the lowest QIDs, the same on every run. Partitions are disjoint and
+    pages never overlap, so every item URI - with all its rows - appears in
+    exactly one window. The (low, high) range of every partition that stopped
+    on a failed query is appended to `failed`.
+    """
+    partitions = partitions or _qid_partitions()
+    stop = threading.Event()
+
+    def pages(low, high):
+        after = low - 1
+        while not stop.is_set():
+            query = _keyset_page_query(selection, variables, after, high, limit)
+            results = _query_wikidata_with_retry(query, tag, f"Q{after + 1}..Q{high}")
+            if results is None:
+                print(f"[{tag} FAIL] stopping partition Q{low}..Q{high} at Q{after}")
+                if failed is not None:
+                    failed.append((low, high))
+                return
+            bindings = results.get("results", {}).get("bindings", [])
+            if not bindings:
+                return
+            qids = {int(b["qid"]["value"]) for b in bindings}
+            yield bindings
+            after = max(qids)
+            if len(qids) < limit:
+                return
+
+    emitted = 0
+    if total is not None:
+        try:
+            for low, high in partitions:
+                for window in pages(low, high):
+                    qids = {b["item"]["value"]: int(b["qid"]["value"]) for b in window}
+                    if emitted + len(qids) > total:
+                        keep = set(sorted(qids, key=qids.get)[:total - emitted])
+                        window = [b for b in window if b["item"]["value"] in keep]
+                        qids = keep
+                    emitted += len(qids)
+                    yield window
+                    if emitted >= total:
+                        return
+        finally:
+            print(f"[{tag}] fetched the {emitted} lowest QID items")
+        return
+
+    windows = queue.Queue(maxsize=WD_WINDOW_QUEUE_SIZE)
+
+    def walk(index):
+        try:
+            for bindings in pages(*partitions[index]):
+                if not put_until_stopped(windows, bindings, stop):
+                    return
+        finally:
+            put_until_stopped(windows, DONE, stop)
+
+    pool = ThreadPoolExecutor(max_workers=WD_PAGE_WORKERS)
+    for index in range(len(partitions)):
+        pool.submit(walk, index)
+
+    running = len(partitions)
+    try:
+        while running:
+            window = windows.get()
+            if window is DONE:
+                running -= 1
+                continue
+            emitted += len({b["item"]["value"] for b in window})
+            yield window
+    finally:
+        stop.set()
+        pool.shutdown(wait=True)
+        print(f"[{tag}] fetched {emitted} items from {len(partitions)} QID partitions")
+
+def _label_stage(tag: str):
+    """Stage: window -> (window, labels of every entity it references)"""
+    def resolve_window_labels(window):
+        uris = {b[field]["value"] for b in window for field in LABELLED_FIELDS if field in b}
+        return window, resolve_labels(uris, tag=tag)
+    return resolve_window_labels
+
+def _binding_values(item, labels):
+    """Labelled values of one result row"""
+    item_uri = item.get("item", {}).get("value")
+    creator_uri = item.get("creator", {}).get("value")
+    date_raw = item.get("inception", {}).get("value")
+    birthDate_raw = item.get("birthDate", {}).get("value")
+    birthPlace_uri = item.get("birthPlace", {}).get("value")
+    collection_uri = item.get("collection", {}).get("value")
+    location_uri = item.get("location", {}).get("value")
+    movement_uri = item.get("movement", {}).get("value")
+    creator_movement_uri = item.get("creatorMovement", {}).get("value")
+    nationality_uri = item.get("nationality", {}).get("value")
+
+    return {
+        "item_uri": item_uri,
+        "title": labels.get(item_uri, "Unknown"),
+        "author": labels.get(creator_uri, "Necunoscut") if creator_uri else "Necunoscut",
+        "image_url": item.get("image", {}).get("value"),
+        "date": date_raw.split("T")[0] if date_raw else None,
+        "birthDate": birthDate_raw.split("T")[0] if birthDate_raw else None,
+        "birthPlace": labels.get(birthPlace_uri) if birthPlace_uri else None,
+        "museum": labels.get(collection_uri) or labels.get(location_uri) if (collection_uri or location_uri) else None,
+        "movement": labels.get(movement_uri) if movement_uri else None,
+        "creator_movement": labels.get(creator_movement_uri) if creator_movement_uri else None,
+        "nationality": labels.get(nationality_uri) if nationality_uri else None,
+    }
+
+def build_painting_window(labelled):
+    """Stage: (window, labels) -> (records, N-Triples writer)"""
+    from .statistics_store import statistics_writer
+
+    window, labels = labelled
+    w = statistics_writer()
 
     data = []
-    for item in all_bindings:
-        item_uri = item.get("item", {}).get("value")
-        creator_uri = item.get("creator", {}).get("value")
-        image_url = item.get("image", {}).get("value")
-        title = labels.get(item_uri, "Unknown")
-        author = labels.get(creator_uri, "Necunoscut") if creator_uri else "Necunoscut"
-        date_raw = item.get("inception", {}).get("value")
-        birthDate_raw = item.get("birthDate", {}).get("value")
-        birthPlace_uri = item.get("birthPlace", {}).get("value")
-        collection_uri = item.get("collection", {}).get("value")
-        location_uri = item.get("location", {}).get("value")
-        movement_uri = item.get("movement", {}).get("value")
-        creator_movement_uri = item.get("creatorMovement", {}).get("value")
-        nationality_uri = item.get("nationality", {}).get("value")
-
-        date = date_raw.split("T")[0] if date_raw else None
-        birthDate = birthDate_raw.split("T")[0] if birthDate_raw else None
-        birthPlace = labels.get(birthPlace_uri) if birthPlace_uri else None
-        museum = labels.get(collection_uri) or labels.get(location_uri) if (collection_uri or location_uri) else None
-        movement = labels.get(movement_uri) if movement_uri else None
-        creator_movement = labels.get(creator_movement_uri) if creator_movement_uri else None
-        nationality = labels.get(nationality_uri) if nationality_uri else None
+    for item in window:
+        v = _binding_values(item, labels)
+        title = v["title"]
+        author = v["author"]
+        date = v["date"]
+        image_url = v["image_url"]
+        museum = v["museum"]
+        movement = v["movement"]
+        birthDate = v["birthDate"]
+        birthPlace = v["birthPlace"]
+        nationality = v["nationality"]
+        creator_movement = v["creator_movement"]
 
         if title == "Unknown":
             if author and author != "Necunoscut":
                 title = f"{author} artwork" if not date else f"{author} ({date})"
             else:
-                title = item_uri.split("/")[-1] if item_uri else "Unknown_item"
+                title = v["item_uri"].split("/")[-1] if v["item_uri"] else "Unknown_item"
                 if title == "Unknown_item":
                     continue
 
-        art_uri = URIRef(EX[title.replace(" ", "_")])
-        artist_uri = URIRef(EX[author.replace(" ", "_")])
+        art_uri = EX[title.replace(" ", "_")]
+        artist_uri = EX[author.replace(" ", "_")]
+        try:
+            iri(art_uri), iri(artist_uri)
+        except ValueError as e:
+            print(f"[WIKIDATA] Skipping artwork: {str(e)[:100]}")
+            continue
 
         # Triples
-        g.add((art_uri, RDF.type, EX.Artwork))
-        triple_count += 1
+        w.start_record(art_uri)
+        w.add_iri(art_uri, RDF.type, EX.Artwork)
         if title:
-            g.add((art_uri, EX.title, Literal(title, datatype=XSD.string)))
-            triple_count += 1
-        g.add((art_uri, EX.createdBy, artist_uri))
-        triple_count += 1
-        g.add((artist_uri, RDF.type, EX.Artist))
-        triple_count += 1
-        g.add((artist_uri, EX.name, Literal(author, datatype=XSD.string)))
-        triple_count += 1
+            w.add_literal(art_uri, EX.title, title, XSD.string)
+        w.add_iri(art_uri, EX.createdBy, artist_uri)
+        w.add_iri(artist_uri, RDF.type, EX.Artist)
+        w.add_literal(artist_uri, EX.name, author, XSD.string)
         if date:
-            g.add((art_uri, EX.date, Literal(date, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(art_uri, EX.date, date, XSD.string)
         if museum:
-            g.add((art_uri, EX.museum, Literal(museum, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(art_uri, EX.museum, museum, XSD.string)
         if movement:
-            g.add((art_uri, EX.movement, Literal(movement, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(art_uri, EX.movement, movement, XSD.string)
         if image_url:
-            g.add((art_uri, EX.image, Literal(image_url, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(art_uri, EX.image, image_url, XSD.string)
         if birthDate:
-            g.add((artist_uri, EX.birthDate, Literal(birthDate, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(artist_uri, EX.birthDate, birthDate, XSD.string)
         if birthPlace:
-            g.add((artist_uri, EX.birthPlace, Literal(birthPlace, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(artist_uri, EX.birthPlace, birthPlace, XSD.string)
         if nationality:
-            g.add((artist_uri, EX.nationality, Literal(nationality, datatype=XSD.string)))
-            triple_count += 1
+            w.add_literal(artist_uri, EX.nationality, nationality, XSD.string)
         if creator_movement:
-            g.add((artist_uri, EX.movement, Literal(creator_movement, datatype=XSD.string)))
-            triple_count += 1
-
-        if triple_count >= batch_size:
-            if len(g):
-                push_graph_to_fuseki(g)
-            g = Graph()
-            g.bind("ex", EX)
-            triple_count = 0
+            w.add_literal(artist_uri, EX.movement, creator_movement, XSD.string)
 
         birthDateVal = birthDate
         birthPlaceVal = birthPlace
@@ -254,258 +316,140 @@ def get_paintings(limit: int = 10, total: int = 100):
                 "movement": creator_movement,
             }
         })
-
-    if len(g):
-        push_graph_to_fuseki(g)
-
-
-    seen = {}
-    for item in data:
-        key = (item["title"], item["date"])
-        if key not in seen:
-            item["creators"] = {item["creator"]} if item["creator"] and item["creator"] != "Necunoscut" else set()
-            item["movements"] = {item["movement"]} if item["movement"] else set()
-            item["museums"] = {item["museum"]} if item["museum"] else set()
-            item["creator_movements"] = {item["dbpedia"]["movement"]} if item["dbpedia"]["movement"] else set()
-            item["nationalities"] = {item["dbpedia"]["nationality"]} if item["dbpedia"]["nationality"] else set()
-            item["birth_dates"] = {item["dbpedia"]["birthDate"]} if item["dbpedia"]["birthDate"] else set()
-            item["birth_places"] = {item["dbpedia"]["birthPlace"]} if item["dbpedia"]["birthPlace"] else set()
-            seen[key] = item
-        else:
-            existing = seen[key]
-            if item["creator"] and item["creator"] != "Necunoscut":
-                existing["creators"].add(item["creator"])
-            if item["movement"]:
-                existing["movements"].add(item["movement"])
-            if item["museum"]:
-                existing["museums"].add(item["museum"])
-            if item["dbpedia"]["movement"]:
-                existing["creator_movements"].add(item["dbpedia"]["movement"])
-            if item["dbpedia"]["nationality"]:
-                existing["nationalities"].add(item["dbpedia"]["nationality"])
-            if item["dbpedia"]["birthDate"]:
-                existing["birth_dates"].add(item["dbpedia"]["birthDate"])
-            if item["dbpedia"]["birthPlace"]:
-                existing["birth_places"].add(item["dbpedia"]["birthPlace"])
-
-    deduped_data = list(seen.values())
-    print(f"[WIKIDATA] Deduplicated: {len(data)} raw results → {len(deduped_data)} unique artworks")
+    return data, w
+
+def _push_stage(loader=None):
+    """Stage: (records, triples) -> records, after handing the triples to the Fuseki loader (or ledger sync)"""
+    def push_window(built):
+        data, g = built
+        if loader is not None and g is not None and len(g):
+            loader.add_graph(g)
+        return data
+    return push_window
+
+def _dedupe_records(windows, key_fields, with_creators: bool, tag: str):
+    """
+    Merge the rows of each window into one record per key and emit it. Later
+    windows only need the set of keys already emitted, not the records, so a
+    key seen again in a later window is dropped.
+    """
+    emitted = set()
+    raw = 0
+    for data in windows:
+        raw += len(data)
+        seen = {}
+        for item in data:
+            key = tuple(item[field] for field in key_fields)
+            if key in emitted:
+                continue
+            if key not in seen:
+                if with_creators:
+                    item["creators"] = {item["creator"]} if item["creator"] and item["creator"] != "Necunoscut" else set()
+                item["movements"] = {item["movement"]} if item["movement"] else set()
+                item["museums"] = {item["museum"]} if item["museum"] else set()
+                item["creator_movements"] = {item["dbpedia"]["movement"]} if item["dbpedia"]["movement"] else set()
+                item["nationalities"] = {item["dbpedia"]["nationality"]} if item["dbpedia"]["nationality"] else set()
+                item["birth_dates"] = {item["dbpedia"]["birthDate"]} if item["dbpedia"]["birthDate"] else set()
+                item["birth_places"] = {item["dbpedia"]["birthPlace"]} if item["dbpedia"]["birthPlace"] else set()
+                seen[key] = item
+            else:
+                existing = seen[key]
+                if with_creators and item["creator"] and item["creator"] != "Necunoscut":
+                    existing["creators"].add(item["creator"])
+                if item["movement"]:
+                    existing["movements"].add(item["movement"])
+                if item["museum"]:
+                    existing["museums"].add(item["museum"])
+                if item["dbpedia"]["movement"]:
+                    existing["creator_movements"].add(item["dbpedia"]["movement"])
+                if item["dbpedia"]["nationality"]:
+                    existing["nationalities"].add(item["dbpedia"]["nationality"])
+                if item["dbpedia"]["birthDate"]:
+                    existing["birth_dates"].add(item["dbpedia"]["birthDate"])
+                if item["dbpedia"]["birthPlace"]:
+                    existing["birth_places"].add(item["dbpedia"]["birthPlace"])
+        emitted.update(seen)
+        yield from seen.values()
+    print(f"[{tag}] Deduplicated: {raw} raw results → {len(emitted)} unique artworks")
+
+def iter_paintings(limit: int = 10, total: int | None = 100, failed: list | None = None):
+    """
+    Stream deduplicated painting records from Wikidata, pushing their triples to
+    Fuseki on the way: fetch window → resolve labels → build triples → push →
+    dedupe, each stage in its own thread behind a bounded queue. Artworks that
+    did not change since the last import are not pushed again (import_ledger);
+    an uncapped import where every partition succeeded also deletes the
+    artworks removed from Wikidata. Failed partitions are appended to `failed`.
+    """
+    from .statistics_store import forget_graph, record_graph
+
+    failed = [] if failed is None else failed
+    loader = ImportLedgerSync("wikidata", on_loaded=record_graph, on_deleted=forget_graph, tag="WIKIDATA FUSEKI")
+    try:
+        windows = run_pipeline(
+            iter_partitioned_windows(PAINTING_SELECTION, PAINTING_VARIABLES, limit=limit, total=total,
+                                     failed=failed),
+            [_label_stage("LABEL FETCH"), build_painting_window, _push_stage(loader)],
+            name="wikidata-paintings",
+        )
+        yield from _dedupe_records(windows, ("title", "date"), with_creators=True, tag="WIKIDATA")
+    except BaseException:
+        # A failed or abandoned import never goes live
+        loader.close(discard=True)
+        raise
+    loader.complete = total is None and not failed
+    loader.close()
+
+def get_paintings(limit: int = 10, total: int | None = 100, failed: list | None = None):
+    deduped_data = list(iter_paintings(limit=limit, total=total, failed=failed))
+    if not deduped_data:
+        print("[WIKIDATA FAIL] No results; returning empty list")
     return deduped_data
 
 
-def push_graph_to_fuseki(graph: Graph):
-    update_endpoint = settings.FUSEKI_UPDATE
-    serialized = graph.serialize(format='nt')
-    data = serialized.decode("utf-8") if isinstance(serialized, bytes) else str(serialized)
+def push_graph_to_fuseki(graph: Graph, source: str = "wikidata"):
+    """Load one graph into the source's live graph and record it in the statistics store"""
+    from .statistics_store import record_graph
 
-    for attempt in range(3):
-        try:
-            sparql = SPARQLWrapper(update_endpoint)
-            sparql.setMethod(POST)
-            sparql.setQuery("""
-                INSERT DATA { %s }
-            """ % data)
-            sparql.query()
-            print(f"[FUSEKI] pushed {len(graph)} triples")
-            return
-        except Exception as e:
-            wait_time = 1 * (attempt + 1)
-            print(f"[FUSEKI RETRY {attempt+1}] {e} - waiting {wait_time}s")
-            import time
-            time.sleep(wait_time)
-
-def get_romanian_artworks(limit: int = 10, total: int = 100):
-    sparql = _make_wikidata_client()
-    all_bindings = []
-
-    for offset in range(0, total, limit):
-        sparql.setQuery(f"""
-            PREFIX wd: <http://www.wikidata.org/entity/>
-            PREFIX wdt: <http://www.wikidata.org/prop/direct/>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT ?item ?creator ?inception ?birthDate ?birthPlace ?collection ?location ?movement ?nationality ?creatorMovement ?country WHERE {{
-                ?item wdt:P31 wd:Q3305213.
-                {{
-                    ?item wdt:P17 wd:Q218.
-                }} UNION {{
-                    ?item wdt:P170 ?creator.
-                    ?creator wdt:P27 wd:Q218.
-                }}
-                OPTIONAL {{ ?item wdt:P170 ?creator. }}
-                OPTIONAL {{ ?item rdfs:label ?itemLabel. FILTER(lang(?itemLabel) = "en") }}
-                OPTIONAL {{ ?item wdt:P571 ?inception }}
-                OPTIONAL {{ ?item wdt:P195 ?collection }}
-                OPTIONAL {{ ?item wdt:P276 ?location }}
-                OPTIONAL {{ ?item wdt:P135 ?movement }}
-                OPTIONAL {{ ?item wdt:P17 ?country }}
-                OPTIONAL {{ ?creator wdt:P569 ?birthDate }}
-                OPTIONAL {{ ?creator wdt:P19 ?birthPlace }}
-                OPTIONAL {{ ?creator wdt:P27 ?nationality }}
-                OPTIONAL {{ ?creator wdt:P135 ?creatorMovement }}
-            }} LIMIT {limit} OFFSET {offset}
-            """)
-
-        results = None
-        for attempt in range(WD_RETRY):
-            try:
-                results = sparql.query().convert()
-                print(f"[WIKIDATA ROMANIAN] batch offset {offset} on attempt {attempt+1}")
-                break
-            except (socket.timeout, urlerror.HTTPError, urlerror.URLError) as e:
-                wait_time = 1 * (attempt + 1)
-                print(f"[WIKIDATA ROMANIAN RETRY {attempt+1}] {e} - waiting {wait_time}s")
-                import time
-                time.sleep(wait_time)
-            except Exception as e:
-                print(f"[WIKIDATA ROMANIAN ERROR] {e}")
-                break
-
-        if results:
-            all_bindings.extend(results["results"]["bindings"])
-
-    item_uris = set()
-    creator_uris = set()
-    place_uris = set()
-    movement_uris = set()
-    creator_movement_uris = set()
-    nationality_uris = set()
-    
-    for item in all_bindings:
-        item_uri = item.get("item", {}).get("value")
-        creator_uri = item.get("creator", {}).get("value")
-        birth_place_uri = item.get("birthPlace", {}).get("value")
-        collection_uri = item.get("collection", {}).get("value")
-        location_uri = item.get("location", {}).get("value")
-        movement_uri = item.get("movement", {}).get("value")
-        creator_movement_uri = item.get("creatorMovement", {}).get("value")
-        nationality_uri = item.get("nationality", {}).get("value")
-        if item_uri:
-            item_uris.add(item_uri)
-        if creator_uri:
-            creator_uris.add(creator_uri)
-        if birth_place_uri:
-            place_uris.add(birth_place_uri)
-        if collection_uri:
-            place_uris.add(collection_uri)
-        if location_uri:
-            place_uris.add(location_uri)
-        if movement_uri:
-            movement_uris.add(movement_uri)
-        if creator_movement_uri:
-            creator_movement_uris.add(creator_movement_uri)
-        if nationality_uri:
-            nationality_uris.add(nationality_uri)
-
-    print(f"[WIKIDATA ROMANIAN] fetched {len(item_uris)} items, {len(creator_uris)} creators")
-
-    # Fetch labels in batch
-    labels = {}
-    all_uris = item_uris | creator_uris | place_uris | movement_uris | creator_movement_uris | nationality_uris
-    
-    if all_uris:
-        # Split into batches of 500 URIs to avoid query size limits
-        uri_list = list(all_uris)
-        batch_size = 500
-        
-        for batch_start in range(0, len(uri_list), batch_size):
-            batch_uris = uri_list[batch_start:batch_start + batch_size]
-            uri_values = " ".join([f"<{uri}>" for uri in batch_uris])
-            
-            try:
-                label_client = _make_wikidata_client()
-                label_client.setQuery(f"""
-                    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-                    SELECT ?uri ?label WHERE {{
-                        VALUES ?uri {{ {uri_values} }}
-                        ?uri rdfs:label ?label.
-                        FILTER(lang(?label) = "en")
-                    }}
-                """)
-                label_result = label_client.query().convert()
-                
-                for binding in label_result["results"]["bindings"]:
-                    uri = binding["uri"]["value"]
-                    label_val = binding["label"]["value"]
-                    if len(label_val) < 50 and uri not in labels:
-                        labels[uri] = label_val
-                
-                print(f"[LABEL FETCH ROMANIAN] Batch {batch_start//batch_size + 1}: fetched {len(label_result['results']['bindings'])} labels")
-                
-            except Exception as e:
-                print(f"[LABEL FETCH ROMANIAN] Batch failed: {e}")
-                import time
-                time.sleep(1)
+    return load_graph(graph, on_loaded=record_graph, tag="FUSEKI", graph=live_graph(source))
 
+def build_romanian_window(labelled):
+    """Stage: (window, labels) -> (records, None); Romanian records are not pushed here"""
+    window, labels = labelled
     data = []
-    for item in all_bindings:
-        item_uri = item.get("item", {}).get("value")
-        creator_uri = item.get("creator", {}).get("value")
-        title = labels.get(item_uri, "Unknown")
-        author = labels.get(creator_uri, "Necunoscut") if creator_uri else "Necunoscut"
-        date_raw = item.get("inception", {}).get("value")
-        birthDate_raw = item.get("birthDate", {}).get("value")
-        birthPlace_uri = item.get("birthPlace", {}).get("value")
-        collection_uri = item.get("collection", {}).get("value")
-        location_uri = item.get("location", {}).get("value")
-        movement_uri = item.get("movement", {}).get("value")
-        creator_movement_uri = item.get("creatorMovement", {}).get("value")
-        nationality_uri = item.get("nationality", {}).get("value")
-
-        date = date_raw.split("T")[0] if date_raw else None
-        birthDate = birthDate_raw.split("T")[0] if birthDate_raw else None
-        birthPlace = labels.get(birthPlace_uri) if birthPlace_uri else None
-        museum = labels.get(collection_uri) or labels.get(location_uri) if (collection_uri or location_uri) else None
-        movement = labels.get(movement_uri) if movement_uri else None
-        creator_movement = labels.get(creator_movement_uri) if creator_movement_uri else None
-        nationality = labels.get(nationality_uri) if nationality_uri else None
-
+    for item in window:
+        v = _binding_values(item, labels)
         data.append({
-            "title": title,
-            "creator": author,
-            "date": date,
-            "museum": museum,
-            "movement": movement,
+            "title": v["title"],
+            "creator": v["author"],
+            "date": v["date"],
+            "museum": v["museum"],
+            "movement": v["movement"],
             "dbpedia": {
-                "birthDate": birthDate,
-                "birthPlace": birthPlace,
-                "nationality": nationality,
-                "movement": creator_movement,
+                "birthDate": v["birthDate"],
+                "birthPlace": v["birthPlace"],
+                "nationality": v["nationality"],
+                "movement": v["creator_movement"],
             }
         })
-
-    seen = {}
-    for item in data:
-        key = (item["title"], item["creator"], item["date"])
-        if key not in seen:
-            item["movements"] = {item["movement"]} if item["movement"] else set()
-            item["museums"] = {item["museum"]} if item["museum"] else set()
-            item["creator_movements"] = {item["dbpedia"]["movement"]} if item["dbpedia"]["movement"] else set()
-            item["nationalities"] = {item["dbpedia"]["nationality"]} if item["dbpedia"]["nationality"] else set()
-            item["birth_dates"] = {item["dbpedia"]["birthDate"]} if item["dbpedia"]["birthDate"] else set()
-            item["birth_places"] = {item["dbpedia"]["birthPlace"]} if item["dbpedia"]["birthPlace"] else set()
-            seen[key] = item
-        else:
-            existing = seen[key]
-            if item["movement"]:
-                existing["movements"].add(item["movement"])
-            if item["museum"]:
-                existing["museums"].add(item["museum"])
-            if item["dbpedia"]["movement"]:
-                existing["creator_movements"].add(item["dbpedia"]["movement"])
-            if item["dbpedia"]["nationality"]:
-                existing["nationalities"].add(item["dbpedia"]["nationality"])
-            if item["dbpedia"]["birthDate"]:
-                existing["birth_dates"].add(item["dbpedia"]["birthDate"])
-            if item["dbpedia"]["birthPlace"]:
-                existing["birth_places"].add(item["dbpedia"]["birthPlace"])
-
-    deduped_data = list(seen.values())
-    return deduped_data
-
-
-def query_fuseki(sparql_query: str):
-    """Generic Fuseki query function"""
-    sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
-    sparql.setQuery(sparql_query)
-    sparql.setReturnFormat(JSON)
-    return sparql.query().convert()
\ No newline at end of file
+    return data, None
+
+def iter_romanian_artworks(limit: int = 10, total: int | None = 100):
+    """Same stages as iter_paintings, for paintings from Romania or by Romanian artists"""
+    windows = run_pipeline(
+        iter_partitioned_windows(ROMANIAN_SELECTION, ROMANIAN_VARIABLES, limit=limit, total=total,
+                                 tag="WIKIDATA ROMANIAN"),
+        [_label_stage("LABEL FETCH ROMANIAN"), build_romanian_window, _push_stage()],
+        name="wikidata-romanian",
+    )
+    yield from _dedupe_records(windows, ("title", "creator", "date"), with_creators=False, tag="WIKIDATA ROMANIAN")
+
+def get_romanian_artworks(limit: int = 10, total: int | None = 100):
+    return list(iter_romanian_artworks(limit=limit, total=total))
+
+
+def query_fuseki(sparql_query: str, default_graphs=None):
+    """Query what readers see: the active generation of every source (generations.read_graphs)"""
+    if default_graphs is None:
+        default_graphs = read_graphs()
+    return http_client.query(settings.FUSEKI_ENDPOINT, sparql_query, default_graphs=default_graphs)
\ No newline at end of file
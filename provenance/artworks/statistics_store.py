@@ -0,0 +1,316 @@
+from collections import Counter
+from django.db import transaction
+from rdflib import Graph
+from rdflib.namespace import RDF
+from .models import StatisticsArtwork, StatisticsCounter
+from .ntriples import NTriplesWriter
+from .sparql import EX, query_fuseki
+
+TOP_LIMIT = 10
+MUSEUM_TOP_MOVEMENTS = 5
+EXCLUDED_VALUES = {"", "None"}
+
+# Same fields as the /stats/api/ SPARQL queries: ex:creator, ex:museum,
+# ex:movement and ex:date of every rdf:type ex:Artwork subject
+FACT_PREDICATES = {
+    EX.creator: "creators",
+    EX.museum: "museums",
+    EX.movement: "movements",
+    EX.date: "dates",
+}
+
+
+def _century(date):
+    if len(date) >= 4 and date[:4].isdigit():
+        return f"{int(date[:4]) // 100 * 100}s"
+    return None
+
+
+def _empty_facts():
+    return {field: set() for field in FACT_PREDICATES.values()}
+
+
+def statistics_writer():
+    """NTriplesWriter that indexes what facts_from_graph reads"""
+    return NTriplesWriter(index=FACT_PREDICATES)
+
+
+def facts_from_graph(graph: Graph | NTriplesWriter):
+    """Collect the counted facts of every artwork in an rdflib graph or a statistics_writer()"""
+    facts = {}
+    for art in graph.subjects(RDF.type, EX.Artwork):
+        item = facts.setdefault(str(art), _empty_facts())
+        for predicate, field in FACT_PREDICATES.items():
+            for value in graph.objects(art, predicate):
+                item[field].add(str(value))
+    return facts
+
+
+def record_artworks(facts):
+    """Merge artwork facts into the store and bump the counters by the new values only.
+
+    Facts are unioned with what was already recorded for the same IRI, so
+    pushing the same triples again (INSERT DATA is idempotent in Fuseki) does
+    not count them twice.
+    """
+    if not facts:
+        return
+
+    deltas = Counter()
+    with transaction.atomic():
+        existing = {
+            a.iri: a for a in StatisticsArtwork.objects.select_for_update().filter(iri__in=list(facts))
+        }
+        to_create = []
+        to_update = []
+
+        for iri, item in facts.items():
+            row = existing.get(iri)
+            if row is None:
+                row = StatisticsArtwork(iri=iri)
+                to_create.append(row)
+                deltas[("total", "", "")] += 1
+                old = _empty_facts()
+            else:
+                to_update.append(row)
+                old = {field: set(getattr(row, field)) for field in FACT_PREDICATES.values()}
+
+            new = {field: item.get(field, set()) - old[field] for field in old}
+            for creator in new["creators"]:
+                deltas[("creator", creator, "")] += 1
+            for museum in new["museums"] - EXCLUDED_VALUES:
+                deltas[("museum", museum, "")] += 1
+            for movement in new["movements"] - EXCLUDED_VALUES:
+                deltas[("movement", movement, "")] += 1
+            for date in new["dates"]:
+                century = _century(date)
+                if century:
+                    deltas[("century", century, "")] += 1
+
+            # (museum, movement) pairs that did not exist before for this artwork
+            all_museums = (old["museums"] | new["museums"]) - EXCLUDED_VALUES
+            all_movements = (old["movements"] | new["movements"]) - EXCLUDED_VALUES
+            for museum in all_museums:
+                for movement in all_movements:
+                    if museum not in old["museums"] or movement not in old["movements"]:
+                        deltas[("museum_movement", museum, movement)] += 1
+
+            for field in old:
+                setattr(row, field, sorted(old[field] | new[field]))
+
+        StatisticsArtwork.objects.bulk_create(to_create)
+        StatisticsArtwork.objects.bulk_update(to_update, list(FACT_PREDICATES.values()))
+        _apply_counter_deltas(deltas)
+
+
+def forget_artworks(facts, dropped=()):
+    """Take removed facts out of the store and decrement the counters they had bumped.
+
+    `facts` maps artwork IRIs to the values that were deleted, `dropped` are
+    artworks whose rdf:type line was deleted: they leave the store (and the
+    total) with all their values.
+    """
+    dropped = set(dropped)
+    iris = set(facts) | dropped
+    if not iris:
+        return
+
+    deltas = Counter()
+    with transaction.atomic():
+        rows = StatisticsArtwork.objects.select_for_update().filter(iri__in=list(iris))
+        to_delete = []
+        to_update = []
+
+        for row in rows:
+            old = {field: set(getattr(row, field)) for field in FACT_PREDICATES.values()}
+            if row.iri in dropped:
+                deltas[("total", "", "")] -= 1
+                to_delete.append(row.pk)
+                gone = old
+            else:
+                to_update.append(row)
+                gone = {field: old[field] & facts[row.iri].get(field, set()) for field in old}
+            left = {field: old[field] - gone[field] for field in old}
+
+            for creator in gone["creators"]:
+                deltas[("creator", creator, "")] -= 1
+            for museum in gone["museums"] - EXCLUDED_VALUES:
+                deltas[("museum", museum, "")] -= 1
+            for movement in gone["movements"] - EXCLUDED_VALUES:
+                deltas[("movement", movement, "")] -= 1
+            for date in gone["dates"]:
+                century = _century(date)
+                if century:
+                    deltas[("century", century, "")] -= 1
+
+            # (museum, movement) pairs the artwork no longer has
+            for museum in old["museums"] - EXCLUDED_VALUES:
+                for movement in old["movements"] - EXCLUDED_VALUES:
+                    if museum not in left["museums"] or movement not in left["movements"]:
+                        deltas[("museum_movement", museum, movement)] -= 1
+
+            for field in old:
+                setattr(row, field, sorted(left[field]))
+
+        StatisticsArtwork.objects.filter(pk__in=to_delete).delete()
+        StatisticsArtwork.objects.bulk_update(to_update, list(FACT_PREDICATES.values()))
+        _apply_counter_deltas(deltas)
+
+
+def _apply_counter_deltas(deltas):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    counters = {}
+    for kind in {kind for kind, _, _ in deltas}:
+        keys = [key for k, key, _ in deltas if k == kind]
+        for counter in StatisticsCounter.objects.select_for_update().filter(kind=kind, key__in=keys):
+            counters[(counter.kind, counter.key, counter.subkey)] = counter
+
+    to_create = []
+    to_update = []
+    for (kind, key, subkey), delta in deltas.items():
+        counter = counters.get((kind, key, subkey))
+        if counter is None:
+            to_create.append(StatisticsCounter(kind=kind, key=key, subkey=subkey, count=delta))
+        else:
+            counter.count += delta
+            to_update.append(counter)
+
+    StatisticsCounter.objects.bulk_create(to_create)
+    StatisticsCounter.objects.bulk_update(to_update, ["count"])
+
+
+def record_graph(graph: Graph | NTriplesWriter):
+    """Update the statistics store with a graph that was just pushed to Fuseki.
+
+    Errors are only logged - the store can always be rebuilt with
+    `manage.py rebuild_statistics`.
+    """
+    try:
+        record_artworks(facts_from_graph(graph))
+    except Exception as e:
+        print(f"[STATS ERROR] Could not update statistics store: {e}")
+
+
+def forget_graph(lines):
+    """Update the statistics store after N-Triples `lines` were deleted from Fuseki.
+
+    Errors are only logged, like in record_graph.
+    """
+    try:
+        graph = Graph().parse(data=b"".join(lines).decode("utf-8"), format="nt")
+        dropped = {str(art) for art in graph.subjects(RDF.type, EX.Artwork)}
+        facts = {}
+        for predicate, field in FACT_PREDICATES.items():
+            for art, value in graph.subject_objects(predicate):
+                facts.setdefault(str(art), _empty_facts())[field].add(str(value))
+        forget_artworks(facts, dropped)
+    except Exception as e:
+        print(f"[STATS ERROR] Could not update statistics store: {e}")
+
+
+def clear():
+    with transaction.atomic():
+        StatisticsCounter.objects.all().delete()
+        StatisticsArtwork.objects.all().delete()
+
+
+def _fuseki_facts(graphs=None, iris=None):
+    """Facts of the artworks in `graphs` (default: what readers see), only of `iris` if given"""
+    values = "VALUES ?art { %s }" % " ".join(f"<{a}>" for a in iris) if iris is not None else ""
+    results = query_fuseki("""
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?art ?field ?value WHERE {
+            %s
+            ?art rdf:type ex:Artwork .
+            OPTIONAL {
+                VALUES (?p ?field) {
+                    (ex:creator "creators") (ex:museum "museums")
+                    (ex:movement "movements") (ex:date "dates")
+                }
+                ?art ?p ?value .
+            }
+        }
+    """ % values, graphs)
+
+    facts = {}
+    for b in results["results"]["bindings"]:
+        item = facts.setdefault(b["art"]["value"], _empty_facts())
+        if "field" in b and "value" in b:
+            item[b["field"]["value"]].add(b["value"]["value"])
+    return facts
+
+
+def refresh_graph_artworks(graph: str, batch_size: int = 500):
+    """
+    Recount the artworks of one graph (the generation a full import replaced)
+    from what readers see now: the ones gone from every live graph leave the
+    store, the others keep only their live values.
+    """
+    iris = list(_fuseki_facts([graph]))
+    for start in range(0, len(iris), batch_size):
+        batch = iris[start:start + batch_size]
+        live = _fuseki_facts(iris=batch)
+        forget_artworks({}, dropped=batch)
+        record_artworks(live)
+    print(f"[STATS] Recounted {len(iris)} artworks of <{graph}>")
+    return len(iris)
+
+
+def rebuild_from_fuseki(batch_size: int = 5000):
+    """Recompute the whole store from what is currently in Fuseki"""
+    facts = _fuseki_facts()
+    clear()
+    iris = list(facts)
+    for start in range(0, len(iris), batch_size):
+        record_artworks({iri: facts[iri] for iri in iris[start:start + batch_size]})
+    print(f"[STATS] Rebuilt statistics store from {len(iris)} artworks")
+    return len(iris)
+
+
+def _top(kind, label, limit=TOP_LIMIT):
+    counters = StatisticsCounter.objects.filter(kind=kind, count__gt=0).order_by("-count", "key")
+    if limit:
+        counters = counters[:limit]
+    return [{label: c.key, "count": c.count} for c in counters]
+
+
+def get_statistics():
+    """Statistics in the /stats/api/ format, or None if the store was never filled"""
+    total = StatisticsCounter.objects.filter(kind="total").first()
+    if total is None:
+        return None
+
+    centuries = StatisticsCounter.objects.filter(kind="century", count__gt=0)
+    by_century = sorted(
+        ({"century": c.key, "count": c.count} for c in centuries),
+        key=lambda c: int(c["century"][:-1]),
+    )
+
+    movements_by_museum = {}
+    pairs = StatisticsCounter.objects.filter(kind="museum_movement", count__gt=0).order_by(
+        "-count", "subkey"
+    )
+    for pair in pairs:
+        movements = movements_by_museum.setdefault(pair.key, [])
+        if len(movements) < MUSEUM_TOP_MOVEMENTS:
+            movements.append({"movement": pair.subkey, "movement_count": pair.count})
+
+    return {
+        "total_artworks": total.count,
+        "top_creators": _top("creator", "creator"),
+        "top_museums": _top("museum", "museum"),
+        "top_movements": _top("movement", "movement"),
+        "by_century": by_century,
+        "museum_breakdown": [
+            {
+                "museum": museum["museum"],
+                "total_artworks": museum["count"],
+                "top_movements": movements_by_museum.get(museum["museum"], []),
+            }
+            for museum in _top("museum", "museum", limit=None)
+        ],
+    }
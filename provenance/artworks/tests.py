@@ -1,3 +1,1552 @@
+import json
+import threading
+import xml.etree.ElementTree as ET
+from unittest import mock
+
+from django.core.cache import cache
 from django.test import TestCase
+from rdflib import Graph
+import requests
+
+
+SAMPLE_GRAPH = """
+@prefix ex: <http://example.org/ontology/> .
+
+ex:Venus_of_Urbino a ex:Artwork ;
+    ex:title "Venus of Urbino" ;
+    ex:creator "Titian" ;
+    ex:date "1538-01-01" ;
+    ex:museum "Uffizi Gallery", "Palazzo Pitti", "Vasari Corridor" ;
+    ex:movement "High Renaissance", "Venetian school", "Mannerism" ;
+    ex:createdBy ex:Titian .
+
+ex:Titian a ex:Artist ;
+    ex:name "Titian" ;
+    ex:birthDate "1490-01-01" ;
+    ex:birthPlace "Pieve di Cadore" ;
+    ex:nationality "Republic of Venice", "Italy" .
+
+ex:Untitled a ex:Artwork ;
+    ex:title "Untitled" ;
+    ex:museum "Louvre" .
+"""
+
+# The listing query as it was before properties were fetched row by row
+CARTESIAN_LISTING_QUERY = """
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    PREFIX ex: <http://example.org/ontology/>
+    SELECT ?title ?creatorFinal ?date ?museum ?movement ?birthDate ?birthPlace ?nationality ?creatorMovement ?image WHERE {
+        ?art rdf:type ex:Artwork .
+        OPTIONAL { ?art ex:title ?title }
+        OPTIONAL { ?art ex:creator ?creator }
+        OPTIONAL { ?art ex:createdBy ?artist . ?artist ex:name ?creatorName }
+        OPTIONAL { ?artist ex:birthDate ?birthDate }
+        OPTIONAL { ?artist ex:birthPlace ?birthPlace }
+        OPTIONAL { ?artist ex:nationality ?nationality }
+        OPTIONAL { ?artist ex:movement ?creatorMovement }
+        OPTIONAL { ?art ex:date ?date }
+        OPTIONAL { ?art ex:movement ?movement }
+        OPTIONAL { ?art ex:museum ?museum }
+        OPTIONAL { ?art ex:image ?image }
+        BIND(COALESCE(?creator, ?creatorName, "Necunoscut") AS ?creatorFinal)
+    }
+"""
+
+
+def run_local_query(graph, query):
+    """Evaluate a SPARQL query with rdflib and return Fuseki-style JSON results"""
+    return json.loads(graph.query(query).serialize(format="json"))
+
+
+class LocalSPARQLEndpoint:
+    """Stand-in for http_client.query that answers from an in-memory rdflib graph"""
+
+    graph = None
+    row_counts = []
+    # rdflib's SPARQL parser is not thread-safe
+    lock = threading.Lock()
+
+    @classmethod
+    def query(cls, endpoint, query, **kwargs):
+        with cls.lock:
+            results = run_local_query(cls.graph, query)
+            LocalSPARQLEndpoint.row_counts.append(len(results["results"]["bindings"]))
+        return results
+
+
+class ArtworksApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.graph = Graph()
+        self.graph.parse(data=SAMPLE_GRAPH, format="turtle")
+        LocalSPARQLEndpoint.graph = self.graph
+        LocalSPARQLEndpoint.row_counts = []
+        patcher = mock.patch("artworks.http_client.query", LocalSPARQLEndpoint.query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_listing_rows_grow_linearly_with_property_values(self):
+        before = len(run_local_query(self.graph, CARTESIAN_LISTING_QUERY)["results"]["bindings"])
+
+        response = self.client.get("/api/", {"per_page": 10})
+        self.assertEqual(response.status_code, 200)
+        # row_counts = [count query, page query, property rows]
+        after = LocalSPARQLEndpoint.row_counts[-1]
+
+        # 3 museums x 3 movements x 2 nationalities for Venus, and 2 rows for
+        # Untitled, which picks up Titian's nationalities through the unbound ?artist
+        self.assertEqual(before, 20)
+        # 10 artwork values + 5 artist values for Venus, 3 values for Untitled
+        self.assertEqual(after, 18)
+
+        # Doubling one multi-valued property adds rows instead of multiplying them
+        self.graph.parse(
+            data='@prefix ex: <http://example.org/ontology/> . '
+            'ex:Venus_of_Urbino ex:museum "M4", "M5", "M6" .',
+            format="turtle",
+        )
+        before = len(run_local_query(self.graph, CARTESIAN_LISTING_QUERY)["results"]["bindings"])
+        cache.clear()
+        self.client.get("/api/", {"per_page": 10})
+        self.assertEqual(before, 38)
+        self.assertEqual(LocalSPARQLEndpoint.row_counts[-1], 21)
+
+    def test_listing_merges_properties_by_artwork(self):
+        data = self.client.get("/api/", {"per_page": 10}).json()
+
+        self.assertEqual(data["total"], 2)
+        untitled, venus = data["items"]
+        self.assertEqual(venus["title"], "Venus of Urbino")
+        self.assertEqual(venus["creators"], ["Titian"])
+        self.assertEqual(venus["museums"], ["Palazzo Pitti", "Uffizi Gallery", "Vasari Corridor"])
+        self.assertEqual(venus["movements"], ["High Renaissance", "Mannerism", "Venetian school"])
+        self.assertEqual(venus["nationalities"], ["Italy", "Republic of Venice"])
+        self.assertEqual(venus["dbpedia"]["birthPlace"], "Pieve di Cadore")
+        # Artist details are never borrowed from another artwork's artist
+        self.assertEqual(untitled["creator"], "Necunoscut")
+        self.assertNotIn("dbpedia", untitled)
+
+    def test_listing_pages_are_cut_in_sparql(self):
+        first = self.client.get("/api/", {"per_page": 1, "page": 1}).json()
+        second = self.client.get("/api/", {"per_page": 1, "page": 2}).json()
+
+        self.assertEqual(first["total_pages"], 2)
+        self.assertEqual([i["title"] for i in first["items"]], ["Untitled"])
+        self.assertEqual([i["title"] for i in second["items"]], ["Venus of Urbino"])
+        # The total is counted once and reused for the next page
+        self.assertEqual(len(LocalSPARQLEndpoint.row_counts), 5)
+
+    def test_cursor_resumes_after_last_key(self):
+        self.graph.parse(
+            data='@prefix ex: <http://example.org/ontology/> . '
+            'ex:Annunciation a ex:Artwork ; ex:title "Annunciation" ; ex:date "1472" .',
+            format="turtle",
+        )
+        seen = []
+        params = {"per_page": 2, "sort": "date"}
+        while True:
+            data = self.client.get("/api/", params).json()
+            seen.extend(item["title"] for item in data["items"])
+            if not data["next_cursor"]:
+                break
+            params = {"per_page": 2, "cursor": data["next_cursor"]}
+
+        # Artworks without a date sort last
+        self.assertEqual(seen, ["Annunciation", "Venus of Urbino", "Untitled"])
+        self.assertIsNone(data["page"])
+        self.assertEqual(data["sort"], "date")
+
+    def test_sort_by_title_and_invalid_parameters(self):
+        data = self.client.get("/api/", {"sort": "title", "per_page": 1}).json()
+        self.assertEqual([i["title"] for i in data["items"]], ["Untitled"])
+        data = self.client.get("/api/", {"cursor": data["next_cursor"], "per_page": 1}).json()
+        self.assertEqual([i["title"] for i in data["items"]], ["Venus of Urbino"])
+        self.assertIsNone(data["next_cursor"])
+
+        self.assertEqual(self.client.get("/api/", {"sort": "museum"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/", {"cursor": "not-a-cursor"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/", {"per_page": "ten"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/", {"page": "2.5"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/", {"per_page": 10 ** 6}).json()["per_page"], 100)
+
+
+class RomanianHeritageApiTests(TestCase):
+    def test_only_the_romanian_graph_is_queried(self):
+        from rdflib import Dataset, URIRef
+        from .fuseki_loader import source_graph
+
+        dataset = Dataset(default_union=True)
+        dataset.graph(URIRef(source_graph("wikidata"))).parse(data=SAMPLE_GRAPH, format="turtle")
+        dataset.graph(URIRef(source_graph("romanian"))).parse(data="""
+            @prefix ex: <http://example.org/ontology/> .
+            ex:ro_0_Peisaj a ex:Artwork ;
+                ex:title "Peisaj" ;
+                ex:creator "Nicolae Grigorescu" ;
+                ex:createdBy ex:artist_NicolaeGrigorescu_0 .
+            ex:artist_NicolaeGrigorescu_0 a ex:Artist ;
+                ex:birthPlace "Pitaru" .
+        """, format="turtle")
+        LocalSPARQLEndpoint.graph = dataset
+        with mock.patch("artworks.http_client.query", LocalSPARQLEndpoint.query):
+            response = self.client.get("/romanian/api/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([(a["title"], a["creator"], a["birth_places"]) for a in response.json()],
+                         [("Peisaj", "Nicolae Grigorescu", ["Pitaru"])])
+
+
+class StatisticsApiTests(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.parse(data=SAMPLE_GRAPH, format="turtle")
+        LocalSPARQLEndpoint.graph = self.graph
+        LocalSPARQLEndpoint.row_counts = []
+        patcher = mock.patch("artworks.http_client.query", LocalSPARQLEndpoint.query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_museum_breakdown_uses_one_grouped_query(self):
+        data = self.client.get("/stats/api/").json()
+
+        self.assertEqual(data["total_artworks"], 2)
+        self.assertEqual(data["top_creators"], [{"creator": "Titian", "count": 1}])
+        breakdown = {m["museum"]: m for m in data["museum_breakdown"]}
+        self.assertEqual(set(breakdown), {"Uffizi Gallery", "Palazzo Pitti", "Vasari Corridor", "Louvre"})
+        self.assertEqual(
+            [m["movement"] for m in breakdown["Uffizi Gallery"]["top_movements"]],
+            ["High Renaissance", "Mannerism", "Venetian school"],
+        )
+        self.assertEqual(breakdown["Louvre"]["top_movements"], [])
+        # A fixed number of queries, whatever the number of museums
+        self.assertEqual(len(LocalSPARQLEndpoint.row_counts), 7)
+
+    def test_store_matches_live_statistics_and_ignores_repeated_pushes(self):
+        from .statistics_store import record_graph
+
+        live = self.client.get("/stats/api/", {"source": "live"}).json()
+        record_graph(self.graph)
+        record_graph(self.graph)
+        queries_before = len(LocalSPARQLEndpoint.row_counts)
+        stored = self.client.get("/stats/api/").json()
+
+        self.assertEqual(len(LocalSPARQLEndpoint.row_counts), queries_before)
+        self.assertEqual(stored["total_artworks"], live["total_artworks"])
+        self.assertEqual(stored["top_creators"], live["top_creators"])
+        self.assertEqual(stored["by_century"], live["by_century"])
+        self.assertEqual(
+            sorted(stored["top_museums"], key=lambda m: m["museum"]),
+            sorted(live["top_museums"], key=lambda m: m["museum"]),
+        )
+        self.assertEqual(
+            {m["museum"]: m["top_movements"] for m in stored["museum_breakdown"]},
+            {m["museum"]: m["top_movements"] for m in live["museum_breakdown"]},
+        )
+
+    def test_store_rebuild_from_fuseki(self):
+        from .statistics_store import rebuild_from_fuseki, record_graph
+
+        extra = Graph()
+        extra.parse(
+            data='@prefix ex: <http://example.org/ontology/> . '
+            'ex:Untitled a ex:Artwork ; ex:movement "Cubism" .',
+            format="turtle",
+        )
+        record_graph(extra)
+
+        with mock.patch(
+            "artworks.statistics_store.query_fuseki",
+            lambda query, graphs=None: run_local_query(self.graph, query),
+        ):
+            self.assertEqual(rebuild_from_fuseki(), 2)
+
+        stats = self.client.get("/stats/api/").json()
+        self.assertNotIn("Cubism", [m["movement"] for m in stats["top_movements"]])
+        self.assertEqual(stats["total_artworks"], 2)
+
+
+class GettyStatisticsApiTests(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.graph.parse(data=SAMPLE_GRAPH, format="turtle")
+        LocalSPARQLEndpoint.graph = self.graph
+        patcher = mock.patch("artworks.http_client.query", LocalSPARQLEndpoint.query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_the_local_cache_is_read(self):
+        from .models import GettyAAT, GettyULAN
+
+        GettyULAN.objects.create(name="Titian", ulan_id="500031075", ulan_url="http://vocab.getty.edu/page/ulan/500031075")
+        GettyAAT.objects.create(term="Mannerism", aat_id="300021140", aat_url="http://vocab.getty.edu/page/aat/300021140")
+        GettyAAT.objects.create(term="Venetian school", aat_id=None)
+
+        with mock.patch("artworks.getty_enrichment.queue_getty_lookups") as queue_lookups, \
+                mock.patch("artworks.getty_enrichment._query_getty_sparql") as getty_sparql:
+            data = self.client.get("/getty/stats/api/").json()
+
+        getty_sparql.assert_not_called()
+        self.assertEqual([a["artist"] for a in data["top_getty_artists"]], ["Titian"])
+        self.assertEqual([m["movement"] for m in data["top_getty_movements"]], ["Mannerism"])
+        self.assertEqual(data["pending_getty_movements"], 1)
+        self.assertEqual(data["pending_getty_artists"], 0)
+        queue_lookups.assert_any_call(["High Renaissance"], "aat")
+
+
+class GettyBulkResolutionTests(TestCase):
+    def setUp(self):
+        from .getty_enrichment import ENRICHMENT_MEMO
+
+        ENRICHMENT_MEMO.clear()
+
+    def test_resolve_ulan_many_batches_names_and_caches_misses(self):
+        from . import getty_enrichment
+        from .models import GettyULAN
+
+        queries = []
+
+        def fake_getty(query):
+            queries.append(query)
+            return {"results": {"bindings": [{
+                "literal": {"type": "literal", "value": "Picasso, Pablo", "xml:lang": "en"},
+                "subject": {"type": "uri", "value": "http://vocab.getty.edu/ulan/500009666"},
+                "label": {"type": "literal", "value": "Picasso, Pablo"},
+            }]}}
+
+        names = ["Pablo Picasso", "Nobody Known"] + [f"Artist {i}" for i in range(250)]
+        with mock.patch.object(getty_enrichment, "_query_getty_sparql", fake_getty):
+            resolved = getty_enrichment.resolve_ulan_many(names)
+            # Everything is cached now, misses included
+            self.assertEqual(getty_enrichment.resolve_ulan_many(names), {})
+
+        self.assertEqual(len(queries), 2)
+        self.assertIn('VALUES ?literal', queries[0])
+        self.assertNotIn("regex", queries[0])
+        self.assertEqual(resolved["Pablo Picasso"], "500009666")
+        self.assertIsNone(resolved["Nobody Known"])
+        self.assertEqual(GettyULAN.objects.count(), len(names))
+        self.assertEqual(
+            getty_enrichment.get_getty_enrichment("Pablo Picasso", "ulan")["ulan_url"],
+            "http://vocab.getty.edu/page/ulan/500009666",
+        )
+
+
+GETTY_DUMP = """\
+<http://vocab.getty.edu/ulan/500009666> <http://www.w3.org/2004/02/skos/core#prefLabel> "Picasso, Pablo"@en .
+<http://vocab.getty.edu/ulan/500009666> <http://www.w3.org/2004/02/skos/core#altLabel> "Pablo Ruiz Picasso" .
+<http://vocab.getty.edu/ulan/500009666> <http://www.w3.org/2004/02/skos/core#prefLabel> "Picasso, Pablo"@es .
+<http://vocab.getty.edu/ulan/500031075> <http://www.w3.org/2004/02/skos/core#prefLabel> "Tiziano Vecellio"@en .
+<http://vocab.getty.edu/ulan/500031075> <http://www.w3.org/2004/02/skos/core#altLabel> "Titian"@en .
+<http://vocab.getty.edu/ulan/500031075> <http://vocab.getty.edu/ontology#displayOrder> "1" .
+<http://vocab.getty.edu/ulan/500115588> <http://www.w3.org/2004/02/skos/core#prefLabel> "Br\\u00E2ncu\\u0219i, Constantin"@en .
+"""
+
+
+class GettyIndexTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from .getty_enrichment import ENRICHMENT_MEMO
+
+        ENRICHMENT_MEMO.clear()
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dump_path = f"{tmp.name}/ulan.nt"
+        self.index_path = f"{tmp.name}/getty_index.sqlite3"
+        with open(self.dump_path, "w", encoding="utf-8") as f:
+            f.write(GETTY_DUMP)
+
+    def test_names_resolve_from_the_local_index_without_network(self):
+        from django.core.management import call_command
+        from django.test import override_settings
+        from . import getty_enrichment
+
+        with override_settings(GETTY_INDEX_PATH=self.index_path):
+            call_command("build_getty_index", ulan=self.dump_path, stdout=mock.Mock())
+            with mock.patch.object(getty_enrichment, "_query_getty_sparql") as getty_sparql:
+                picasso = getty_enrichment.get_getty_enrichment("Pablo Picasso", "ulan")
+                titian = getty_enrichment.get_getty_enrichment("titian", "ulan")
+                brancusi = getty_enrichment.resolve_ulan_many(["Constantin Brancusi"])
+            getty_sparql.assert_not_called()
+
+        self.assertEqual(picasso["ulan_id"], "500009666")
+        self.assertEqual(picasso["preferred_label"], "Picasso, Pablo")
+        self.assertEqual(titian["preferred_label"], "Tiziano Vecellio")
+        self.assertEqual(brancusi, {"Constantin Brancusi": "500115588"})
+
+
+class EnrichmentMemoTests(TestCase):
+    def setUp(self):
+        from .dbpedia import AUTHOR_MEMO
+        from .getty_enrichment import ENRICHMENT_MEMO
+
+        ENRICHMENT_MEMO.clear()
+        AUTHOR_MEMO.clear()
+
+    def test_repeated_getty_lookups_skip_the_database(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .getty_enrichment import ENRICHMENT_MEMO, get_getty_enrichment
+        from .models import GettyAAT
+
+        GettyAAT.objects.create(term="Cubism", aat_id="300021495", aat_url="http://vocab.getty.edu/page/aat/300021495")
+        GettyAAT.objects.create(term="Nothing", aat_id=None)
+
+        self.assertEqual(get_getty_enrichment("Cubism", "aat")["aat_id"], "300021495")
+        self.assertIsNone(get_getty_enrichment("Nothing", "aat"))
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(100):
+                get_getty_enrichment("Cubism", "aat")
+                get_getty_enrichment("Nothing", "aat")
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(ENRICHMENT_MEMO.stats()["hits"], 200)
+
+        # Saving the row evicts the memo entry
+        GettyAAT.objects.filter(term="Cubism").update(aat_id="1")
+        GettyAAT.objects.get(term="Cubism").save()
+        self.assertEqual(get_getty_enrichment("Cubism", "aat")["aat_id"], "1")
+
+    def test_dbpedia_failures_are_not_memoized(self):
+        from .dbpedia import get_author_details
+
+        with mock.patch("artworks.dbpedia._fetch_author_details", return_value=None) as fetch:
+            self.assertIsNone(get_author_details("Titian")["nationality"])
+            fetch.return_value = {"nationality": "Italian"}
+            self.assertEqual(get_author_details("Titian")["nationality"], "Italian")
+            self.assertEqual(get_author_details("Titian")["nationality"], "Italian")
+        self.assertEqual(fetch.call_count, 2)
+
+    def test_ttl_and_size_bounds(self):
+        from .memo import TTLCache
+
+        memo = TTLCache(maxsize=2, ttl=60)
+        memo.set("a", 1)
+        memo.set("b", None)
+        memo.get("a")
+        memo.set("c", 3)
+        self.assertEqual(memo.get("b"), (False, None))
+        self.assertEqual(memo.get("a"), (True, 1))
+
+        with mock.patch("artworks.memo.time.monotonic", return_value=10**9):
+            self.assertEqual(memo.get("a"), (False, None))
+
+
+class StaleWhileRevalidateTests(TestCase):
+    def setUp(self):
+        from .dbpedia import AUTHOR_MEMO
+
+        AUTHOR_MEMO.clear()
+
+    def _age(self, model, days, **lookup):
+        from datetime import timedelta
+        from django.utils import timezone
+
+        model.objects.filter(**lookup).update(fetched_at=timezone.now() - timedelta(days=days))
+
+    def test_stale_dbpedia_entry_is_served_and_refreshed_in_background(self):
+        from .dbpedia import get_author_details, is_author_fresh, refresh_author
+        from .models import DBpediaArtist
+
+        DBpediaArtist.objects.create(name="Titian", nationality="Italian")
+        self._age(DBpediaArtist, 400, name="Titian")
+
+        with mock.patch("artworks.dbpedia.submit_refresh") as submit, \
+             mock.patch("artworks.dbpedia._fetch_author_details") as fetch:
+            self.assertEqual(get_author_details("Titian")["nationality"], "Italian")
+            fetch.assert_not_called()
+            submit.assert_called_once_with(("dbpedia", "Titian"), refresh_author, "Titian")
+
+            fetch.return_value = {"nationality": "Venetian"}
+            refresh_author("Titian")
+
+        artist = DBpediaArtist.objects.get(name="Titian")
+        self.assertEqual(artist.nationality, "Venetian")
+        self.assertTrue(is_author_fresh(artist))
+
+    def test_jittered_ttl_is_stable_and_bounded(self):
+        from .cache_refresh import jittered_ttl
+
+        ttls = {name: jittered_ttl(name, 100).days for name in ("Titian", "Cubism", "Nicolae Grigorescu")}
+        self.assertEqual(ttls, {name: jittered_ttl(name, 100).days for name in ttls})
+        self.assertTrue(all(90 <= days <= 110 for days in ttls.values()))
+        self.assertGreater(len(set(ttls.values())), 1)
+
+    def test_refresh_ahead_renews_only_expiring_entries(self):
+        from .cache_refresh import refresh_ahead
+        from .models import DBpediaArtist, GettyULAN
+
+        GettyULAN.objects.create(name="Old", ulan_id="1")
+        GettyULAN.objects.create(name="New", ulan_id="2")
+        DBpediaArtist.objects.create(name="Old")
+        self._age(GettyULAN, 300, name="Old")
+        self._age(DBpediaArtist, 300, name="Old")
+
+        with mock.patch("artworks.enrichment_engine.enrich") as enrich:
+            counts = refresh_ahead(within_days=7)
+
+        enrich.assert_called_once_with(ulan_names=["Old"], aat_terms=[], dbpedia_names=["Old"], force=True)
+        self.assertEqual(counts, {"ulan": 1, "aat": 0, "dbpedia": 1})
+
+    def test_refresh_that_matches_nothing_keeps_a_found_entry(self):
+        from .getty_enrichment import is_cache_fresh, resolve_aat_many, resolve_ulan_many
+        from .models import GettyAAT, GettyULAN
+
+        # Found by the former regex search; exact label matching misses it
+        GettyULAN.objects.create(name="Tiziano", ulan_id="500031075", preferred_label="Titian")
+        GettyAAT.objects.create(term="Old", aat_id="300000001")
+        self._age(GettyULAN, 400, name="Tiziano")
+        self._age(GettyAAT, 400, term="Old")
+
+        with mock.patch("artworks.getty_enrichment.getty_index.is_available", return_value=False), \
+             mock.patch("artworks.getty_enrichment._query_getty_with_retry", return_value={"results": {"bindings": []}}):
+            self.assertEqual(resolve_ulan_many(["Tiziano", "Nobody"], force=True),
+                             {"Tiziano": "500031075", "Nobody": None})
+            self.assertEqual(resolve_aat_many(["Old"], force=True), {"Old": "300000001"})
+
+        row = GettyULAN.objects.get(name="Tiziano")
+        self.assertEqual((row.ulan_id, row.preferred_label), ("500031075", "Titian"))
+        self.assertTrue(is_cache_fresh(row))
+        self.assertEqual(GettyAAT.objects.get(term="Old").aat_id, "300000001")
+        self.assertIsNone(GettyULAN.objects.get(name="Nobody").ulan_id)
+
+
+class EnrichmentEngineTests(TestCase):
+    def test_names_are_resolved_concurrently_within_host_limits(self):
+        import threading
+        import time
+        from .enrichment_engine import enrich
+        from .models import DBpediaArtist, GettyAAT, GettyULAN, WikidataArtist
+
+        active = {}
+        peak = {}
+        lock = threading.Lock()
+
+        def upstream(host, result):
+            def call(*args):
+                with lock:
+                    active[host] = active.get(host, 0) + 1
+                    peak[host] = max(peak.get(host, 0), active[host])
+                time.sleep(0.02)
+                with lock:
+                    active[host] -= 1
+                return result(*args)
+            return call
+
+        def getty(names, vocabulary, *args):
+            return {name: (f"{vocabulary}-{name}", name) if name != "Nobody" else None for name in names}
+
+        artists = [f"Artist {i}" for i in range(40)] + ["Nobody"]
+        DBpediaArtist.objects.create(name="Artist 0", nationality="cached")
+        limits = {
+            "dbpedia.org": {"concurrency": 4, "min_interval": 0},
+            "vocab.getty.edu": {"concurrency": 2, "min_interval": 0},
+            "query.wikidata.org": {"concurrency": 3, "min_interval": 0},
+        }
+
+        with mock.patch("artworks.enrichment_engine.HOST_LIMITS", limits), \
+             mock.patch("artworks.getty_enrichment.RESOLVE_BATCH_SIZE", 10), \
+             mock.patch("artworks.getty_enrichment._resolve_many", upstream("getty", getty)), \
+             mock.patch("artworks.dbpedia._fetch_author_details", upstream("dbpedia", lambda n: {"nationality": n})), \
+             mock.patch("artworks.wikidata_artists.ARTIST_BATCH_SIZE", 2), \
+             mock.patch("artworks.wikidata_artists.fetch_batch", upstream("wikidata", lambda names: {n: {"movement": n} for n in names})):
+            started = time.monotonic()
+            enriched = enrich(ulan_names=artists, aat_terms=["Cubism"], dbpedia_names=artists, wikidata_names=artists[:6])
+            elapsed = time.monotonic() - started
+
+        self.assertEqual(peak, {"getty": 2, "dbpedia": 4, "wikidata": 3})
+        # 40 DBpedia calls, 4 at a time, instead of one after the other
+        self.assertLess(elapsed, 40 * 0.02)
+
+        self.assertEqual(len(enriched["dbpedia"]), 40)
+        self.assertNotIn("Artist 0", enriched["dbpedia"])
+        self.assertEqual(enriched["wikidata"]["Artist 5"], {"movement": "Artist 5"})
+        self.assertEqual(WikidataArtist.objects.get(name="Artist 5").movement, "Artist 5")
+        self.assertEqual(DBpediaArtist.objects.get(name="Artist 7").nationality, "Artist 7")
+        self.assertEqual(DBpediaArtist.objects.get(name="Artist 0").nationality, "cached")
+        self.assertEqual(GettyULAN.objects.count(), 41)
+        self.assertIsNone(GettyULAN.objects.get(name="Nobody").ulan_id)
+        self.assertEqual(GettyAAT.objects.get(term="Cubism").aat_id, "aat-Cubism")
+
+    def test_wikidata_artists_are_batched_and_cached(self):
+        from .enrichment_engine import enrich
+        from .models import WikidataArtist
+
+        queries = []
+
+        def wikidata(endpoint, query, **kwargs):
+            queries.append(query)
+            return {"results": {"bindings": [
+                {"label": {"value": "Nicolae Grigorescu"}, "birthDate": {"value": "1838-05-15T00:00:00Z"},
+                 "movementLabel": {"value": "Impressionism"}},
+                {"label": {"value": "Nicolae Grigorescu"}, "movementLabel": {"value": "Realism"}},
+            ]}}
+
+        creators = ["Nicolae Grigorescu", 'Pictor "necunoscut"'] + [f"Artist {i}" for i in range(448)]
+        with mock.patch("artworks.http_client.query", side_effect=wikidata):
+            enriched = enrich(wikidata_names=creators)
+            self.assertEqual(len(queries), 3)       # 450 names, 200 per VALUES query
+            self.assertIn('"Pictor \\"necunoscut\\""@en', "".join(queries))
+            self.assertEqual(enriched["wikidata"]["Nicolae Grigorescu"], {
+                "birthDate": "1838-05-15T00:00:00Z", "birthPlace": None, "nationality": None, "movement": "Impressionism",
+            })
+            self.assertEqual(WikidataArtist.objects.count(), 450)
+            self.assertIsNone(WikidataArtist.objects.get(name="Artist 7").movement)
+
+            queries.clear()
+            self.assertEqual(enrich(wikidata_names=creators + ["Ion Andreescu"])["wikidata"], {
+                "Ion Andreescu": {"birthDate": None, "birthPlace": None, "nationality": None, "movement": None},
+            })
+            self.assertEqual(len(queries), 1)
+            self.assertNotIn("Grigorescu", queries[0])
+
+
+class PartitionedWikidataFetchTests(TestCase):
+    def setUp(self):
+        lines = ["@prefix wd: <http://www.wikidata.org/entity/> .",
+                 "@prefix wdt: <http://www.wikidata.org/prop/direct/> .",
+                 "@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> ."]
+        self.paintings = list(range(1, 60, 3))
+        for qid in self.paintings:
+            lines.append(f'wd:Q{qid} wdt:P31 wd:Q3305213 ; rdfs:label "Painting {qid}"@en .')
+        # Several rows for one item, and an item that is not a painting
+        lines.append('wd:Q4 wdt:P170 wd:Q100, wd:Q101 ; wdt:P135 wd:Q200 .')
+        lines.append('wd:Q100 rdfs:label "Ana"@en . wd:Q101 rdfs:label "Ion"@en .')
+        lines.append('wd:Q5 wdt:P31 wd:Q5 ; rdfs:label "Someone"@en .')
+
+        graph = Graph()
+        graph.parse(data="\n".join(lines), format="turtle")
+        queries = []
+
+        class Wikidata(LocalSPARQLEndpoint):
+            pass
+
+        def query_wikidata(endpoint, query, **kwargs):
+            queries.append(query)
+            return Wikidata.query(endpoint, query)
+
+        Wikidata.graph = graph
+        self.Wikidata = Wikidata
+        self.queries = queries
+        for target, value in (
+            ("artworks.http_client.query", query_wikidata),
+            ("artworks.sparql.ImportLedgerSync", mock.MagicMock()),
+            ("artworks.sparql.WD_MAX_QID", 60),
+            ("artworks.sparql.WD_PARTITIONS", 4),
+        ):
+            patcher = mock.patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_partitions_are_walked_with_keyset_pages(self):
+        from .sparql import get_paintings
+
+        paintings = get_paintings(limit=3, total=None)
+
+        titles = sorted(p["title"] for p in paintings)
+        self.assertEqual(titles, sorted(f"Painting {qid}" for qid in self.paintings))
+        self.assertEqual(next(p for p in paintings if p["title"] == "Painting 4")["creators"], {"Ana", "Ion"})
+        self.assertFalse(any("OFFSET" in q for q in self.queries))
+
+    def test_total_caps_the_items(self):
+        from .sparql import get_paintings
+
+        paintings = get_paintings(limit=3, total=5)
+
+        # The lowest QIDs, whichever partition answers first
+        titles = {p["title"] for p in paintings}
+        self.assertEqual(titles, {f"Painting {qid}" for qid in self.paintings[:5]})
+
+    def test_a_slow_partition_does_not_hold_back_the_others(self):
+        from .sparql import PAINTING_SELECTION, PAINTING_VARIABLES, iter_partitioned_windows
+
+        released = threading.Event()
+
+        def query(query, tag, what):
+            # The first partition (Q0..Q14) answers only once a window was consumed
+            if "?qid > -1 " in query:
+                released.wait(5)
+            return LocalSPARQLEndpoint.query(None, query)
+
+        LocalSPARQLEndpoint.graph = self.Wikidata.graph
+        with mock.patch("artworks.sparql._query_wikidata_with_retry", query):
+            windows = iter_partitioned_windows(PAINTING_SELECTION, PAINTING_VARIABLES, limit=3, total=None)
+            first = next(windows)
+            released.set()
+            rest = list(windows)
+
+        self.assertGreaterEqual(min(int(b["qid"]["value"]) for b in first), 15)
+        qids = sorted({int(b["qid"]["value"]) for window in [first, *rest] for b in window})
+        self.assertEqual(qids, self.paintings)
+
+    def test_labels_are_fetched_once_and_persisted(self):
+        from .models import WikidataLabel
+        from .sparql import get_paintings
+
+        get_paintings(limit=50, total=None)
+        self.assertTrue([q for q in self.queries if "VALUES ?uri" in q])
+        self.assertEqual(WikidataLabel.objects.get(uri="http://www.wikidata.org/entity/Q100").label, "Ana")
+        # Q200 has no English label; the miss is cached as well
+        self.assertIsNone(WikidataLabel.objects.get(uri="http://www.wikidata.org/entity/Q200").label)
+
+        self.queries.clear()
+        self.assertEqual(len(get_paintings(limit=50, total=None)), len(self.paintings))
+        self.assertFalse([q for q in self.queries if "VALUES ?uri" in q])
+
+
+class PipelineTests(TestCase):
+    def test_stages_stay_within_their_queues(self):
+        from .pipeline import run_pipeline
+
+        produced = []
+
+        def source():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        ahead = []
+        for consumed, item in enumerate(run_pipeline(source(), [lambda x: x * 2, lambda x: x + 1], maxsize=2)):
+            self.assertEqual(item, consumed * 2 + 1)
+            ahead.append(len(produced) - consumed)
+        # 3 queues of 2 plus one item in each of the 3 threads
+        self.assertLessEqual(max(ahead), 3 * 2 + 3 + 1)
+
+    def test_stage_errors_reach_the_consumer(self):
+        from .pipeline import run_pipeline
+
+        def fail(x):
+            if x == 3:
+                raise ValueError("bad window")
+            return x
+
+        with self.assertRaisesMessage(ValueError, "bad window"):
+            list(run_pipeline(iter(range(10)), [fail]))
+
+
+class FusekiLoaderTests(TestCase):
+    def setUp(self):
+        import gzip
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        requests_seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                requests_seen.append((self.client_address, self.path, self.headers["Content-Type"], body))
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.endpoint = f"http://127.0.0.1:{server.server_port}/provenance/data"
+        self.requests = requests_seen
+
+    def test_graphs_are_streamed_in_gzip_chunks_over_one_connection(self):
+        from rdflib import Literal, URIRef
+        from .fuseki_loader import FusekiLoader
+
+        graphs = []
+        for i in range(20):
+            g = Graph()
+            for j in range(10):
+                g.add((URIRef(f"http://example.org/a{i}"), URIRef(f"http://example.org/p{j}"), Literal(f"value {i} {j}")))
+            graphs.append(g)
+
+        loaded = []
+        with FusekiLoader(endpoint=self.endpoint, chunk_bytes=2000, on_loaded=loaded.append) as loader:
+            for g in graphs:
+                loader.add_graph(g)
+        stats = loader.stats()
+
+        self.assertEqual(stats["triples"], 200)
+        self.assertEqual(stats["chunks"], len(self.requests))
+        self.assertGreater(len(self.requests), 1)
+        self.assertEqual(len({address for address, _, _, _ in self.requests}), 1)
+        self.assertTrue(all(path == "/provenance/data" for _, path, _, _ in self.requests))
+        self.assertTrue(all(len(body) <= 2000 for _, _, _, body in self.requests))
+
+        received = Graph()
+        for _, _, content_type, body in self.requests:
+            self.assertEqual(content_type, "application/n-triples")
+            received.parse(data=body.decode("utf-8"), format="nt")
+        self.assertEqual(len(received), 200)
+        self.assertEqual(loaded, graphs)
+
+    def test_graphs_in_a_failed_chunk_are_not_reported_loaded(self):
+        from rdflib import Literal, URIRef
+        from .fuseki_loader import FusekiLoader, RETRY_COUNT
+
+        # 54-byte lines, 4 per chunk: g1 spans the first two chunks
+        graphs = []
+        for i, size in enumerate([3, 3, 2, 2]):
+            g = Graph()
+            for j in range(size):
+                g.add((URIRef(f"http://example.org/a{i}"), URIRef(f"http://example.org/p{j}"), Literal("v")))
+            graphs.append(g)
+
+        calls = []
+
+        def gsp_post(endpoint, body, *args, **kwargs):
+            calls.append(body)
+            if len(calls) <= RETRY_COUNT:
+                raise requests.ConnectionError("refused")
+
+        loaded = []
+        with mock.patch("artworks.fuseki_loader.http_client.gsp_post", gsp_post), \
+                mock.patch("artworks.fuseki_loader.time.sleep"):
+            with FusekiLoader(endpoint=self.endpoint, chunk_bytes=216, compress=False, on_loaded=loaded.append) as loader:
+                for g in graphs:
+                    loader.add_graph(g)
+
+        self.assertEqual(len(calls), RETRY_COUNT + 2)
+        self.assertIn(b"<http://example.org/a1>", calls[0])
+        self.assertIn(b"<http://example.org/a1>", calls[-2])
+        self.assertEqual(loader.stats()["failed"], 4)
+        self.assertEqual(loaded, graphs[2:])
+
+
+class HttpClientTests(TestCase):
+    def setUp(self):
+        import time
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from . import http_client
+
+        seen = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.rfile.read(length)
+                seen.append((self.client_address, self.command))
+                if "/slow" in self.path:
+                    time.sleep(0.5)
+                body = json.dumps({"results": {"bindings": []}}).encode("utf-8")
+                self.send_response(503 if "/unavailable" in self.path else 200)
+                self.send_header("Content-Type", "application/sparql-results+json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(http_client.close_all)
+        self.endpoint = f"http://127.0.0.1:{server.server_port}/provenance/query"
+        self.seen = seen
+
+    def test_queries_share_one_kept_alive_connection(self):
+        from . import http_client
+
+        for _ in range(5):
+            http_client.query(self.endpoint, "SELECT * WHERE { ?s ?p ?o } LIMIT 1")
+        http_client.query(self.endpoint, "SELECT * WHERE { ?s ?p ?o } # " + "x" * http_client.MAX_GET_QUERY_LENGTH)
+
+        self.assertEqual([method for _, method in self.seen], ["GET"] * 5 + ["POST"])
+        self.assertEqual(len({address for address, _ in self.seen}), 1)
+        self.assertIs(http_client.session_for(self.endpoint), http_client.session_for(self.endpoint.replace("query", "data")))
+
+    def test_sessions_are_per_origin_and_recreated_after_close_all(self):
+        from . import http_client
+
+        session = http_client.session_for(self.endpoint)
+        self.assertIsNot(session, http_client.session_for("http://localhost:1/provenance/query"))
+        self.assertEqual(session.headers["User-Agent"], http_client.USER_AGENT)
+
+        http_client.close_all()
+        self.assertIsNot(http_client.session_for(self.endpoint), session)
+
+    def test_pool_and_timeouts_come_from_settings(self):
+        from . import http_client
+
+        with self.settings(HTTP_POOL_SIZE=3, HTTP_CONNECT_TIMEOUT=2, HTTP_READ_TIMEOUT=7):
+            adapter = http_client.session_for(self.endpoint).get_adapter(self.endpoint)
+            self.assertEqual(adapter._pool_maxsize, 3)
+            self.assertEqual(http_client._timeout(None), (2, 7))
+            # A number is the read timeout, a tuple is used as given
+            self.assertEqual(http_client._timeout(30), (2, 30))
+            self.assertEqual(http_client._timeout((1, 4)), (1, 4))
+
+        with self.settings(HTTP_READ_TIMEOUT=0.1):
+            with self.assertRaises(requests.exceptions.ReadTimeout):
+                http_client.query(self.endpoint + "/slow", "ASK {}")
+
+    def test_errors_are_raised_without_retrying(self):
+        from . import http_client
+
+        adapter = http_client.session_for(self.endpoint).get_adapter(self.endpoint)
+        self.assertEqual(adapter.max_retries.total, 0)
+        with self.assertRaises(requests.HTTPError):
+            http_client.query(self.endpoint + "/unavailable", "ASK {}")
+        with self.assertRaises(requests.ConnectionError):
+            http_client.get("http://127.0.0.1:1/")
+        # Retrying is left to the callers (_query_wikidata_with_retry, FusekiLoader)
+        self.assertEqual(len(self.seen), 1)
+
+
+class NTriplesWriterTests(TestCase):
+    def test_output_matches_rdflib_and_feeds_the_statistics(self):
+        from rdflib import Literal, URIRef
+        from rdflib.namespace import RDF, XSD
+        from .ntriples import NTriplesWriter
+        from .sparql import EX
+        from .statistics_store import facts_from_graph, statistics_writer
+
+        values = ['plain', 'quote " and \\ backslash', 'line\nbreak\r', 'tab\tand é ț ✓', '', None]
+        triples = []
+        for i, value in enumerate(values):
+            art = EX[f"art_{i}"]
+            triples += [
+                (art, RDF.type, EX.Artwork, False, None),
+                (art, EX.title, value, True, XSD.string),
+                (art, EX.museum, value, True, None),
+                (art, EX.hasULAN, f"http://vocab.getty.edu/page/ulan/{i}", False, None),
+            ]
+
+        g = Graph()
+        w = statistics_writer()
+        for s, p, o, is_literal, datatype in triples * 2:
+            if is_literal:
+                g.add((URIRef(s), p, Literal(o, datatype=datatype)))
+                w.add_literal(s, p, o, datatype)
+            else:
+                g.add((URIRef(s), p, URIRef(o)))
+                w.add_iri(s, p, o)
+
+        expected = g.serialize(format="nt").encode("utf-8")
+        self.assertEqual(len(w), len(g))
+        self.assertEqual(sorted(w.getvalue().splitlines()), sorted(expected.splitlines()))
+        self.assertEqual(facts_from_graph(w), facts_from_graph(g))
+
+        with self.assertRaises(ValueError):
+            NTriplesWriter().add_iri(EX['bad "title"'], RDF.type, EX.Artwork)
+
+
+class ImportLedgerTests(TestCase):
+    def setUp(self):
+        import gzip
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs, urlsplit
+
+        received = []
+        graphs = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                url = urlsplit(self.path)
+                if url.path.endswith("/update"):
+                    body = parse_qs(body.decode("utf-8"))["update"][0].encode("utf-8")
+                else:
+                    graphs.append(parse_qs(url.query).get("graph"))
+                received.append((url.path.rsplit("/", 1)[-1], body))
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        base = f"http://127.0.0.1:{server.server_port}/provenance"
+        overrides = self.settings(FUSEKI_DATA=f"{base}/data", FUSEKI_UPDATE=f"{base}/update",
+                                  FUSEKI_STAGED_IMPORTS=False)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.received = received
+        self.graphs = graphs
+
+    def _import(self, museums):
+        from rdflib.namespace import RDF
+        from .import_ledger import ImportLedgerSync
+        from .sparql import EX
+        from .statistics_store import statistics_writer
+
+        w = statistics_writer()
+        for i, museum in enumerate(museums):
+            art = EX[f"ro_{i}"]
+            w.start_record(art)
+            w.add_iri(art, RDF.type, EX.Artwork)
+            w.add_literal(art, EX.museum, museum)
+            w.add_iri(art, EX.createdBy, EX.Shared_Artist)
+            w.add_iri(EX.Shared_Artist, RDF.type, EX.Artist)
+        self.received.clear()
+        sync = ImportLedgerSync("test")
+        sync.add_graph(w)
+        return sync.close()
+
+    def test_reimports_send_only_changed_artworks(self):
+        first = self._import(["Muzeul A", "Muzeul B", "Muzeul C"])
+        self.assertEqual((first["new"], first["triples"]), (3, 10))
+
+        unchanged = self._import(["Muzeul A", "Muzeul B", "Muzeul C"])
+        self.assertEqual(unchanged["unchanged"], 3)
+        self.assertEqual(self.received, [])
+
+        changed = self._import(["Muzeul A", "Muzeul Nou", "Muzeul C"])
+        self.assertEqual((changed["unchanged"], changed["changed"], changed["triples"]), (2, 1, 1))
+        (delete_path, delete_body), (data_path, data_body) = self.received
+        self.assertEqual(delete_path, "update")
+        self.assertTrue(delete_body.startswith(b"DELETE DATA { GRAPH <http://example.org/graph/test> {"))
+        self.assertIn(b'<http://example.org/ontology/ro_1> <http://example.org/ontology/museum> "Muzeul B"', delete_body)
+        self.assertEqual(data_path, "data")
+        self.assertEqual(set(map(tuple, self.graphs)), {("http://example.org/graph/test",)})
+        self.assertEqual(data_body, b'<http://example.org/ontology/ro_1> <http://example.org/ontology/museum> "Muzeul Nou" .\n')
+
+    def _romanian_import(self, artworks, complete=False):
+        from .import_ledger import ImportLedgerSync
+        from .import_romanian import _romanian_batch_triples
+        from .statistics_store import forget_graph, record_graph
+
+        with mock.patch("artworks.import_romanian.enrich"), \
+                mock.patch("artworks.import_romanian.get_getty_enrichment", return_value=None):
+            w = _romanian_batch_triples(artworks, 0, skip_wikidata=True)
+        self.received.clear()
+        with ImportLedgerSync("romanian", on_loaded=record_graph, on_deleted=forget_graph,
+                              complete=complete) as sync:
+            sync.add_graph(w)
+        return w, sync.counts
+
+    def test_a_complete_import_deletes_the_records_removed_upstream(self):
+        from .models import ImportLedger
+        from .statistics_store import get_statistics
+
+        grigorescu = {"id": "RO-1", "title": "Car cu boi", "creator": "Nicolae Grigorescu", "museum": "Muzeul A"}
+        aman = {"id": "RO-2", "title": "Hora", "creator": "Theodor Aman", "museum": "Muzeul B"}
+        self._romanian_import([grigorescu, aman])
+
+        # A partial import (a limit) says nothing about the records it did not read
+        _, counts = self._romanian_import([grigorescu])
+        self.assertEqual((counts["gone"], self.received), (0, []))
+
+        _, counts = self._romanian_import([grigorescu], complete=True)
+        self.assertEqual((counts["unchanged"], counts["gone"]), (1, 1))
+        (delete_path, delete_body), = self.received
+        self.assertEqual(delete_path, "update")
+        self.assertIn(b"<http://example.org/ontology/ro_RO-2_Hora> ", delete_body)
+        self.assertIn(b"<http://example.org/ontology/artist_TheodorAman_RO-2> ", delete_body)
+        self.assertNotIn(b"RO-1", delete_body)
+        self.assertEqual(list(ImportLedger.objects.values_list("record_id", flat=True)), ["RO-1"])
+
+        stats = get_statistics()
+        self.assertEqual(stats["total_artworks"], 1)
+        self.assertEqual(stats["top_museums"], [{"museum": "Muzeul A", "count": 1}])
+        self.assertNotIn("Theodor Aman", [c["creator"] for c in stats["top_creators"]])
+
+    def test_romanian_records_are_keyed_on_the_lido_record_id(self):
+        from .models import ImportLedger
+        from .statistics_store import get_statistics
+
+        grigorescu = {"id": "RO-1", "title": "Car cu boi", "creator": "Nicolae Grigorescu", "museum": "Muzeul A"}
+        aman = {"id": "RO-2", "title": "Hora", "creator": "Theodor Aman", "museum": "Muzeul A"}
+        first, _ = self._romanian_import([grigorescu, aman])
+        self.assertEqual(set(first.records()), {"RO-1", "RO-2"})
+        self.assertEqual(get_statistics()["top_museums"], [{"museum": "Muzeul A", "count": 2}])
+
+        # A record inserted upstream does not shift the others
+        inserted = {"id": "RO-0", "title": "Nou", "creator": "Ion Andreescu"}
+        _, counts = self._romanian_import([inserted, grigorescu, aman])
+        self.assertEqual((counts["new"], counts["unchanged"], counts["changed"]), (1, 2, 0))
+
+        # A new creator replaces the record's own artist node and its values
+        self._romanian_import([inserted, {**grigorescu, "creator": "Stefan Luchian", "museum": "Muzeul B"}, aman])
+        delete_body = self.received[0][1]
+        self.assertIn(b"<http://example.org/ontology/artist_NicolaeGrigorescu_RO-1> ", delete_body)
+        self.assertIn(b'"Muzeul A"', delete_body)
+        self.assertNotIn(b"artist_TheodorAman_RO-2", delete_body)
+        self.assertEqual(ImportLedger.objects.get(source="romanian", record_id="RO-1").subjects.split(), [
+            "http://example.org/ontology/ro_RO-1_Carcuboi", "http://example.org/ontology/artist_StefanLuchian_RO-1",
+        ])
+
+        stats = get_statistics()
+        self.assertEqual(stats["total_artworks"], 3)
+        self.assertEqual(stats["top_museums"], [{"museum": "Muzeul A", "count": 1}, {"museum": "Muzeul B", "count": 1}])
+        self.assertNotIn("Nicolae Grigorescu", [c["creator"] for c in stats["top_creators"]])
+
+        # A new title is a new artwork IRI: the old one leaves the store
+        self._romanian_import([inserted, {**grigorescu, "creator": "Stefan Luchian", "museum": "Muzeul B"},
+                               {**aman, "title": "Hora (schita)"}])
+        stats = get_statistics()
+        self.assertEqual(stats["total_artworks"], 3)
+        self.assertEqual(stats["top_museums"], [{"museum": "Muzeul A", "count": 1}, {"museum": "Muzeul B", "count": 1}])
+
+
+def legacy_extract_lido_record(lido_item):
+    """The find() chains lido.LIDO_FIELDS replaced, the reference for the compiled extractor"""
+    ns = {"lido": "http://www.lido-schema.org"}
+
+    def first(parent, *paths):
+        for path in paths:
+            elem = parent.find(path, ns) if parent is not None else None
+            if elem is not None and elem.text:
+                return elem.text
+        return None
+
+    artwork = {}
+    rec_id = lido_item.find("lido:lidoRecID", ns)
+    if rec_id is not None:
+        artwork["id"] = rec_id.text
+
+    desc = lido_item.find("lido:descriptiveMetadata", ns)
+    if desc is not None:
+        title = first(desc, ".//lido:objectNameWrap/lido:objectName/lido:appellationValue",
+                      ".//lido:titleWrap/lido:titleSet/lido:appellationValue")
+        if not title:
+            note = first(desc, ".//lido:objectDescriptionWrap/lido:objectDescription/lido:descriptiveNoteValue")
+            title = note[:100] if note else first(
+                desc, ".//lido:objectClassificationWrap/lido:classificationWrap/lido:classification")
+        if title:
+            artwork["title"] = title.strip()
+        creator = first(desc, ".//lido:eventWrap/lido:eventSet/lido:event/lido:eventActor/lido:actorInRole/lido:actor/lido:nameActorSet/lido:appellationValue",
+                        ".//lido:actorInRole/lido:actor/lido:nameActorSet/lido:appellationValue")
+        if creator:
+            artwork["creator"] = creator
+        date = first(desc, ".//lido:eventWrap/lido:eventSet/lido:event/lido:eventDate/lido:displayDate")
+        if date:
+            artwork["date"] = date
+        movement = first(desc, ".//lido:styleWrap/lido:styleSet/lido:term", ".//lido:periodWrap/lido:periodSet/lido:term",
+                         ".//lido:cultureWrap/lido:cultureSet/lido:term")
+        if movement:
+            artwork["movement"] = movement.strip()
+
+    admin = lido_item.find("lido:administrativeMetadata", ns)
+    if admin is not None:
+        museum = first(admin, ".//lido:repositoryWrap/lido:repositorySet/lido:repositoryName/lido:legalBodyName/lido:appellationValue",
+                       ".//lido:repositoryName/lido:legalBodyName/lido:appellationValue",
+                       ".//lido:repositoryName/lido:appellationValue",
+                       ".//lido:recordSource/lido:legalBodyName/lido:appellationValue")
+        if museum:
+            artwork["museum"] = museum.strip()
+        size = first(admin, ".//lido:objectMeasurementsWrap/lido:objectMeasurements/lido:measurementSet/lido:measurementValue")
+        if size:
+            artwork["size"] = size
+        # Only the first resourceRepresentation is looked at
+        resource = admin.find(".//lido:resourceWrap/lido:resourceSet/lido:resourceRepresentation", ns)
+        image = first(resource, "lido:linkResource")
+        if image:
+            artwork["image_url"] = image.strip()
+
+    if artwork.get("creator"):
+        artwork.setdefault("title", f"Lucrare de {artwork['creator']}")
+        return artwork
+    return None
+
+
+class RomanianXmlStreamTests(TestCase):
+    def _peak_while_streaming(self, count):
+        import io
+        import tracemalloc
+        from .benchmarks import synthetic_lido
+        from .import_romanian import iter_romanian_xml
+
+        source = io.BytesIO(synthetic_lido(count))
+        tracemalloc.start()
+        try:
+            parsed = sum(1 for _ in iter_romanian_xml(source))
+            return parsed, tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_records_are_streamed_with_flat_memory(self):
+        import io
+        from .benchmarks import synthetic_lido
+        from .import_romanian import iter_romanian_xml, parse_romanian_xml
+
+        data = synthetic_lido(20)
+        streamed = list(iter_romanian_xml(io.BytesIO(data), limit=10))
+        self.assertEqual(streamed, parse_romanian_xml(data, limit=10))
+        self.assertEqual(len(streamed), 10)
+        self.assertEqual(streamed[0], {
+            "id": "RO-1", "title": "Peisaj 1", "creator": "Nicolae Grigorescu", "date": "1801",
+            "movement": "Impresionism", "museum": "Muzeul National de Arta 1",
+            "image_url": "http://example.org/img/1.jpg",
+        })
+
+        small_count, small_peak = self._peak_while_streaming(200)
+        large_count, large_peak = self._peak_while_streaming(4000)
+        self.assertEqual((small_count, large_count), (160, 3200))
+        self.assertLess(large_peak, small_peak * 2)
+
+    def test_parallel_parse_matches_the_streaming_parser(self):
+        import os
+        import tempfile
+        from .benchmarks import synthetic_lido
+        from .lido import iter_lido_records, iter_lido_records_parallel, record_ranges
+
+        data = b'<?xml version="1.0" encoding="UTF-8"?>\n' + synthetic_lido(300)
+        with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as f:
+            f.write(data)
+        self.addCleanup(os.remove, f.name)
+
+        _, root_close, ranges = record_ranges(data, chunk_bytes=8000)
+        self.assertEqual(root_close, b"</lido:lidoWrap>")
+        self.assertGreater(len(ranges), 2)
+        self.assertTrue(all(data[start:start + 11] == b"<lido:lido>" for start, _ in ranges))
+        self.assertEqual([end for _, end in ranges[:-1]], [start for start, _ in ranges[1:]])
+
+        serial = list(iter_lido_records(f.name))
+        self.assertEqual(len(serial), 240)
+        self.assertEqual(list(iter_lido_records_parallel(f.name, workers=2, chunk_bytes=8000)), serial)
+
+    def test_compiled_extractor_matches_the_find_chains(self):
+        import io
+        from .benchmarks import synthetic_lido
+        from .lido import extract_lido_record, iter_lido_records
+
+        tricky = b"""<lido:lidoWrap xmlns:lido="http://www.lido-schema.org">
+        <lido:lido><lido:lidoRecID/>
+          <lido:descriptiveMetadata>
+            <lido:objectNameWrap><lido:objectName><lido:appellationValue></lido:appellationValue></lido:objectName></lido:objectNameWrap>
+            <lido:titleWrap>
+              <lido:titleWrap><lido:titleSet><lido:appellationValue>Inner</lido:appellationValue></lido:titleSet></lido:titleWrap>
+              <lido:titleSet><lido:appellationValue> Outer </lido:appellationValue></lido:titleSet>
+            </lido:titleWrap>
+            <lido:actorInRole><lido:actor><lido:nameActorSet><lido:appellationValue>Fallback Actor</lido:appellationValue></lido:nameActorSet></lido:actor></lido:actorInRole>
+            <lido:styleWrap><lido:styleSet><lido:term>   </lido:term></lido:styleSet></lido:styleWrap>
+            <lido:periodWrap><lido:periodSet><lido:term>Baroc</lido:term></lido:periodSet></lido:periodWrap>
+          </lido:descriptiveMetadata>
+          <lido:descriptiveMetadata>
+            <lido:eventWrap><lido:eventSet><lido:event><lido:eventDate><lido:displayDate>ignored</lido:displayDate></lido:eventDate></lido:event></lido:eventSet></lido:eventWrap>
+          </lido:descriptiveMetadata>
+          <lido:administrativeMetadata>
+            <lido:recordSource><lido:legalBodyName><lido:appellationValue>Sursa</lido:appellationValue></lido:legalBodyName></lido:recordSource>
+            <lido:resourceWrap><lido:resourceSet>
+              <lido:resourceRepresentation/>
+              <lido:resourceRepresentation><lido:linkResource>http://example.org/second.jpg</lido:linkResource></lido:resourceRepresentation>
+            </lido:resourceSet></lido:resourceWrap>
+          </lido:administrativeMetadata>
+        </lido:lido>
+        <lido:lido><lido:lidoRecID>RO-2</lido:lidoRecID>
+          <lido:descriptiveMetadata>
+            <lido:objectDescriptionWrap><lido:objectDescription><lido:descriptiveNoteValue>""" + b"Descriere lunga " * 10 + b"""</lido:descriptiveNoteValue></lido:objectDescription></lido:objectDescriptionWrap>
+            <lido:eventWrap><lido:eventSet><lido:event>
+              <lido:eventActor><lido:actorInRole><lido:actor><lido:nameActorSet><lido:appellationValue>Theodor Aman</lido:appellationValue></lido:nameActorSet></lido:actor></lido:actorInRole></lido:eventActor>
+            </lido:event></lido:eventSet></lido:eventWrap>
+            <lido:cultureWrap><lido:cultureSet><lido:term> Romaneasca </lido:term></lido:cultureSet></lido:cultureWrap>
+          </lido:descriptiveMetadata>
+          <lido:administrativeMetadata>
+            <lido:repositoryName><lido:appellationValue> Depozit </lido:appellationValue></lido:repositoryName>
+            <lido:objectMeasurementsWrap><lido:objectMeasurements><lido:measurementSet><lido:measurementValue>40x50</lido:measurementValue></lido:measurementSet></lido:objectMeasurements></lido:objectMeasurementsWrap>
+          </lido:administrativeMetadata>
+        </lido:lido>
+        </lido:lidoWrap>"""
+
+        for data in (tricky, synthetic_lido(50)):
+            records = list(ET.fromstring(data))
+            expected = [legacy_extract_lido_record(r) for r in records]
+            self.assertEqual([extract_lido_record(r) for r in records], expected)
+            self.assertEqual(list(iter_lido_records(io.BytesIO(data))), [a for a in expected if a is not None])
+
+        first, second = [extract_lido_record(r) for r in ET.fromstring(tricky)]
+        self.assertEqual(first, {"id": None, "title": "Outer", "creator": "Fallback Actor", "movement": "", "museum": "Sursa"})
+        self.assertEqual(second["title"], ("Descriere lunga " * 7)[:100].strip())
+
+
+class DatasetCacheTests(TestCase):
+    def setUp(self):
+        import hashlib
+        import tempfile
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from . import http_client
+
+        self.body = b"".join(b"<lido:lido>%05d</lido:lido>\n" % i for i in range(500))
+        self.sha256 = hashlib.sha256(self.body).hexdigest()
+        self.cut_after = None       # bytes sent before the connection is dropped
+        requests_seen = []
+        test = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                requests_seen.append(dict(self.headers))
+                etag = '"v1"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                start = 0
+                if self.headers.get("Range") and self.headers.get("If-Range") == etag:
+                    start = int(self.headers["Range"][len("bytes="):-1])
+                payload = test.body[start:]
+                self.send_response(206 if start else 200)
+                self.send_header("ETag", etag)
+                if start:
+                    self.send_header("Content-Range", f"bytes {start}-{len(test.body) - 1}/{len(test.body)}")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if test.cut_after is not None:
+                    self.wfile.write(payload[:test.cut_after])
+                    self.wfile.flush()
+                    self.close_connection = True
+                    test.cut_after = None
+                    return
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(http_client.close_all)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.url = f"http://127.0.0.1:{server.server_port}/lido.xml"
+        self.requests_seen = requests_seen
+
+    def test_interrupted_download_is_resumed_then_revalidated(self):
+        import requests
+        from .dataset_cache import DatasetCache
+
+        cache = DatasetCache(self.directory)
+        self.cut_after = 5000
+        with mock.patch("artworks.dataset_cache.DOWNLOAD_CHUNK_BYTES", 1024):
+            with self.assertRaises(requests.RequestException):
+                cache.fetch(self.url, "lido.xml")
+            self.assertIsNone(cache.cached("lido.xml"))
+
+            resumed = cache.fetch(self.url, "lido.xml")
+        self.assertTrue(resumed.changed)
+        self.assertEqual(resumed.path.read_bytes(), self.body)
+        self.assertEqual(resumed.sha256, self.sha256)
+        self.assertEqual(self.requests_seen[1]["Range"], "bytes=4096-")
+
+        again = cache.fetch(self.url, "lido.xml")
+        self.assertFalse(again.changed)
+        self.assertEqual(again.sha256, self.sha256)
+        self.assertEqual(self.requests_seen[2]["If-None-Match"], '"v1"')
+
+    def test_import_skips_parsing_an_unchanged_dataset(self):
+        from .dataset_cache import DatasetCache
+        from . import import_romanian
+
+        cache = DatasetCache(self.directory)
+        with mock.patch("artworks.import_romanian.DatasetCache", return_value=cache), \
+                mock.patch("artworks.import_romanian._romanian_resource_url", return_value=self.url), \
+                mock.patch("artworks.import_romanian.iter_romanian_xml", return_value=iter(())) as parse, \
+                mock.patch("artworks.import_romanian.push_romanian_to_fuseki", return_value={"failed": 0}):
+            import_romanian.import_romanian_heritage(limit=10)
+            import_romanian.import_romanian_heritage(limit=10)
+            self.assertEqual(parse.call_count, 1)
+            self.assertEqual(cache.last_import(import_romanian.ROMANIAN_DATASET), {"sha256": self.sha256, "limit": 10})
+
+            import_romanian.import_romanian_heritage(limit=10, force=True)
+            self.assertEqual(parse.call_count, 2)
+
+
+class DatasetGenerationTests(TestCase):
+    """Staged imports against a small Graph Store / SPARQL server backed by an rdflib Dataset"""
+
+    def setUp(self):
+        import gzip
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        from urllib.parse import parse_qs, urlsplit
+        from rdflib import Dataset, URIRef
+        from . import http_client
+
+        dataset = Dataset(default_union=True)
+        lock = threading.Lock()
+        test = self
+        self.dataset = dataset
+        self.fail_loads = False
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self, status, body=b"", content_type="application/sparql-results+json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _handle(self, fields, body):
+                path = urlsplit(self.path).path
+                with lock:
+                    if path.endswith("/update"):
+                        dataset.update(fields["update"][0])
+                    elif path.endswith("/data"):
+                        if test.fail_loads:
+                            return self._reply(500)
+                        if self.headers.get("Content-Encoding") == "gzip":
+                            body = gzip.decompress(body)
+                        dataset.graph(URIRef(fields["graph"][0])).parse(data=body.decode("utf-8"), format="nt")
+                    else:
+                        source = dataset
+                        if "default-graph-uri" in fields:
+                            source = Graph()
+                            for graph in fields["default-graph-uri"]:
+                                source += dataset.graph(URIRef(graph))
+                        return self._reply(200, source.query(fields["query"][0]).serialize(format="json"))
+                self._reply(200)
+
+            def do_GET(self):
+                self._handle(parse_qs(urlsplit(self.path).query), b"")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                fields = parse_qs(urlsplit(self.path).query)
+                if self.headers.get("Content-Type", "").startswith("application/x-www-form-urlencoded"):
+                    fields.update(parse_qs(body.decode("utf-8")))
+                self._handle(fields, body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(http_client.close_all)
+        base = f"http://127.0.0.1:{server.server_port}/provenance"
+        overrides = self.settings(FUSEKI_ENDPOINT=f"{base}/query", FUSEKI_DATA=f"{base}/data",
+                                  FUSEKI_UPDATE=f"{base}/update", FUSEKI_STAGED_IMPORTS=True)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        patcher = mock.patch("artworks.fuseki_loader.time.sleep")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _museums(self):
+        from .sparql import query_fuseki
+
+        results = query_fuseki("""
+            PREFIX ex: <http://example.org/ontology/>
+            SELECT ?museum WHERE { ?art ex:museum ?museum }
+        """)
+        return sorted(b["museum"]["value"] for b in results["results"]["bindings"])
+
+    def _stage(self, museums):
+        from rdflib.namespace import RDF
+        from .import_ledger import ImportLedgerSync
+        from .sparql import EX
+        from .statistics_store import record_graph, statistics_writer
+
+        w = statistics_writer()
+        for i, museum in enumerate(museums):
+            art = EX[f"ro_{i}"]
+            w.start_record(art)
+            w.add_iri(art, RDF.type, EX.Artwork)
+            w.add_literal(art, EX.museum, museum)
+            w.add_iri(art, EX.createdBy, EX.Shared_Artist)
+            w.add_iri(EX.Shared_Artist, RDF.type, EX.Artist)
+        sync = ImportLedgerSync("romanian", on_loaded=record_graph)
+        sync.add_graph(w)
+        sync.loader.flush()
+        return sync
+
+    def test_imports_switch_generations_atomically(self):
+        from .generations import generation_id, read_graphs, rollback_generation
+        from .models import DatasetGeneration, ImportLedger
+
+        sync = self._stage(["Muzeul A", "Muzeul B", "Muzeul C"])
+        # Loaded, but readers do not see the staging graph yet
+        self.assertEqual(self._museums(), [])
+        first = sync.close()
+        self.assertTrue(first["published"])
+        self.assertEqual(self._museums(), ["Muzeul A", "Muzeul B", "Muzeul C"])
+        self.assertEqual(generation_id(), str(first["generation"]))
+
+        second = self._stage(["Muzeul A", "Muzeul Nou", "Muzeul C"]).close()
+        self.assertEqual((second["changed"], second["triples"], second["published"]), (1, 1, True))
+        self.assertEqual(self._museums(), ["Muzeul A", "Muzeul C", "Muzeul Nou"])
+        self.assertIn(DatasetGeneration.objects.get(pk=second["generation"]).graph, read_graphs())
+        self.assertEqual(DatasetGeneration.objects.get(pk=first["generation"]).status, "previous")
+        self.assertEqual(set(ImportLedger.objects.values_list("source", flat=True)), {"romanian"})
+
+        # A load that fails is discarded; readers and the ledger keep the live generation
+        self.fail_loads = True
+        failed = self._stage(["Muzeul X", "Muzeul Y", "Muzeul Z"]).close()
+        self.fail_loads = False
+        self.assertFalse(failed["published"])
+        self.assertEqual(DatasetGeneration.objects.get(pk=failed["generation"]).status, "discarded")
+        self.assertEqual(generation_id(), str(second["generation"]))
+        self.assertEqual(self._museums(), ["Muzeul A", "Muzeul C", "Muzeul Nou"])
+        self.assertEqual(ImportLedger.objects.count(), 3)
+
+        response = self.client.get("/stats/api/")
+        self.assertEqual(response["X-Dataset-Generation"], str(second["generation"]))
+        self.assertEqual(response.json()["total_artworks"], 3)
+
+        rollback_generation("romanian")
+        self.assertEqual(self._museums(), ["Muzeul A", "Muzeul B", "Muzeul C"])
+        self.assertEqual(generation_id(), str(first["generation"]))
+        self.assertFalse(ImportLedger.objects.exists())
+
+    def test_publishing_updates_the_statistics_without_a_rebuild(self):
+        from .import_ledger import reset_ledger
+        from .models import ImportLedger
+        from .statistics_store import get_statistics
+
+        def museums():
+            return {m["museum"]: m["count"] for m in get_statistics()["top_museums"]}
+
+        with mock.patch("artworks.statistics_store.rebuild_from_fuseki") as rebuild:
+            self._stage(["Muzeul A", "Muzeul B", "Muzeul C"]).close()
+            self.assertEqual(museums(), {"Muzeul A": 1, "Muzeul B": 1, "Muzeul C": 1})
+
+            # Only the delta reaches the store: the replaced value is taken out
+            self._stage(["Muzeul A", "Muzeul Nou", "Muzeul C"]).close()
+            self.assertEqual(museums(), {"Muzeul A": 1, "Muzeul C": 1, "Muzeul Nou": 1})
+
+            # A complete import drops the artwork it no longer has, on publish
+            sync = self._stage(["Muzeul A", "Muzeul Nou"])
+            sync.complete = True
+            self.assertEqual(sync.close()["gone"], 1)
+            self.assertEqual(museums(), {"Muzeul A": 1, "Muzeul Nou": 1})
+            self.assertEqual(self._museums(), ["Muzeul A", "Muzeul Nou"])
+            self.assertEqual(ImportLedger.objects.filter(source="romanian").count(), 2)
+
+            # A full import recounts the artworks of the generation it replaced
+            reset_ledger("romanian")
+            self._stage(["Muzeul D"]).close()
+            self.assertEqual(museums(), {"Muzeul D": 1})
+            self.assertEqual(get_statistics()["total_artworks"], 1)
+        rebuild.assert_not_called()
+
+    def test_default_graph_data_is_moved_into_a_source_graph(self):
+        from rdflib import URIRef
+        from .fuseki_loader import source_graph
+        from .generations import JENA_DEFAULT_GRAPH, adopt_default_graph, graph_size
 
+        self.dataset.graph(URIRef(JENA_DEFAULT_GRAPH)).parse(data="""
+            @prefix ex: <http://example.org/ontology/> .
+            ex:Venus a ex:Artwork ; ex:museum "Uffizi Gallery" .
+        """, format="turtle")
+        self.assertEqual(self._museums(), [])
 
+        self.assertEqual(adopt_default_graph("wikidata"), 2)
+        self.assertEqual(self._museums(), ["Uffizi Gallery"])
+        self.assertEqual(graph_size(JENA_DEFAULT_GRAPH), 0)
+        self.assertEqual(graph_size(source_graph("wikidata")), 2)
+        self.assertEqual(self.client.get("/stats/api/").json()["total_artworks"], 1)
+        self.assertEqual(adopt_default_graph("wikidata"), 0)
@@ -3,105 +3,259 @@ from django.shortcuts import render
 from django.http import JsonResponse, HttpResponse
 from .models import Artwork
 from .dbpedia import get_author_details
-from SPARQLWrapper import SPARQLWrapper, JSON
+from .statistics_store import get_statistics
+from .generations import generation_id, live_graph, read_graphs
+from .sparql import query_fuseki
+from django.core.cache import cache
+from . import http_client
+from concurrent.futures import ThreadPoolExecutor
+import base64
 import json
 
+ARTWORK_COUNT_CACHE_KEY = "artworks_api:total"
+ARTWORK_COUNT_CACHE_SECONDS = 60
+ARTWORK_MAX_PER_PAGE = 100
 
-def artworks_page(request):
-    return render(request, "artworks_list.html")
+# Every artwork and artist property is fetched as its own row and merged by
+# subject in Python. The %s placeholder binds ?art to the artworks of a page.
+ARTWORK_PROPERTIES_QUERY = """
+    PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+    PREFIX ex: <http://example.org/ontology/>
+    SELECT ?art ?field ?value WHERE {
+        %s
+        {
+            VALUES (?p ?field) {
+                (rdf:type "type") (ex:title "title") (ex:creator "creator") (ex:date "date")
+                (ex:museum "museum") (ex:movement "movement") (ex:image "image")
+            }
+            ?art ?p ?value .
+        } UNION {
+            VALUES (?p ?field) {
+                (ex:name "creatorName") (ex:birthDate "birthDate") (ex:birthPlace "birthPlace")
+                (ex:nationality "nationality") (ex:movement "creatorMovement")
+            }
+            ?art ex:createdBy ?artist .
+            ?artist ?p ?value .
+        }
+    }
+"""
 
-def artworks_api(request):
-    page = int(request.GET.get('page', 1))
-    per_page = int(request.GET.get('per_page', 50))
-    offset = (page - 1) * per_page
-    
-    # Citim din Fuseki, nu din Wikidata
-    sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
+ARTWORK_SET_FIELDS = {
+    "museum": "museums",
+    "movement": "movements",
+    "creatorMovement": "creator_movements",
+    "birthDate": "birth_dates",
+    "birthPlace": "birth_places",
+    "nationality": "nationalities",
+}
+
+
+def _merge_artwork_properties(bindings):
+    """Group (art, field, value) rows into one item per artwork IRI"""
+    merged = {}
+    for r in bindings:
+        art = r["art"]["value"]
+        field = r["field"]["value"]
+        value = r["value"]["value"]
+        
+        item = merged.get(art)
+        if item is None:
+            item = merged[art] = {
+                "titles": set(),
+                "dates": set(),
+                "images": set(),
+                "explicit_creators": set(),
+                "creator_names": set(),
+                "museums": set(),
+                "movements": set(),
+                "creator_movements": set(),
+                "birth_dates": set(),
+                "birth_places": set(),
+                "nationalities": set(),
+            }
+        
+        if not value:
+            continue
+        if field == "title":
+            item["titles"].add(value)
+        elif field == "date":
+            item["dates"].add(value)
+        elif field == "image":
+            item["images"].add(value)
+        elif field == "creator":
+            item["explicit_creators"].add(value)
+        elif field == "creatorName":
+            item["creator_names"].add(value)
+        elif field in ARTWORK_SET_FIELDS:
+            item[ARTWORK_SET_FIELDS[field]].add(value)
     
-    # First, get total count
-    sparql.setQuery("""
-        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-        PREFIX ex: <http://example.org/ontology/>
-        SELECT (COUNT(?art) as ?count) WHERE {
-            ?art rdf:type ex:Artwork .
+    deduped_dict = {}
+    for art, item in merged.items():
+        # Same precedence as COALESCE(ex:creator, artist ex:name)
+        creators = item["explicit_creators"] or item["creator_names"]
+        deduped_dict[art] = {
+            "title": min(item["titles"]) if item["titles"] else "N/A",
+            "creators": {c for c in creators if c != "Necunoscut"},
+            "date": min(item["dates"]) if item["dates"] else None,
+            "museums": item["museums"],
+            "movements": item["movements"],
+            "creator_movements": item["creator_movements"],
+            "birth_dates": item["birth_dates"],
+            "birth_places": item["birth_places"],
+            "nationalities": item["nationalities"],
+            "image_url": min(item["images"]) if item["images"] else None,
         }
-    """)
-    sparql.setReturnFormat(JSON)
-    count_results = sparql.query().convert()
-    total = int(count_results["results"]["bindings"][0].get("count", {}).get("value", 0))
-    
-    sparql.setQuery(f"""
+    return deduped_dict
+
+
+# Sort key per `sort` option: (graph pattern binding ?sortValue, key expression).
+# Titles compare case-insensitively; dates by their leading ISO part, with
+# missing or free-text dates last.
+ARTWORK_SORT_KEYS = {
+    "iri": None,
+    "title": (
+        "OPTIONAL { ?art ex:title ?sortValue }",
+        'COALESCE(LCASE(STR(?sortValue)), "")',
+    ),
+    "date": (
+        "OPTIONAL { ?art ex:date ?sortValue }",
+        'COALESCE(IF(REGEX(STR(?sortValue), "^[0-9]{4}"), SUBSTR(STR(?sortValue), 1, 10), "9999"), "9999")',
+    ),
+}
+
+
+def _sparql_string(value):
+    escaped = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+    return f'"{escaped}"'
+
+
+def _encode_cursor(sort, page_key):
+    sort_key, art = page_key
+    payload = json.dumps({"s": sort, "k": sort_key, "a": art}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        return payload["s"], (str(payload["k"]), str(payload["a"]))
+    except (KeyError, TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+
+def _artwork_page_query(sort, limit, offset=0, after=None):
+    """Select ?art (and ?sortKey) for one page, ordered by (sort key, IRI).
+
+    `after` is the (sort key, IRI) of the last artwork of the previous page;
+    the page then resumes right after it instead of skipping `offset` rows.
+    """
+    prefixes = """
         PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX ex: <http://example.org/ontology/>
-        SELECT ?title ?creatorFinal ?date ?museum ?movement ?birthDate ?birthPlace ?nationality ?creatorMovement ?image WHERE {{
+    """
+    if ARTWORK_SORT_KEYS[sort] is None:
+        keyset_filter = f"FILTER(STR(?art) > {_sparql_string(after[1])})" if after else ""
+        return prefixes + f"""
+        SELECT DISTINCT ?art WHERE {{
             ?art rdf:type ex:Artwork .
-            OPTIONAL {{ ?art ex:title ?title }}
-            OPTIONAL {{ ?art ex:creator ?creator }}
-            OPTIONAL {{ ?art ex:createdBy ?artist . ?artist ex:name ?creatorName }}
-            OPTIONAL {{ ?artist ex:birthDate ?birthDate }}
-            OPTIONAL {{ ?artist ex:birthPlace ?birthPlace }}
-            OPTIONAL {{ ?artist ex:nationality ?nationality }}
-            OPTIONAL {{ ?artist ex:movement ?creatorMovement }}
-            OPTIONAL {{ ?art ex:date ?date }}
-            OPTIONAL {{ ?art ex:movement ?movement }}
-            OPTIONAL {{ ?art ex:museum ?museum }}
-            OPTIONAL {{ ?art ex:image ?image }}
-            BIND(COALESCE(?creator, ?creatorName, "Necunoscut") AS ?creatorFinal)
+            {keyset_filter}
+        }}
+        ORDER BY STR(?art)
+        LIMIT {limit} OFFSET {offset}
+        """
+    
+    pattern, key_expression = ARTWORK_SORT_KEYS[sort]
+    keyset_filter = ""
+    if after:
+        key, art = _sparql_string(after[0]), _sparql_string(after[1])
+        keyset_filter = f"FILTER(?sortKey > {key} || (?sortKey = {key} && STR(?art) > {art}))"
+    return prefixes + f"""
+        SELECT ?art ?sortKey WHERE {{
+            {{
+                SELECT ?art (MIN(?key) AS ?sortKey) WHERE {{
+                    ?art rdf:type ex:Artwork .
+                    {pattern}
+                    BIND({key_expression} AS ?key)
+                }}
+                GROUP BY ?art
+            }}
+            {keyset_filter}
         }}
-    """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
+        ORDER BY ?sortKey STR(?art)
+        LIMIT {limit} OFFSET {offset}
+    """
 
-    deduped_dict = {}
-    for r in results["results"]["bindings"]:
-        title = r.get("title", {}).get("value") or "N/A"
-        creator = r.get("creatorFinal", {}).get("value") or "Necunoscut"
-        date = r.get("date", {}).get("value")
-        museum = r.get("museum", {}).get("value")
-        movement = r.get("movement", {}).get("value")
-        creator_movement = r.get("creatorMovement", {}).get("value")
-        birthDate = r.get("birthDate", {}).get("value")
-        birthPlace = r.get("birthPlace", {}).get("value")
-        nationality = r.get("nationality", {}).get("value")
-        image = r.get("image", {}).get("value")
-        
-        key = (title, date)
-        
-        if key not in deduped_dict:
-            deduped_dict[key] = {
-                "title": title,
-                "creators": {creator} if creator and creator != "Necunoscut" else set(),
-                "date": date,
-                "museums": {museum} if museum else set(),
-                "movements": {movement} if movement else set(),
-                "creator_movements": {creator_movement} if creator_movement else set(),
-                "birth_dates": {birthDate} if birthDate else set(),
-                "birth_places": {birthPlace} if birthPlace else set(),
-                "nationalities": {nationality} if nationality else set(),
-                "image_url": image,
+
+def artworks_page(request):
+    return render(request, "artworks_list.html")
+
+def artworks_api(request):
+    sort = request.GET.get('sort', 'iri')
+    try:
+        per_page = min(max(int(request.GET.get('per_page', 50)), 1), ARTWORK_MAX_PER_PAGE)
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return JsonResponse({"error": "page and per_page must be integers"}, status=400)
+    cursor = request.GET.get('cursor')
+    after = None
+    offset = 0
+    
+    if cursor:
+        try:
+            sort, after = _decode_cursor(cursor)
+        except ValueError:
+            return JsonResponse({"error": "Invalid cursor"}, status=400)
+        page = None
+    else:
+        offset = (page - 1) * per_page
+    
+    if sort not in ARTWORK_SORT_KEYS:
+        return JsonResponse({
+            "error": f"Invalid sort '{sort}'. Expected one of: {', '.join(ARTWORK_SORT_KEYS)}"
+        }, status=400)
+    
+    # Citim din Fuseki, nu din Wikidata
+    graphs = read_graphs()
+    # Total count of distinct artworks - computed once per dataset generation and reused across pages
+    count_key = f"{ARTWORK_COUNT_CACHE_KEY}:{generation_id()}"
+    total = cache.get(count_key)
+    if total is None:
+        count_results = query_fuseki("""
+            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+            PREFIX ex: <http://example.org/ontology/>
+            SELECT (COUNT(DISTINCT ?art) as ?count) WHERE {
+                ?art rdf:type ex:Artwork .
             }
-        else:
-            item = deduped_dict[key]
-            if creator and creator != "Necunoscut":
-                item["creators"].add(creator)
-            if museum:
-                item["museums"].add(museum)
-            if movement:
-                item["movements"].add(movement)
-            if creator_movement:
-                item["creator_movements"].add(creator_movement)
-            if birthDate:
-                item["birth_dates"].add(birthDate)
-            if birthPlace:
-                item["birth_places"].add(birthPlace)
-            if nationality:
-                item["nationalities"].add(nationality)
-            if image and not item.get("image_url"):
-                item["image_url"] = image
+        """, graphs)
+        total = int(count_results["results"]["bindings"][0].get("count", {}).get("value", 0))
+        cache.set(count_key, total, ARTWORK_COUNT_CACHE_SECONDS)
+    
+    # Pick the artworks of the page (one extra to know if there is a next one)
+    page_results = query_fuseki(
+        _artwork_page_query(sort, per_page + 1, offset=offset, after=after), graphs
+    )
+    page_keys = [
+        (b.get("sortKey", {}).get("value", ""), b["art"]["value"])
+        for b in page_results["results"]["bindings"]
+    ]
+    has_more = len(page_keys) > per_page
+    page_keys = page_keys[:per_page]
+    next_cursor = _encode_cursor(sort, page_keys[-1]) if has_more else None
+    
+    deduped_dict = {}
+    if page_keys:
+        # One row per (artwork, property, value) for the artworks of the
+        # page, so the result grows with the data instead of with the product
+        # of the multi-valued properties
+        art_values = " ".join(f"<{art}>" for _, art in page_keys)
+        results = query_fuseki(
+            ARTWORK_PROPERTIES_QUERY % f"VALUES ?art {{ {art_values} }}", graphs
+        )
+        deduped_dict = _merge_artwork_properties(results["results"]["bindings"])
     
-    deduped_list = list(deduped_dict.values())
-    total = len(deduped_list)
-    paginated_data = deduped_list[offset:offset + per_page]
+    # Keep the page in the order chosen by the page query
+    paginated_data = [deduped_dict[art] for _, art in page_keys if art in deduped_dict]
     
     data = []
     for item in paginated_data:
@@ -138,7 +292,9 @@ def artworks_api(request):
         "total": total,
         "page": page,
         "per_page": per_page,
-        "total_pages": (total + per_page - 1) // per_page
+        "total_pages": (total + per_page - 1) // per_page,
+        "sort": sort,
+        "next_cursor": next_cursor,
     })
 
 
@@ -154,10 +310,7 @@ def sparql_endpoint(request):
         return render(request, "sparql_endpoint.html")
     
     try:
-        sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
-        sparql.setQuery(query)
-        sparql.setReturnFormat(JSON)
-        results = sparql.query().convert()
+        results = query_fuseki(query)
         return JsonResponse(results, safe=False)
     except Exception as e:
         return JsonResponse({"error": str(e)}, status=500)
@@ -167,147 +320,162 @@ def statistics_page(request):
     return render(request, "statistics.html")
 
 
+STATISTICS_QUERIES = {
+    "total_artworks": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT (COUNT(DISTINCT ?art) as ?total) WHERE {
+            ?art rdf:type ex:Artwork .
+        }
+    """,
+    "top_creators": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?creator (COUNT(?art) as ?count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:creator ?creator .
+        }
+        GROUP BY ?creator
+        ORDER BY DESC(?count)
+        LIMIT 10
+    """,
+    # Excluding None/null values
+    "top_museums": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?museum (COUNT(?art) as ?count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:museum ?museum .
+            FILTER(?museum != "" && ?museum != "None")
+        }
+        GROUP BY ?museum
+        ORDER BY DESC(?count)
+        LIMIT 10
+    """,
+    "top_movements": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?movement (COUNT(?art) as ?count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:movement ?movement .
+            FILTER(?movement != "" && ?movement != "None")
+        }
+        GROUP BY ?movement
+        ORDER BY DESC(?count)
+        LIMIT 10
+    """,
+    "by_century": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
+        SELECT ?century (COUNT(?art) as ?count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:date ?date .
+            FILTER(STRLEN(STR(?date)) >= 4)
+            FILTER(REGEX(STR(?date), "^[0-9]{4}"))
+            BIND(FLOOR(xsd:integer(SUBSTR(STR(?date), 1, 4)) / 100) * 100 as ?century)
+        }
+        GROUP BY ?century
+        ORDER BY ?century
+    """,
+    "museums": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?museum (COUNT(?art) as ?count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:museum ?museum .
+            FILTER(?museum != "" && ?museum != "None")
+        }
+        GROUP BY ?museum
+        ORDER BY DESC(?count)
+    """,
+    # All (museum, movement) pairs at once - the top movements of every
+    # museum are picked in Python instead of with one query per museum
+    "museum_movements": """
+        PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
+        PREFIX ex: <http://example.org/ontology/>
+        SELECT ?museum ?movement (COUNT(?art) as ?movement_count) WHERE {
+            ?art rdf:type ex:Artwork ;
+                 ex:museum ?museum ;
+                 ex:movement ?movement .
+            FILTER(?museum != "" && ?museum != "None")
+            FILTER(?movement != "" && ?movement != "None")
+        }
+        GROUP BY ?museum ?movement
+    """,
+}
+
+MUSEUM_TOP_MOVEMENTS = 5
+
+
+def _run_statistics_query(query, graphs):
+    # The queries run on separate threads and share the pooled Fuseki connections
+    return query_fuseki(query, graphs)["results"]["bindings"]
+
+
 def statistics_api(request):
+    # Counters maintained at ingest time; ?source=live recomputes from Fuseki
+    if request.GET.get("source") != "live":
+        stats = get_statistics()
+        if stats is not None:
+            return JsonResponse(stats, safe=False)
+    
     try:
-        sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
+        graphs = read_graphs()
+        with ThreadPoolExecutor(max_workers=len(STATISTICS_QUERIES)) as executor:
+            futures = {
+                name: executor.submit(_run_statistics_query, query, graphs)
+                for name, query in STATISTICS_QUERIES.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
         
         stats = {}
         
         # 1. Total artworks
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            SELECT (COUNT(DISTINCT ?art) as ?total) WHERE {
-                ?art rdf:type ex:Artwork .
-            }
-        """)
-        sparql.setReturnFormat(JSON)
-        result = sparql.query().convert()
-        stats["total_artworks"] = int(result["results"]["bindings"][0]["total"]["value"])
+        stats["total_artworks"] = int(results["total_artworks"][0]["total"]["value"])
         
         # 2. Top 10 creators
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            SELECT ?creator (COUNT(?art) as ?count) WHERE {
-                ?art rdf:type ex:Artwork ;
-                     ex:creator ?creator .
-            }
-            GROUP BY ?creator
-            ORDER BY DESC(?count)
-            LIMIT 10
-        """)
-        result = sparql.query().convert()
         stats["top_creators"] = [
             {"creator": b["creator"]["value"], "count": int(b["count"]["value"])}
-            for b in result["results"]["bindings"]
+            for b in results["top_creators"]
         ]
         
         # 3. Top 10 museums (excluding None/null values)
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            SELECT ?museum (COUNT(?art) as ?count) WHERE {
-                ?art rdf:type ex:Artwork ;
-                     ex:museum ?museum .
-                FILTER(?museum != "" && ?museum != "None")
-            }
-            GROUP BY ?museum
-            ORDER BY DESC(?count)
-            LIMIT 10
-        """)
-        result = sparql.query().convert()
         stats["top_museums"] = [
             {"museum": b["museum"]["value"], "count": int(b["count"]["value"])}
-            for b in result["results"]["bindings"]
+            for b in results["top_museums"]
         ]
         
         # 4. Top movements (excluding None/null values)
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            SELECT ?movement (COUNT(?art) as ?count) WHERE {
-                ?art rdf:type ex:Artwork ;
-                     ex:movement ?movement .
-                FILTER(?movement != "" && ?movement != "None")
-            }
-            GROUP BY ?movement
-            ORDER BY DESC(?count)
-            LIMIT 10
-        """)
-        result = sparql.query().convert()
         stats["top_movements"] = [
             {"movement": b["movement"]["value"], "count": int(b["count"]["value"])}
-            for b in result["results"]["bindings"]
+            for b in results["top_movements"]
         ]
         
         # 5. Artworks by century
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            PREFIX xsd: <http://www.w3.org/2001/XMLSchema#>
-            SELECT ?century (COUNT(?art) as ?count) WHERE {
-                ?art rdf:type ex:Artwork ;
-                     ex:date ?date .
-                FILTER(STRLEN(STR(?date)) >= 4)
-                FILTER(REGEX(STR(?date), "^[0-9]{4}"))
-                BIND(FLOOR(xsd:integer(SUBSTR(STR(?date), 1, 4)) / 100) * 100 as ?century)
-            }
-            GROUP BY ?century
-            ORDER BY ?century
-        """)
-        result = sparql.query().convert()
         stats["by_century"] = [
             {"century": f"{b['century']['value']}s", "count": int(b["count"]["value"])}
-            for b in result["results"]["bindings"]
+            for b in results["by_century"]
         ]
         
         # 6. Museum breakdown - for each museum, count artworks and list top movements
-        sparql.setQuery("""
-            PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-            PREFIX ex: <http://example.org/ontology/>
-            SELECT ?museum (COUNT(?art) as ?count) WHERE {
-                ?art rdf:type ex:Artwork ;
-                     ex:museum ?museum .
-                FILTER(?museum != "" && ?museum != "None")
-            }
-            GROUP BY ?museum
-            ORDER BY DESC(?count)
-        """)
-        result = sparql.query().convert()
-        museums = [
-            {"museum": b["museum"]["value"], "count": int(b["count"]["value"])}
-            for b in result["results"]["bindings"]
-        ]
+        movements_by_museum = {}
+        for b in results["museum_movements"]:
+            movements_by_museum.setdefault(b["museum"]["value"], []).append(
+                {"movement": b["movement"]["value"], "movement_count": int(b["movement_count"]["value"])}
+            )
         
         museum_breakdown = []
-        for museum_data in museums:
-            museum_name = museum_data["museum"]
-            museum_total = museum_data["count"]
-            
-            sparql.setQuery(f"""
-                PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
-                PREFIX ex: <http://example.org/ontology/>
-                SELECT ?movement (COUNT(?art) as ?movement_count) WHERE {{
-                    ?art rdf:type ex:Artwork ;
-                         ex:museum "{museum_name}" ;
-                         ex:movement ?movement .
-                    FILTER(?movement != "" && ?movement != "None")
-                }}
-                GROUP BY ?movement
-                ORDER BY DESC(?movement_count)
-                LIMIT 5
-            """)
-            result = sparql.query().convert()
-            movements = [
-                {"movement": b["movement"]["value"], "movement_count": int(b["movement_count"]["value"])}
-                for b in result["results"]["bindings"]
-            ]
-            
+        for b in results["museums"]:
+            museum_name = b["museum"]["value"]
+            movements = sorted(
+                movements_by_museum.get(museum_name, []),
+                key=lambda m: (-m["movement_count"], m["movement"]),
+            )
             museum_breakdown.append({
                 "museum": museum_name,
-                "total_artworks": museum_total,
-                "top_movements": movements
+                "total_artworks": int(b["count"]["value"]),
+                "top_movements": movements[:MUSEUM_TOP_MOVEMENTS]
             })
         
         stats["museum_breakdown"] = museum_breakdown
@@ -328,15 +496,15 @@ def romanian_heritage_page(request):
 
 
 def romanian_heritage_api(request):
-    sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
-    sparql.setQuery("""
+    # Only the data.gov.ro graph is scanned, not every artwork of the dataset
+    results = http_client.query(settings.FUSEKI_ENDPOINT, """
         PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
         PREFIX ex: <http://example.org/ontology/>
-        SELECT ?title ?creator ?date ?museum ?movement ?birthDate ?birthPlace ?nationality ?creatorMovement ?image WHERE {
+        SELECT ?title ?creator ?date ?museum ?movement ?birthDate ?birthPlace ?nationality ?creatorMovement ?image
+        FROM <%s>
+        WHERE {
             ?art rdf:type ex:Artwork .
             ?art ex:creator ?creator .
-            ?art ex:heritage "true" .
-            ?art ex:source "data.gov.ro" .
             OPTIONAL { ?art ex:title ?title }
             OPTIONAL { ?art ex:date ?date }
             OPTIONAL { ?art ex:museum ?museum }
@@ -347,9 +515,7 @@ def romanian_heritage_api(request):
             OPTIONAL { ?art ex:createdBy ?artist . ?artist ex:nationality ?nationality }
             OPTIONAL { ?art ex:createdBy ?artist . ?artist ex:movement ?creatorMovement }
         }
-    """)
-    sparql.setReturnFormat(JSON)
-    results = sparql.query().convert()
+    """ % live_graph("romanian"))
 
     deduped_dict = {}
     for r in results["results"]["bindings"]:
@@ -438,22 +604,18 @@ def getty_statistics_page(request):
 
 def getty_statistics_api(request):
 
-    sparql = SPARQLWrapper(settings.FUSEKI_ENDPOINT)
-    sparql.setReturnFormat(JSON)
-    
     try:
-        sparql.setQuery("""
+        total_results = query_fuseki("""
             PREFIX rdf: <http://www.w3.org/1999/02/22-rdf-syntax-ns#>
             PREFIX ex: <http://example.org/ontology/>
             SELECT (COUNT(DISTINCT ?art) as ?count) WHERE {
                 ?art rdf:type ex:Artwork .
             }
         """)
-        total_results = sparql.query().convert()
         total_artworks = int(total_results["results"]["bindings"][0].get("count", {}).get("value", 0))
         
         # Get ALL movements and check Getty for each
-        sparql.setQuery("""
+        movements_results = query_fuseki("""
             PREFIX ex: <http://example.org/ontology/>
             SELECT ?movement (COUNT(?art) as ?count) WHERE {
                 ?art ex:movement ?movement .
@@ -462,22 +624,33 @@ def getty_statistics_api(request):
             GROUP BY ?movement
             ORDER BY DESC(?count)
         """)
-        movements_results = sparql.query().convert()
         
-        from .getty_enrichment import get_getty_enrichment
+        # Only the local Getty cache is read here; names that were never looked
+        # up are reported as pending and resolved in the background
+        from .getty_enrichment import get_cached_enrichment_many, is_cache_fresh, queue_getty_lookups
+        movement_counts = [
+            (b.get("movement", {}).get("value", ""), int(b.get("count", {}).get("value", 0)))
+            for b in movements_results["results"]["bindings"]
+        ]
+        cached_movements = get_cached_enrichment_many([m for m, _ in movement_counts], "aat")
+        
         top_movements = []
+        pending_movements = []
+        stale_movements = []
         artworks_with_getty_movements = 0
         
-        for binding in movements_results["results"]["bindings"]:
-            movement = binding.get("movement", {}).get("value", "")
-            count = int(binding.get("count", {}).get("value", 0))
-            
-            getty_data = get_getty_enrichment(movement, "aat")
-            if getty_data:
+        for movement, count in movement_counts:
+            getty_data = cached_movements.get(movement)
+            if getty_data is None:
+                pending_movements.append(movement)
+                continue
+            if not is_cache_fresh(getty_data):
+                stale_movements.append(movement)
+            if getty_data.aat_id:
                 top_movements.append({
                     "movement": movement,
-                    "aat_id": getty_data["aat_id"],
-                    "aat_url": getty_data["aat_url"],
+                    "aat_id": getty_data.aat_id,
+                    "aat_url": getty_data.aat_url,
                     "count": count
                 })
                 artworks_with_getty_movements += count
@@ -486,7 +659,7 @@ def getty_statistics_api(request):
         top_movements.sort(key=lambda x: x["count"], reverse=True)
         
         # Get ALL artists (no LIMIT) and check Getty for each
-        sparql.setQuery("""
+        artists_results = query_fuseki("""
             PREFIX ex: <http://example.org/ontology/>
             SELECT ?creator (COUNT(?art) as ?count) WHERE {
                 ?art ex:creator ?creator .
@@ -495,21 +668,29 @@ def getty_statistics_api(request):
             GROUP BY ?creator
             ORDER BY DESC(?count)
         """)
-        artists_results = sparql.query().convert()
+        artist_counts = [
+            (b.get("creator", {}).get("value", ""), int(b.get("count", {}).get("value", 0)))
+            for b in artists_results["results"]["bindings"]
+        ]
+        cached_artists = get_cached_enrichment_many([a for a, _ in artist_counts], "ulan")
         
         top_artists = []
+        pending_artists = []
+        stale_artists = []
         artworks_with_getty_artists = 0
         
-        for binding in artists_results["results"]["bindings"]:
-            artist = binding.get("creator", {}).get("value", "")
-            count = int(binding.get("count", {}).get("value", 0))
-            
-            getty_data = get_getty_enrichment(artist, "ulan")
-            if getty_data:
+        for artist, count in artist_counts:
+            getty_data = cached_artists.get(artist)
+            if getty_data is None:
+                pending_artists.append(artist)
+                continue
+            if not is_cache_fresh(getty_data):
+                stale_artists.append(artist)
+            if getty_data.ulan_id:
                 top_artists.append({
                     "artist": artist,
-                    "ulan_id": getty_data["ulan_id"],
-                    "ulan_url": getty_data["ulan_url"],
+                    "ulan_id": getty_data.ulan_id,
+                    "ulan_url": getty_data.ulan_url,
                     "count": count
                 })
                 artworks_with_getty_artists += count
@@ -517,12 +698,18 @@ def getty_statistics_api(request):
         # Sort by count descending
         top_artists.sort(key=lambda x: x["count"], reverse=True)
         
+        # Expired entries are still served, and refreshed in the background
+        queue_getty_lookups(pending_movements + stale_movements, "aat")
+        queue_getty_lookups(pending_artists + stale_artists, "ulan")
+        
         return JsonResponse({
             "total_artworks": total_artworks,
             "getty_aat_artworks": artworks_with_getty_movements,
             "getty_ulan_artists": artworks_with_getty_artists,
             "top_getty_movements": top_movements,
-            "top_getty_artists": top_artists
+            "top_getty_artists": top_artists,
+            "pending_getty_movements": len(pending_movements),
+            "pending_getty_artists": len(pending_artists)
         })
     
     except Exception as e:
@@ -0,0 +1,107 @@
+"""
+Persistent cache of Wikidata artist details (birth date and place,
+nationality, movement) keyed by the English label the importers know the
+artist by. Names that were never seen (or whose entry expired) are looked up
+in VALUES batches of ARTIST_BATCH_SIZE labels; misses are cached as well.
+"""
+from django.db import transaction
+from django.utils import timezone
+from .cache_refresh import jittered_ttl
+from .models import WikidataArtist
+from .ntriples import literal
+
+ARTIST_TTL_DAYS = 90
+ARTIST_BATCH_SIZE = 200     # labels per VALUES query
+ARTIST_FIELDS = ["birthDate", "birthPlace", "nationality", "movement"]
+DB_CHUNK = 500
+
+NO_DETAILS = dict.fromkeys(ARTIST_FIELDS)
+
+
+def _normalize(names):
+    return sorted({n for n in names if n and n.strip()})
+
+
+def fetch_batch(names, tag: str = "WIKIDATA ARTISTS"):
+    """{name: details} for one batch (misses with all fields None), or None if the query failed"""
+    from .sparql import _query_wikidata_with_retry
+
+    label_values = " ".join(f"{literal(name)}@en" for name in names)
+    results = _query_wikidata_with_retry(f"""
+        PREFIX wd: <http://www.wikidata.org/entity/>
+        PREFIX wdt: <http://www.wikidata.org/prop/direct/>
+        PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+        SELECT ?label ?birthDate ?birthPlaceLabel ?nationalityLabel ?movementLabel WHERE {{
+            VALUES ?label {{ {label_values} }}
+            ?person rdfs:label ?label .
+            ?person wdt:P31 wd:Q5 .
+            OPTIONAL {{ ?person wdt:P569 ?birthDate }}
+            OPTIONAL {{ ?person wdt:P19 ?birthPlace . ?birthPlace rdfs:label ?birthPlaceLabel . FILTER(LANG(?birthPlaceLabel) = "en") }}
+            OPTIONAL {{ ?person wdt:P27 ?nationality . ?nationality rdfs:label ?nationalityLabel . FILTER(LANG(?nationalityLabel) = "en") }}
+            OPTIONAL {{ ?person wdt:P135 ?movement . ?movement rdfs:label ?movementLabel . FILTER(LANG(?movementLabel) = "en") }}
+        }}
+    """, tag, f"{len(names)} artist labels")
+    if results is None:
+        return None
+
+    details = {name: None for name in names}
+    for binding in results["results"]["bindings"]:
+        name = binding["label"]["value"]
+        # First row per label, like the former LIMIT 1 lookups
+        if name not in details or details[name] is not None:
+            continue
+        details[name] = {
+            "birthDate": binding.get("birthDate", {}).get("value") or None,
+            "birthPlace": binding.get("birthPlaceLabel", {}).get("value") or None,
+            "nationality": binding.get("nationalityLabel", {}).get("value") or None,
+            "movement": binding.get("movementLabel", {}).get("value") or None,
+        }
+    return {name: found or dict(NO_DETAILS) for name, found in details.items()}
+
+
+def cached_artists(names):
+    """{name: WikidataArtist} for the names with a cache entry"""
+    names = list(names)
+    rows = {}
+    for start in range(0, len(names), DB_CHUNK):
+        for row in WikidataArtist.objects.filter(name__in=names[start:start + DB_CHUNK]):
+            rows[row.name] = row
+    return rows
+
+
+def is_fresh(row, now=None):
+    return row.fetched_at > (now or timezone.now()) - jittered_ttl(row.name, ARTIST_TTL_DAYS)
+
+
+def names_to_fetch(names, force: bool = False):
+    """Names without a fresh cache entry (all of them with force=True)"""
+    names = _normalize(names)
+    if force:
+        return names
+    now = timezone.now()
+    cached = cached_artists(names)
+    return [n for n in names if n not in cached or not is_fresh(cached[n], now)]
+
+
+def store_artists(details):
+    """Upsert {name: details} into WikidataArtist in one transaction"""
+    now = timezone.now()
+    with transaction.atomic():
+        WikidataArtist.objects.bulk_create(
+            [
+                WikidataArtist(name=name, fetched_at=now, **{field: (values or {}).get(field) for field in ARTIST_FIELDS})
+                for name, values in details.items()
+            ],
+            batch_size=DB_CHUNK,
+            update_conflicts=True,
+            unique_fields=["name"],
+            update_fields=[*ARTIST_FIELDS, "fetched_at"],
+        )
+
+
+def artist_details(names):
+    """{name: details} of the cached names, fresh or not; use enrich() to fetch the missing ones"""
+    return {
+        name: {field: getattr(row, field) for field in ARTIST_FIELDS}
+        for name, row in cached_artists(_normalize(names)).items()
+    }
@@ -0,0 +1,95 @@
+"""
+Persistent cache of Wikidata English labels keyed by entity URI, shared by the
+Wikidata importers. Only URIs that were never seen (or whose entry expired)
+are queried, in VALUES batches fetched concurrently.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from django.db import transaction
+from django.utils import timezone
+from .cache_refresh import jittered_ttl
+from .models import WikidataLabel
+
+LABEL_TTL_DAYS = 90
+LABEL_BATCH_SIZE = 500      # URIs per VALUES query
+LABEL_WORKERS = 4
+MAX_LABEL_LENGTH = 50       # longer labels are descriptions, not names
+DB_CHUNK = 500
+
+
+def _fetch_batch(uris, tag):
+    """{uri: label or None} for one batch, or None if the query failed"""
+    from .sparql import query_wikidata
+
+    uri_values = " ".join(f"<{uri}>" for uri in uris)
+    try:
+        results = query_wikidata(f"""
+            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+            SELECT ?uri ?label WHERE {{
+                VALUES ?uri {{ {uri_values} }}
+                ?uri rdfs:label ?label.
+                FILTER(lang(?label) = "en")
+            }}
+        """)
+        bindings = results["results"]["bindings"]
+    except Exception as e:
+        print(f"[{tag}] Batch of {len(uris)} URIs failed: {e}")
+        return None
+
+    labels = dict.fromkeys(uris)
+    for binding in bindings:
+        uri = binding["uri"]["value"]
+        label = binding["label"]["value"]
+        if len(label) < MAX_LABEL_LENGTH and labels.get(uri) is None:
+            labels[uri] = label
+    print(f"[{tag}] fetched {len(bindings)} labels for {len(uris)} URIs")
+    return labels
+
+
+def cached_labels(uris):
+    """{uri: WikidataLabel} for the URIs with a cache entry"""
+    uris = list(uris)
+    rows = {}
+    for start in range(0, len(uris), DB_CHUNK):
+        for row in WikidataLabel.objects.filter(uri__in=uris[start:start + DB_CHUNK]):
+            rows[row.uri] = row
+    return rows
+
+
+def store_labels(labels):
+    now = timezone.now()
+    with transaction.atomic():
+        WikidataLabel.objects.bulk_create(
+            [WikidataLabel(uri=uri, label=label, fetched_at=now) for uri, label in labels.items()],
+            batch_size=DB_CHUNK,
+            update_conflicts=True,
+            unique_fields=["uri"],
+            update_fields=["label", "fetched_at"],
+        )
+
+
+def resolve_labels(uris, tag: str = "LABEL FETCH"):
+    """English labels {uri: label} of the given entity URIs; URIs without one are left out"""
+    uris = {uri for uri in uris if uri}
+    now = timezone.now()
+    labels = {}
+    missing = []
+    cached = cached_labels(uris)
+    for uri in sorted(uris):
+        row = cached.get(uri)
+        if row is not None and row.fetched_at > now - jittered_ttl(uri, LABEL_TTL_DAYS):
+            labels[uri] = row.label
+        else:
+            missing.append(uri)
+    print(f"[{tag}] {len(labels)} labels cached, {len(missing)} to fetch")
+
+    batches = [missing[start:start + LABEL_BATCH_SIZE] for start in range(0, len(missing), LABEL_BATCH_SIZE)]
+    fetched = {}
+    if batches:
+        with ThreadPoolExecutor(max_workers=LABEL_WORKERS) as pool:
+            for result in pool.map(lambda batch: _fetch_batch(batch, tag), batches):
+                if result is not None:
+                    fetched.update(result)
+    if fetched:
+        store_labels(fetched)
+    labels.update(fetched)
+    return {uri: label for uri, label in labels.items() if label is not None}
@@ -32,6 +32,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "artworks.middleware.DatasetGenerationMiddleware",
 ]
 
 ROOT_URLCONF = "provenance.urls"
@@ -93,8 +94,38 @@ USE_TZ = True
 
 FUSEKI_ENDPOINT = "http://localhost:3030/provenance/query"
 FUSEKI_UPDATE = "http://localhost:3030/provenance/update"
+FUSEKI_DATA = "http://localhost:3030/provenance/data"
+
+# Bulk loads (artworks/fuseki_loader.py): uncompressed bytes per GSP request
+FUSEKI_LOAD_CHUNK_BYTES = 4 * 1024 * 1024
+FUSEKI_LOAD_GZIP = True
+
+# Named graph every import source loads into (reload one with manage.py
+# reload_source). The dataset uses tdb2:unionDefaultGraph, so queries on the
+# default graph see all of them.
+FUSEKI_GRAPHS = {
+    "wikidata": "http://example.org/graph/wikidata",
+    "preload": "http://example.org/graph/preload",
+    "romanian": "http://example.org/graph/romanian",
+}
+
+# Imports load into a staging generation of their graph that only replaces
+# the live one once its triple count checks out (artworks/generations.py)
+FUSEKI_STAGED_IMPORTS = True
+
+# Shared pooled HTTP client (artworks/http_client.py): connections kept alive per origin
+HTTP_POOL_SIZE = 10
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 60
+
+# Local Getty ULAN/AAT label index (manage.py build_getty_index)
+GETTY_INDEX_PATH = os.environ.get("GETTY_INDEX_PATH", str(BASE_DIR / "getty_index.sqlite3"))
+
+# Downloaded datasets (data.gov.ro LIDO XML), refreshed with conditional/resumable requests
+DATASET_CACHE_DIR = os.environ.get("DATASET_CACHE_DIR", str(BASE_DIR / "dataset_cache"))
 
 # CORS Configuration - Allow Swagger Editor and all origins for development
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ["X-Dataset-Generation"]
 
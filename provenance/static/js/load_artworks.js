@@ -5,6 +5,9 @@ let currentPage = 1;
 let totalPages = 1;
 let totalArtworks = 0;
 const itemsPerPage = 20; // Redus de la 50 la 20 pentru performanță mai bună cu imagini
+const sortOrder = "iri";
+// pageCursors[n] = cursorul care deschide pagina n (pagina 1 nu are cursor)
+const pageCursors = { 1: null };
 
 // Helper to validate birth date
 function isValidBirthDate(dateStr) {
@@ -71,16 +74,23 @@ function renderArtworks(pageData, page) {
 
 function fetchPage(page) {
   if (page < 1 || page > totalPages) return;
+  if (page > 1 && !pageCursors[page]) return;
   currentPage = page;
   
   div.innerHTML = `<p>Se încarcă pagina ${page}...</p>`;
   
-  fetch(`/api/?page=${page}&per_page=${itemsPerPage}`)
+  const cursor = pageCursors[page];
+  const url = cursor
+    ? `/api/?cursor=${encodeURIComponent(cursor)}&per_page=${itemsPerPage}`
+    : `/api/?sort=${sortOrder}&per_page=${itemsPerPage}`;
+  
+  fetch(url)
     .then(r => r.json())
     .then(data => {
-        totalPages = data.total_pages;
         totalArtworks = data.total;
-        renderArtworks(data.items, data.page);
+        pageCursors[page + 1] = data.next_cursor;
+        totalPages = data.next_cursor ? Math.max(data.total_pages, page + 1) : page;
+        renderArtworks(data.items, page);
     })
     .catch(err => {
       div.innerHTML = `<p style="color: red;">Eroare: ${err.message}</p>`;